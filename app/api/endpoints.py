@@ -1,14 +1,34 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional
+from datetime import datetime
 import logging
-from app.database.connection import DatabaseConnection
+import time
+from app.database.connection import DatabaseConnection, recommendations_key
 from app.services.clean_mining_service import CleanAssociationMiningService
+from app.services.cost_estimator import estimate_from_database
+from app.services.itemset_cache import itemset_cache
+from app.services.mining_engine import SEGMENT_DAYS, weighted_support
+from app.services.recommendation_index import RecommendationIndex, recommendation_index_store
+from app.services.rule_export import store_rules
+from app.services.rule_index import RuleIndex
+from app.services.rule_kernel import SIGNIFICANCE_TESTS
+from app.services.scoring_service import ScoringService
 from app.services.task_manager import task_manager, TaskStatus
+from app.services.threshold_sweep import sweep_thresholds
+from app.services.time_weighting import TIME_WEIGHTING_METHODS
+from app.utils.config import config
+from app.utils.profiling import PROFILE_FILES, TaskProfiler, profile_file
+from app.utils.task_logs import current_task_id, read_task_logs
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Recommendations table served by the lookup endpoints
+DEFAULT_RECOMMENDATIONS_KEY = recommendations_key(config.DB_HOST, config.DB_NAME, config.RECOMMENDATIONS_TABLE)
+
 # Request/Response models
 class DatabaseConfig(BaseModel):
     host: Optional[str] = None
@@ -26,16 +46,80 @@ class MiningRequest(BaseModel):
     use_enhanced_mining: Optional[bool] = True
     time_weighting_method: Optional[str] = "exponential_decay"  # exponential_decay, linear_decay, seasonal_patterns, recency_frequency, trend_adaptive
     time_segmentation: Optional[str] = "weekly"  # weekly, monthly, daily
+    scoring_method: Optional[str] = None  # weighted_product, weighted_sum, normalized_product, temporal_weighted, temporal_trend_focused, temporal_stability_focused
+    scoring_weights: Optional[Dict[str, float]] = None  # Overrides the configured weights for scoring_method
+    significance_test: Optional[str] = None  # none, fisher, chi2 (defaults to SIGNIFICANCE_TEST)
+    parallel_mining: Optional[bool] = None  # Mine time segments concurrently (defaults to PARALLEL_MINING)
+    progressive_mining: Optional[bool] = None  # Mine from a high support down while time remains (defaults to PROGRESSIVE_MINING)
+    profile: Optional[bool] = False  # Capture a CPU profile and top allocation sites for this task
     db_config: Optional[DatabaseConfig] = None  # Database configuration from UI
 
+class TuneRequest(BaseModel):
+    artifact: str  # stats.itemset_artifact of a mining result (see GET /mine-rules/artifacts)
+    min_confidence: Optional[float] = None
+    min_lift: Optional[float] = None
+    max_recommendations: Optional[int] = None  # Recommendations kept per item (defaults to MAX_RECOMMENDATIONS)
+    time_weighting_method: Optional[str] = None
+    time_segmentation: Optional[str] = None
+    scoring_method: Optional[str] = None
+    scoring_weights: Optional[Dict[str, float]] = None
+    significance_test: Optional[str] = None
+    rules_limit: int = 100  # Top rules returned in the response
+
+class SweepRequest(BaseModel):
+    supports: List[float]
+    confidences: List[float]
+    lifts: Optional[List[float]] = None  # Defaults to [MIN_LIFT]
+    max_recommendations: Optional[int] = None  # Recommendations kept per item (defaults to MAX_RECOMMENDATIONS)
+    time_weighting_method: Optional[str] = None  # Defaults to DEFAULT_TIME_WEIGHTING_METHOD
+    artifact: Optional[str] = None  # Sweep a cached itemset artifact instead of fetching and mining
+    days_back: Optional[int] = None
+    db_config: Optional[DatabaseConfig] = None
+
 class RecommendationResponse(BaseModel):
     recommended_item: str
     score: float
     rank: int
 
 class ItemRecommendationsResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
     main_item: str
     recommendations: List[RecommendationResponse]
+    model_version: Optional[str] = None
+
+class BatchRecommendationsRequest(BaseModel):
+    items: List[str]
+    limit: Optional[int] = 10
+
+class BatchRecommendationsResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    results: List[ItemRecommendationsResponse]
+    count: int
+    model_version: Optional[str] = None
+
+class BasketRecommendationsRequest(BaseModel):
+    items: List[str]
+    limit: Optional[int] = 10
+    aggregation: Optional[str] = "sum"  # sum, max
+
+class BasketRecommendationResponse(BaseModel):
+    recommended_item: str
+    score: float
+    rank: int
+    rules_matched: int
+
+class BasketRecommendationsResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    basket: List[str]
+    recommendations: List[BasketRecommendationResponse]
+    rules_evaluated: int
+    rules_matched: int
+    unknown_items: List[str]
+    model_version: Optional[str] = None
+    latency_ms: float
 
 class MiningStatusResponse(BaseModel):
     status: str
@@ -54,14 +138,103 @@ class TaskStatusResponse(BaseModel):
     error: Optional[str] = None
     metadata: Optional[dict] = None
     result: Optional[dict] = None
+    version: int = 0
+
+def _snapshot_response(payload: str, etag: Optional[str] = None, request: Optional[Request] = None) -> Response:
+    """Return a pre-serialized JSON payload, answering 304 when the client already has this version"""
+    headers = {"ETag": etag} if etag else None
+    if etag and request is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+def _load_recommendation_index(db_config=None):
+    """Load the published recommendations table into an in-memory index"""
+    db = DatabaseConnection(custom_config=db_config) if db_config else DatabaseConnection()
+    
+    try:
+        if not db.connect():
+            return None
+        
+        rows = db.fetch_all_recommendations()
+        if rows is None:
+            return None
+        
+        return RecommendationIndex.from_rows(
+            rows,
+            version=f"db-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+            source="database"
+        )
+    
+    finally:
+        db.disconnect()
+
+def _rules_for_ui(recommendations, limit: int = 100):
+    """Top `limit` recommendations as UI rules with scores normalized to 0.001 - 0.999, plus their score range"""
+    # Sort recommendations by composite_score descending for UI (highest scores first)
+    recommendations_sorted = recommendations.sort_values('composite_score', ascending=False).reset_index(drop=True)
+    
+    # Normalize scores for UI (same logic as database)
+    scores = recommendations_sorted['composite_score'].astype(float)
+    min_score = scores.min()
+    max_score = scores.max()
+    
+    # Normalize to 0.001 - 0.999 range
+    if max_score == min_score:
+        normalized_scores = [0.5] * len(scores)  # Use middle value if all scores identical
+    else:
+        normalized_scores = (0.001 + (scores - min_score) / (max_score - min_score) * 0.998).tolist()
+    
+    # Convert recommendations to JSON-serializable format for UI with normalized scores
+    rules_for_ui = []
+    for idx, (_, rec) in enumerate(recommendations_sorted.head(limit).iterrows()):
+        rules_for_ui.append({
+            "sku1": rec.get('main_item', ''),           # SKU ID
+            "sku2": rec.get('recommended_item', ''),    # SKU ID
+            "sku1_name": rec.get('main_item_name', ''), # SKU Name
+            "sku2_name": rec.get('recommended_item_name', ''), # SKU Name
+            "main_item": rec.get('main_item', ''),      # SKU ID (for backward compatibility)
+            "recommended_item": rec.get('recommended_item', ''), # SKU ID (for backward compatibility)
+            "main_item_name": rec.get('main_item_name', ''),     # SKU Name
+            "recommended_item_name": rec.get('recommended_item_name', ''), # SKU Name
+            "confidence": float(rec.get('confidence_score', 0)),
+            "lift": float(rec.get('lift_score', 0)),
+            "support": float(rec.get('support_score', 0)),
+            "composite_score": float(normalized_scores[idx]),  # NORMALIZED SCORE
+            "association_composite_score": float(normalized_scores[idx])  # NORMALIZED SCORE
+        })
+    
+    # Calculate normalized score range for UI (using sorted data)
+    ui_scores = [float(normalized_scores[idx]) for idx in range(min(limit, len(normalized_scores)))]
+    score_range = {
+        "min": min(ui_scores) if ui_scores else 0.001,
+        "max": max(ui_scores) if ui_scores else 0.999
+    }
+    
+    return rules_for_ui, score_range
+
+def _support_stats(mining_service):
+    """Target and reached support of a run, with the levels of a progressive run"""
+    stats = {"support_target": mining_service.support_target, "support_reached": mining_service.support_reached}
+    if mining_service.progressive_mining:
+        stats["support_levels"] = mining_service.support_levels
+    return stats
 
 # Background task for mining
-def run_mining_task(task_id: str, days_back=None, use_enhanced_mining=True, time_weighting_method="exponential_decay", time_segmentation="weekly", db_config=None):
+def run_mining_task(task_id: str, days_back=None, use_enhanced_mining=True, time_weighting_method="exponential_decay", time_segmentation="weekly", db_config=None, scoring_method=None, scoring_weights=None, min_support=None, min_confidence=None, significance_test=None, parallel_mining=None, progressive_mining=None, profile=False):
     """Background task to run mining pipeline with progress tracking"""
+    profiler = None
+    # Everything logged by this task (including its worker threads) goes to its task log
+    task_log_token = current_task_id.set(task_id)
     try:
         # Mark task as started
         task_manager.start_task(task_id, "Initializing mining process...")
         
+        # Profile only when asked; the summary and artifact links land in the task metadata
+        if profile:
+            profiler = TaskProfiler(task_id)
+            task_manager.add_finalizer(task_id, lambda: {"profile_report": profiler.stop()})
+            profiler.start()
+        
         # Log received configuration
         if db_config:
             logger.info(f"Mining task using custom configuration with table: {db_config.get('recommendations_table', 'NOT SET')}")
@@ -75,7 +248,33 @@ def run_mining_task(task_id: str, days_back=None, use_enhanced_mining=True, time
             db = DatabaseConnection()
         
         # Use the clean mining service for all operations
-        mining_service = CleanAssociationMiningService(task_id=task_id, task_manager=task_manager)
+        mining_service = CleanAssociationMiningService(
+            task_id=task_id,
+            task_manager=task_manager,
+            scoring_method=scoring_method,
+            scoring_weights=scoring_weights,
+            min_support=min_support,
+            min_confidence=min_confidence,
+            significance_test=significance_test,
+            time_weighting_method=time_weighting_method,
+            time_segmentation=time_segmentation,
+            parallel_mining=parallel_mining,
+            progressive_mining=progressive_mining,
+            profiler=profiler
+        )
+        
+        # Progressive mining reports the best model found so far while lower supports are mined.
+        # It stays with the task: only the final model is saved to the database and published.
+        def report_interim_model(recommendations, support):
+            rules_for_ui, score_range = _rules_for_ui(recommendations, limit=20)
+            task_manager.update_metadata(task_id, {"interim_model": {
+                "support": support,
+                "recommendations_count": len(recommendations),
+                "score_range": score_range,
+                "rules": rules_for_ui
+            }})
+            logger.info(f"Interim model at support {support:.4g}: {len(recommendations)} recommendations")
+        mining_service.on_interim_model = report_interim_model
         
         # Connect to database
         task_manager.update_progress(task_id, 0.1, "Connecting to database...")
@@ -83,9 +282,33 @@ def run_mining_task(task_id: str, days_back=None, use_enhanced_mining=True, time
             task_manager.fail_task(task_id, "Failed to connect to database")
             return
         
+        # Pre-flight cost estimate: warn about, downgrade or reject runs over the configured budgets
+        cost_estimate = None
+        support_downgrade = None
+        if config.MINING_BUDGET_ACTION != "off":
+            task_manager.update_progress(task_id, 0.15, "Estimating mining cost...")
+            with mining_service.stages.stage("estimate"):
+                cost_estimate = estimate_from_database(
+                    db, days_back, mining_service.min_support, mining_service.min_confidence, mining_service.min_lift
+                )
+            if cost_estimate is not None and cost_estimate["decision"] == "reject":
+                task_manager.fail_task(task_id, f"Estimated cost exceeds budget: {'; '.join(cost_estimate['violations'])}")
+                return
+            if cost_estimate is not None and cost_estimate["decision"] == "warn":
+                logger.warning("Estimated cost exceeds budget (%s), mining at min_support %s as requested",
+                               "; ".join(cost_estimate["violations"]), mining_service.min_support)
+            if cost_estimate is not None and cost_estimate["decision"] == "downgrade":
+                logger.warning("Estimated cost exceeds budget (%s), raising min_support from %s to %s",
+                               "; ".join(cost_estimate["violations"]), mining_service.min_support,
+                               cost_estimate["recommended_support"])
+                support_downgrade = {"from": mining_service.min_support, "to": cost_estimate["recommended_support"]}
+                mining_service.min_support = cost_estimate["recommended_support"]
+        
         # Fetch data
         task_manager.update_progress(task_id, 0.2, "Fetching order data...")
-        df_basket = db.fetch_order_data(days_back=days_back)
+        with mining_service.stages.stage("fetch") as stage:
+            df_basket = db.fetch_order_data(days_back=days_back)
+            stage["rows_out"] = len(df_basket) if df_basket is not None else 0
         if df_basket is None or df_basket.empty:
             task_manager.fail_task(task_id, "No data found for mining")
             return
@@ -101,81 +324,82 @@ def run_mining_task(task_id: str, days_back=None, use_enhanced_mining=True, time
         if not recommendations.empty:
             # Save to database
             task_manager.update_progress(task_id, 0.9, "Saving recommendations to database...")
-            success = db.save_recommendations(recommendations)
+            with mining_service.stages.stage("save", rows_in=len(recommendations)) as stage:
+                success = db.save_recommendations(recommendations)
+                stage["rows_out"] = len(recommendations) if success else 0
             
-            # Sort recommendations by composite_score descending for UI (highest scores first)
-            recommendations_sorted = recommendations.sort_values('composite_score', ascending=False).reset_index(drop=True)
-            
-            # Normalize scores for UI (same logic as database)
-            scores = recommendations_sorted['composite_score'].astype(float)
-            min_score = scores.min()
-            max_score = scores.max()
-            
-            # Normalize to 0.001 - 0.999 range
-            if max_score == min_score:
-                normalized_scores = [0.5] * len(scores)  # Use middle value if all scores identical
-            else:
-                normalized_scores = (0.001 + (scores - min_score) / (max_score - min_score) * 0.998).tolist()
+            # Publish the new model to the in-memory lookup index
+            model_version = None
+            if success:
+                model_version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{task_id[:8]}"
+                with mining_service.stages.stage("publish", rows_in=len(recommendations)):
+                    recommendation_index_store.publish(
+                        db.recommendations_key,
+                        RecommendationIndex.from_recommendations(recommendations, version=model_version),
+                        rule_index=RuleIndex.from_rule_set(mining_service.rules, mining_service.sku_name_to_id, model_version)
+                    )
             
-            # Convert recommendations to JSON-serializable format for UI with normalized scores
-            rules_for_ui = []
-            for idx, (_, rec) in enumerate(recommendations_sorted.head(100).iterrows()):  # Limit to first 100 for UI
-                rules_for_ui.append({
-                    "sku1": rec.get('main_item', ''),           # SKU ID
-                    "sku2": rec.get('recommended_item', ''),    # SKU ID
-                    "sku1_name": rec.get('main_item_name', ''), # SKU Name
-                    "sku2_name": rec.get('recommended_item_name', ''), # SKU Name
-                    "main_item": rec.get('main_item', ''),      # SKU ID (for backward compatibility)
-                    "recommended_item": rec.get('recommended_item', ''), # SKU ID (for backward compatibility)
-                    "main_item_name": rec.get('main_item_name', ''),     # SKU Name
-                    "recommended_item_name": rec.get('recommended_item_name', ''), # SKU Name
-                    "confidence": float(rec.get('confidence_score', 0)),
-                    "lift": float(rec.get('lift_score', 0)),
-                    "support": float(rec.get('support_score', 0)),
-                    "composite_score": float(normalized_scores[idx]),  # NORMALIZED SCORE
-                    "association_composite_score": float(normalized_scores[idx])  # NORMALIZED SCORE
-                })
+            # Keep the full table for downloads; the UI only receives the top 100
+            export_id = None
+            try:
+                with mining_service.stages.stage("export", rows_in=len(recommendations)):
+                    store_rules(task_id, recommendations)
+                export_id = task_id
+            except OSError as e:
+                logger.warning(f"Could not store export for task {task_id}: {e}")
             
-            # Calculate normalized score range for UI (using sorted data)
-            ui_scores = [float(normalized_scores[idx]) for idx in range(min(100, len(normalized_scores)))]
-            score_range = {
-                "min": min(ui_scores) if ui_scores else 0.001,
-                "max": max(ui_scores) if ui_scores else 0.999
-            }
+            rules_for_ui, score_range = _rules_for_ui(recommendations)
             
             result = {
                 "recommendations_count": len(recommendations),
                 "mining_method": "enhanced" if use_enhanced_mining else "standard",
                 "time_weighting_method": time_weighting_method if use_enhanced_mining else None,
+                "model_version": model_version,
                 "stats": {
                     "total_rules": len(rules_for_ui),
                     "top_n_skus": len(df_basket['SKU_NAME'].unique()) if not df_basket.empty else 0,
                     "total_orders": len(df_basket['ORDER_ID'].unique()) if not df_basket.empty else 0,
                     "score_range": score_range,
                     "mining_duration": "completed",
-                    "database_saved": success
+                    "database_saved": success,
+                    "export_id": export_id,
+                    "itemset_artifact": mining_service.itemset_artifact
                 },
-                "rules": rules_for_ui
+                "rules": rules_for_ui,
+                "stages": mining_service.stages.to_list()
             }
+            if mining_service.partition_stats is not None:
+                result["stats"]["partitions"] = mining_service.partition_stats
+            result["stats"].update(_support_stats(mining_service))
+            support_note = ""
+            if mining_service.support_reached != mining_service.support_target:
+                support_note = f" at support {mining_service.support_reached:.4g} (time budget reached before {mining_service.support_target:.4g})"
+            if support_downgrade is not None:
+                result["stats"]["support_downgrade"] = support_downgrade
+                support_note += f" (min_support raised from {support_downgrade['from']:.4g} to {support_downgrade['to']:.4g} to stay within budget)"
+            if cost_estimate is not None:
+                result["cost_estimate"] = cost_estimate
             
             if success:
                 task_manager.complete_task(
                     task_id, 
                     result=result,
-                    message=f"Mining completed: {len(recommendations)} recommendations generated and saved to database"
+                    message=f"Mining completed{support_note}: {len(recommendations)} recommendations generated and saved to database"
                 )
                 logger.info(f"Mining completed: {len(recommendations)} recommendations generated and saved to database")
             else:
                 task_manager.complete_task(
                     task_id, 
                     result=result,
-                    message=f"Mining completed: {len(recommendations)} recommendations generated (database save failed)"
+                    message=f"Mining completed{support_note}: {len(recommendations)} recommendations generated (database save failed)"
                 )
                 logger.warning(f"Mining completed: {len(recommendations)} recommendations generated but database save failed")
         else:
             task_manager.complete_task(
                 task_id,
-                result={"recommendations_count": 0},
+                result={"recommendations_count": 0,
+                        "stats": {**_support_stats(mining_service), "support_downgrade": support_downgrade},
+                        "stages": mining_service.stages.to_list(), "cost_estimate": cost_estimate},
                 message="Mining completed but no recommendations generated"
             )
             logger.warning("No recommendations generated")
@@ -186,8 +410,11 @@ def run_mining_task(task_id: str, days_back=None, use_enhanced_mining=True, time
         logger.error(error_msg)
     
     finally:
+        if profiler is not None:
+            task_manager.run_finalizers(task_id)
         if 'db' in locals():
             db.disconnect()
+        current_task_id.reset(task_log_token)
 
 @router.post("/mine-rules", response_model=MiningStatusResponse)
 async def mine_association_rules(
@@ -195,15 +422,31 @@ async def mine_association_rules(
     background_tasks: BackgroundTasks
 ):
     """Start association rule mining process with task tracking"""
+    if request.scoring_method and request.scoring_method not in ScoringService.STANDARD_METHODS + ScoringService.TEMPORAL_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring method: {request.scoring_method}")
+    if request.significance_test and request.significance_test not in SIGNIFICANCE_TESTS:
+        raise HTTPException(status_code=400, detail=f"Unknown significance test: {request.significance_test}")
+    if request.time_weighting_method and request.time_weighting_method not in TIME_WEIGHTING_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown time weighting method: {request.time_weighting_method}")
+    if request.time_segmentation and request.time_segmentation not in SEGMENT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Unknown time segmentation: {request.time_segmentation}")
+    
     try:
         # Create a new task
         task_id = task_manager.create_task(
             task_type="association_mining",
             metadata={
                 "days_back": request.days_back,
+                "min_support": request.min_support,
+                "min_confidence": request.min_confidence,
                 "use_enhanced_mining": request.use_enhanced_mining,
                 "time_weighting_method": request.time_weighting_method,
                 "time_segmentation": request.time_segmentation,
+                "scoring_method": request.scoring_method,
+                "significance_test": request.significance_test,
+                "parallel_mining": request.parallel_mining,
+                "progressive_mining": request.progressive_mining,
+                "profile": request.profile,
                 "db_config": request.db_config.dict() if request.db_config else None
             }
         )
@@ -219,7 +462,15 @@ async def mine_association_rules(
             use_enhanced_mining=request.use_enhanced_mining,
             time_weighting_method=request.time_weighting_method,
             time_segmentation=request.time_segmentation,
-            db_config=db_config_dict
+            db_config=db_config_dict,
+            scoring_method=request.scoring_method,
+            scoring_weights=request.scoring_weights,
+            min_support=request.min_support,
+            min_confidence=request.min_confidence,
+            significance_test=request.significance_test,
+            parallel_mining=request.parallel_mining,
+            progressive_mining=request.progressive_mining,
+            profile=bool(request.profile)
         )
         
         mining_type = "Enhanced" if request.use_enhanced_mining else "Standard"
@@ -233,9 +484,188 @@ async def mine_association_rules(
         logger.error(f"Error starting mining: {e}")
         raise HTTPException(status_code=500, detail="Failed to start mining process")
 
+@router.post("/mine-rules/estimate")
+async def estimate_mining_cost(request: MiningRequest):
+    """Dry run: estimate orders, SKUs, itemsets, runtime and RSS of a mining request without running it"""
+    # Connecting and the statistics queries block, so all of it runs in the threadpool
+    return await run_in_threadpool(_estimate_mining_cost, request)
+
+def _estimate_mining_cost(request: MiningRequest):
+    db_config = request.db_config.dict() if request.db_config else None
+    db = DatabaseConnection(custom_config=db_config) if db_config else DatabaseConnection()
+    
+    try:
+        if not db.connect():
+            raise HTTPException(status_code=500, detail="Database connection failed")
+        
+        estimate = estimate_from_database(db, request.days_back, request.min_support, request.min_confidence)
+        if estimate is None:
+            raise HTTPException(status_code=500, detail="Failed to read order statistics")
+        return estimate
+    
+    finally:
+        db.disconnect()
+
+def _tune_recommendations(request: TuneRequest):
+    artifact = itemset_cache.load(request.artifact)
+    if artifact is None:
+        return None
+    
+    start = time.perf_counter()
+    mining_service = CleanAssociationMiningService(
+        scoring_method=request.scoring_method,
+        scoring_weights=request.scoring_weights,
+        min_confidence=request.min_confidence,
+        min_lift=request.min_lift,
+        significance_test=request.significance_test,
+        time_weighting_method=request.time_weighting_method,
+        time_segmentation=request.time_segmentation,
+        max_recommendations=request.max_recommendations
+    )
+    recommendations = mining_service.recommendations_from_artifact(artifact)
+    rules_for_ui, score_range = _rules_for_ui(recommendations, request.rules_limit) if not recommendations.empty else ([], None)
+    
+    return {
+        **artifact.info(),
+        "min_confidence": mining_service.min_confidence,
+        "min_lift": mining_service.min_lift,
+        "max_recommendations": mining_service.max_recommendations,
+        "rules_count": len(mining_service.rules),
+        "recommendations_count": len(recommendations),
+        "items_covered": int(recommendations['main_item'].nunique()) if not recommendations.empty else 0,
+        "score_range": score_range,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        "rules": rules_for_ui,
+        "stages": mining_service.stages.to_list()
+    }
+
+@router.post("/mine-rules/tune")
+async def tune_mining_thresholds(request: TuneRequest):
+    """What-if: rules and recommendations for new confidence / lift / top-N values from a run's cached itemsets"""
+    if request.scoring_method and request.scoring_method not in ScoringService.STANDARD_METHODS + ScoringService.TEMPORAL_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring method: {request.scoring_method}")
+    if request.significance_test and request.significance_test not in SIGNIFICANCE_TESTS:
+        raise HTTPException(status_code=400, detail=f"Unknown significance test: {request.significance_test}")
+    if request.time_segmentation and request.time_segmentation not in SEGMENT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Unknown time segmentation: {request.time_segmentation}")
+    if request.time_weighting_method and request.time_weighting_method not in TIME_WEIGHTING_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown time weighting method: {request.time_weighting_method}")
+    if request.max_recommendations is not None and request.max_recommendations < 1:
+        raise HTTPException(status_code=400, detail="max_recommendations must be at least 1")
+    
+    try:
+        result = await run_in_threadpool(_tune_recommendations, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Itemset artifact not found; run mining again")
+    return result
+
+def _run_sweep(request: SweepRequest):
+    start = time.perf_counter()
+    lifts = request.lifts or [config.MIN_LIFT]
+    mining_service = CleanAssociationMiningService(min_support=min(request.supports),
+                                                   max_recommendations=request.max_recommendations,
+                                                   time_weighting_method=request.time_weighting_method)
+    
+    if request.artifact:
+        artifact = itemset_cache.load(request.artifact)
+        if artifact is None:
+            raise HTTPException(status_code=404, detail="Itemset artifact not found; run mining again")
+        basket, itemsets, support_mined, artifact_key = artifact.basket, artifact.itemsets, artifact.min_support, artifact.key
+    else:
+        # One fetch and one mining pass at the lowest support of the grid
+        db_config = request.db_config.dict() if request.db_config else None
+        db = DatabaseConnection(custom_config=db_config) if db_config else DatabaseConnection()
+        try:
+            if not db.connect():
+                raise HTTPException(status_code=500, detail="Database connection failed")
+            with mining_service.stages.stage("fetch") as stage:
+                df_basket = db.fetch_order_data(days_back=request.days_back)
+                stage["rows_out"] = len(df_basket) if df_basket is not None else 0
+        finally:
+            db.disconnect()
+        if df_basket is None or df_basket.empty:
+            raise HTTPException(status_code=404, detail="No data found for mining")
+        
+        basket, itemsets = mining_service.mine_itemsets(df_basket)
+        if itemsets is None:
+            raise HTTPException(status_code=504, detail="Mining at the lowest support timed out; raise the lowest support")
+        support_mined, artifact_key = mining_service.support_target, mining_service.itemset_artifact
+    
+    weights = mining_service.order_weights(basket)
+    with mining_service.stages.stage("sweep", rows_in=len(itemsets)) as stage:
+        itemset_support = weighted_support(basket, itemsets.items, weights) if weights is not None else None
+        grid = sweep_thresholds(basket, itemsets, request.supports, request.confidences, lifts,
+                                mining_service.max_recommendations, support_mined, itemset_support)
+        stage["rows_out"] = len(grid)
+    
+    return {
+        "support_mined": support_mined,
+        "itemset_artifact": artifact_key,
+        "orders": len(basket),
+        "items": basket.n_items,
+        "itemsets": len(itemsets),
+        "max_recommendations": mining_service.max_recommendations,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        "grid": grid,
+        "stages": mining_service.stages.to_list()
+    }
+
+@router.post("/mine-rules/sweep")
+async def sweep_mining_thresholds(request: SweepRequest):
+    """Rule counts, coverage and score distribution for a grid of support / confidence / lift values, from one mining pass"""
+    lifts = request.lifts or [config.MIN_LIFT]
+    if not request.supports or not request.confidences:
+        raise HTTPException(status_code=400, detail="supports and confidences must not be empty")
+    if any(not 0 < value <= 1 for value in request.supports + request.confidences):
+        raise HTTPException(status_code=400, detail="Supports and confidences must be in (0, 1]")
+    if any(value < 0 for value in lifts):
+        raise HTTPException(status_code=400, detail="Lifts must not be negative")
+    if len(request.supports) * len(request.confidences) * len(lifts) > config.SWEEP_MAX_CELLS:
+        raise HTTPException(status_code=400, detail=f"Grid exceeds SWEEP_MAX_CELLS ({config.SWEEP_MAX_CELLS})")
+    if request.time_weighting_method and request.time_weighting_method not in TIME_WEIGHTING_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown time weighting method: {request.time_weighting_method}")
+    if request.max_recommendations is not None and request.max_recommendations < 1:
+        raise HTTPException(status_code=400, detail="max_recommendations must be at least 1")
+    
+    try:
+        return await run_in_threadpool(_run_sweep, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/mine-rules/artifacts")
+async def list_itemset_artifacts():
+    """Cached itemset artifacts available for tuning, most recently used first"""
+    return {"artifacts": itemset_cache.list()}
+
+async def _published_index():
+    """Published recommendation index; a cold or retried load (a full MySQL read) runs off the event loop"""
+    if recommendation_index_store.get(DEFAULT_RECOMMENDATIONS_KEY) is not None:
+        # Warm: returns at once (a stale index is refreshed in a background thread)
+        return recommendation_index_store.get_or_load(DEFAULT_RECOMMENDATIONS_KEY, _load_recommendation_index)
+    return await run_in_threadpool(recommendation_index_store.get_or_load, DEFAULT_RECOMMENDATIONS_KEY,
+                                   _load_recommendation_index)
+
 @router.get("/recommendations/{item_name}", response_model=ItemRecommendationsResponse)
 async def get_item_recommendations(item_name: str, limit: int = 10):
     """Get recommendations for a specific item"""
+    index = await _published_index()
+    
+    if index is not None:
+        return ItemRecommendationsResponse(
+            main_item=item_name,
+            model_version=index.version,
+            recommendations=[
+                RecommendationResponse(recommended_item=child, score=score, rank=rank)
+                for rank, (child, score) in enumerate(index.lookup(item_name, limit), start=1)
+            ]
+        )
+    
+    # Index unavailable - fall back to a direct database lookup
+    return await run_in_threadpool(_database_item_recommendations, item_name, limit)
+
+def _database_item_recommendations(item_name: str, limit: int):
     db = DatabaseConnection()
     
     try:
@@ -251,6 +681,8 @@ async def get_item_recommendations(item_name: str, limit: int = 10):
             ]
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting recommendations: {e}")
         raise HTTPException(status_code=500, detail="Failed to get recommendations")
@@ -258,39 +690,180 @@ async def get_item_recommendations(item_name: str, limit: int = 10):
     finally:
         db.disconnect()
 
+@router.post("/recommendations/batch", response_model=BatchRecommendationsResponse)
+async def get_batch_recommendations(request: BatchRecommendationsRequest):
+    """Get recommendations for many items in one request"""
+    if len(request.items) > config.RECOMMENDATION_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items: {len(request.items)} (max {config.RECOMMENDATION_BATCH_MAX_ITEMS})"
+        )
+    
+    limit = request.limit if request.limit is not None else 10
+    index = await _published_index()
+    
+    if index is not None:
+        found = index.lookup_many(request.items, limit)
+        results = [
+            ItemRecommendationsResponse(
+                main_item=item,
+                model_version=index.version,
+                recommendations=[
+                    RecommendationResponse(recommended_item=child, score=score, rank=rank)
+                    for rank, (child, score) in enumerate(found.get(item, []), start=1)
+                ]
+            )
+            for item in request.items
+        ]
+        return BatchRecommendationsResponse(results=results, count=len(results), model_version=index.version)
+    
+    # Index unavailable - fall back to a single database query for all items
+    return await run_in_threadpool(_database_batch_recommendations, request.items, limit)
+
+def _database_batch_recommendations(items: List[str], limit: int):
+    db = DatabaseConnection()
+    
+    try:
+        if not db.connect():
+            raise HTTPException(status_code=500, detail="Database connection failed")
+        
+        found = db.get_recommendations_batch(items, limit=limit)
+        if found is None:
+            raise HTTPException(status_code=500, detail="Failed to get recommendations")
+        
+        results = [
+            ItemRecommendationsResponse(
+                main_item=item,
+                recommendations=[RecommendationResponse(**rec) for rec in found.get(item, [])]
+            )
+            for item in items
+        ]
+        return BatchRecommendationsResponse(results=results, count=len(results))
+    
+    finally:
+        db.disconnect()
+
+@router.post("/recommendations/basket", response_model=BasketRecommendationsResponse)
+async def get_basket_recommendations(request: BasketRecommendationsRequest):
+    """Get companion items for a whole basket, aggregated over every rule the basket fires"""
+    start_time = time.perf_counter()
+    
+    if request.aggregation not in RuleIndex.AGGREGATIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown aggregation: {request.aggregation}")
+    
+    index = await _published_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="No published recommendation model available")
+    
+    rule_index = recommendation_index_store.get_rule_index(DEFAULT_RECOMMENDATIONS_KEY)
+    recommendations, stats = rule_index.score_basket(
+        request.items,
+        limit=request.limit if request.limit is not None else 10,
+        aggregation=request.aggregation
+    )
+    
+    return BasketRecommendationsResponse(
+        basket=request.items,
+        recommendations=[
+            BasketRecommendationResponse(recommended_item=item, score=score, rank=rank, rules_matched=matched)
+            for rank, (item, score, matched) in enumerate(recommendations, start=1)
+        ],
+        model_version=rule_index.version,
+        latency_ms=(time.perf_counter() - start_time) * 1000,
+        **stats
+    )
+
+@router.get("/recommendations-index")
+async def get_recommendation_index_info():
+    """Get the model version and size of the in-memory recommendation index"""
+    index = recommendation_index_store.get(DEFAULT_RECOMMENDATIONS_KEY)
+    if index is None:
+        return {"loaded": False}
+    return {"loaded": True, **index.info()}
+
+@router.post("/recommendations-index/reload")
+async def reload_recommendation_index():
+    """Reload the in-memory recommendation index from the database"""
+    index = await run_in_threadpool(_load_recommendation_index)
+    if index is None:
+        raise HTTPException(status_code=500, detail="Failed to load recommendations from database")
+    
+    recommendation_index_store.publish(DEFAULT_RECOMMENDATIONS_KEY, index)
+    return {"loaded": True, **index.info()}
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Association Mining API"}
 
 @router.get("/task/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str):
+async def get_task_status(task_id: str, request: Request, include_result: bool = True):
     """Get status of a specific task"""
-    task = task_manager.get_task(task_id)
+    snapshot = task_manager.get_task_json(task_id, include_result=include_result)
     
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    version, payload = snapshot
+    etag = f'"{task_id}-{version}-{int(include_result)}"'
+    return _snapshot_response(payload, etag, request)
+
+@router.get("/task/{task_id}/status", response_model=TaskStatusResponse)
+async def get_task_status_only(task_id: str, request: Request):
+    """Get lightweight status of a specific task (without results)"""
+    return await get_task_status(task_id, request, include_result=False)
+
+@router.get("/task/{task_id}/profile")
+async def get_task_profile(task_id: str):
+    """List the profile artifacts of a task run with profile=true"""
+    task = task_manager.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task_dict = task.to_dict()
-    return TaskStatusResponse(**task_dict)
+    summary = (task.metadata or {}).get("profile_report")
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No profile recorded for this task")
+    return summary
+
+@router.get("/task/{task_id}/profile/{name}")
+async def download_task_profile(task_id: str, name: str):
+    """Download a profile artifact (cpu.prof for pstats/snakeviz, cpu.txt, allocations.txt)"""
+    if not task_manager.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    if name not in PROFILE_FILES:
+        raise HTTPException(status_code=404, detail=f"Unknown profile artifact: {name}")
+    
+    path = profile_file(task_id, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile artifact not available")
+    
+    media_type = "application/octet-stream" if name.endswith(".prof") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=f"{task_id}-{name}")
+
+@router.get("/task/{task_id}/logs")
+async def get_task_logs(task_id: str, offset: int = 0, limit: int = 500):
+    """Structured log entries of a task from a byte offset; pass the returned offset to get only new entries"""
+    if not task_manager.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    if limit < 1 or limit > config.TASK_LOG_READ_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {config.TASK_LOG_READ_LIMIT}")
+    
+    logs = read_task_logs(task_id, offset=offset, limit=limit)
+    if logs is None:
+        return {"task_id": task_id, "entries": [], "offset": 0, "more": False}
+    return logs
 
 @router.get("/tasks")
-async def get_all_tasks():
+async def get_all_tasks(include_result: bool = True):
     """Get status of all tasks"""
-    tasks = task_manager.get_all_tasks()
-    return {
-        "tasks": [task.to_dict() for task in tasks.values()],
-        "count": len(tasks)
-    }
+    count, payload = task_manager.get_tasks_json(include_result=include_result)
+    return _snapshot_response(f'{{"tasks":{payload},"count":{count}}}')
 
 @router.get("/tasks/running")
-async def get_running_tasks():
+async def get_running_tasks(include_result: bool = True):
     """Get status of currently running tasks"""
-    running_tasks = task_manager.get_running_tasks()
-    return {
-        "running_tasks": [task.to_dict() for task in running_tasks.values()],
-        "count": len(running_tasks)
-    }
+    count, payload = task_manager.get_tasks_json(include_result=include_result, status=TaskStatus.RUNNING)
+    return _snapshot_response(f'{{"running_tasks":{payload},"count":{count}}}')
 
 @router.delete("/task/{task_id}")
 async def cancel_task(task_id: str):
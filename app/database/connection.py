@@ -6,6 +6,10 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def recommendations_key(db_host, db_name, recommendations_table):
+    """Identify a recommendations table across database configurations"""
+    return f"{db_host}/{db_name}/{recommendations_table}"
+
 class DatabaseConnection:
     def __init__(self, custom_config=None):
         self.connection = None
@@ -32,6 +36,11 @@ class DatabaseConnection:
             self.recommendations_table = config.RECOMMENDATIONS_TABLE
             logger.info(f"DatabaseConnection initialized with default configuration - table: {self.recommendations_table}")
     
+    @property
+    def recommendations_key(self):
+        """Key of the recommendations table this connection reads and writes"""
+        return recommendations_key(self.db_host, self.db_name, self.recommendations_table)
+    
     def connect(self):
         """Establish database connection"""
         try:
@@ -67,16 +76,10 @@ class DatabaseConnection:
                 s.SKU_NAME,
                 o.INSERTED_TIMESTAMP,
                 DATEDIFF(CURDATE(), DATE(o.INSERTED_TIMESTAMP)) as days_ago
-            FROM {self.order_table} o
-            JOIN {self.sku_master_table} s ON o.ARTICLE_ID = s.SKU_ID
-            WHERE s.SKU_NAME IS NOT NULL
+            {self._order_lines_source(days_back)}
+            ORDER BY o.INSERTED_TIMESTAMP DESC
             """
             
-            if days_back:
-                query += f" AND o.INSERTED_TIMESTAMP >= DATE_SUB(CURDATE(), INTERVAL {days_back} DAY)"
-            
-            query += " ORDER BY o.INSERTED_TIMESTAMP DESC"
-            
             df = pd.read_sql(query, self.connection)
             
             # Create order_date from INSERTED_TIMESTAMP (same as your code)
@@ -89,6 +92,69 @@ class DatabaseConnection:
             logger.error(f"Error fetching order data: {e}")
             return None
     
+    def _order_lines_source(self, days_back=None):
+        """FROM/WHERE clause selecting the order lines a mining run reads"""
+        source = f"""
+            FROM {self.order_table} o
+            JOIN {self.sku_master_table} s ON o.ARTICLE_ID = s.SKU_ID
+            WHERE s.SKU_NAME IS NOT NULL"""
+        if days_back:
+            source += f" AND o.INSERTED_TIMESTAMP >= DATE_SUB(CURDATE(), INTERVAL {int(days_back)} DAY)"
+        return source
+    
+    def fetch_order_stats(self, days_back=None):
+        """Aggregate statistics of the order lines, without fetching them.
+        
+        Returns a dict with line, order and SKU counts, the day span and the
+        number of orders containing each SKU, or None on error.
+        """
+        try:
+            source = self._order_lines_source(days_back)
+            self.cursor.execute(f"""
+            SELECT COUNT(*), COUNT(DISTINCT o.ORDER_ID),
+                   MAX(DATEDIFF(CURDATE(), DATE(o.INSERTED_TIMESTAMP)))
+            {source}
+            """)
+            lines, orders, max_days_ago = self.cursor.fetchone()
+            
+            self.cursor.execute(f"""
+            SELECT s.SKU_NAME, COUNT(DISTINCT o.ORDER_ID)
+            {source}
+            GROUP BY s.SKU_NAME
+            """)
+            item_orders = [count for _, count in self.cursor.fetchall()]
+            
+            logger.info(f"Order stats: {lines} lines, {orders} orders, {len(item_orders)} SKUs")
+            return {
+                "lines": int(lines or 0),
+                "orders": int(orders or 0),
+                "skus": len(item_orders),
+                "days": int(max_days_ago) + 1 if max_days_ago is not None else 0,
+                "item_orders": item_orders
+            }
+        
+        except Error as e:
+            logger.error(f"Error fetching order stats: {e}")
+            return None
+    
+    def fetch_order_sample(self, days_back=None, sample_orders=5000, total_orders=None):
+        """Order lines of roughly `sample_orders` orders, chosen by a hash of ORDER_ID"""
+        try:
+            stride = max(1, -(-int(total_orders or 0) // max(int(sample_orders), 1)))
+            query = f"""
+            SELECT o.ORDER_ID, s.SKU_NAME, DATEDIFF(CURDATE(), DATE(o.INSERTED_TIMESTAMP)) as days_ago
+            {self._order_lines_source(days_back)}
+            AND MOD(CRC32(o.ORDER_ID), {stride}) = 0
+            """
+            
+            df = pd.read_sql(query, self.connection)
+            logger.info(f"Sampled {len(df)} order lines (1 in {stride} orders)")
+            return df
+        
+        except Error as e:
+            logger.error(f"Error sampling order data: {e}")
+            return None
+    
     def save_recommendations(self, recommendations_df):
         """Save recommendations to database using your schema:
         PARENT_ARTICLE_ID, CHILD_ARTICLE_ID, PROXIMITY_SCORE"""
@@ -179,6 +245,56 @@ class DatabaseConnection:
             logger.error(f"Error getting recommendations: {e}")
             return []
 
+    def get_recommendations_batch(self, item_names, limit=10):
+        """Get recommendations for many items with a single query"""
+        try:
+            item_names = list(dict.fromkeys(item_names))
+            results = {item: [] for item in item_names}
+            if not item_names:
+                return results
+            
+            placeholders = ','.join(['%s'] * len(item_names))
+            query = f"""
+            SELECT PARENT_ARTICLE_ID, CHILD_ARTICLE_ID, PROXIMITY_SCORE
+            FROM {self.recommendations_table} 
+            WHERE PARENT_ARTICLE_ID IN ({placeholders})
+            ORDER BY PARENT_ARTICLE_ID, PROXIMITY_SCORE DESC
+            """
+            
+            self.cursor.execute(query, tuple(item_names))
+            for parent, child, score in self.cursor.fetchall():
+                recommendations = results.setdefault(parent, [])
+                if len(recommendations) < limit:
+                    recommendations.append({
+                        "recommended_item": child,
+                        "score": score,
+                        "rank": len(recommendations) + 1
+                    })
+            
+            return results
+            
+        except Error as e:
+            logger.error(f"Error getting batch recommendations: {e}")
+            return None
+
+    def fetch_all_recommendations(self):
+        """Fetch every published recommendation as (parent, child, score) rows for indexing"""
+        try:
+            query = f"""
+            SELECT PARENT_ARTICLE_ID, CHILD_ARTICLE_ID, PROXIMITY_SCORE
+            FROM {self.recommendations_table}
+            ORDER BY PARENT_ARTICLE_ID, PROXIMITY_SCORE DESC
+            """
+            
+            self.cursor.execute(query)
+            results = self.cursor.fetchall()
+            logger.info(f"Fetched {len(results)} recommendations from {self.recommendations_table}")
+            return results
+            
+        except Error as e:
+            logger.error(f"Error fetching recommendations: {e}")
+            return None
+
     def _ensure_recommendations_table_exists(self):
         """Ensure the recommendations table exists with SKU ID schema"""
         try:
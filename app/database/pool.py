@@ -0,0 +1,170 @@
+"""
+Keyed pool of reusable MySQL connections.
+
+Connections are pooled per target (host, user, password, database), so
+several warehouses can be used concurrently from one process without
+reconnecting for every action. The pool is bounded per target and in total;
+connections idle for longer than ``idle_seconds`` are closed on the next
+acquire or release.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+from app.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def pool_key(db_config: Dict) -> tuple:
+    """Connections are only shared between identical targets and credentials"""
+    return (
+        db_config.get('host', config.DB_HOST),
+        db_config.get('user', config.DB_USER),
+        db_config.get('password', config.DB_PASSWORD),
+        db_config.get('database', config.DB_NAME)
+    )
+
+
+class ConnectionPool:
+    """Bounded, idle-evicted MySQL connections keyed by database target"""
+
+    def __init__(self, max_per_key: Optional[int] = None, max_total: Optional[int] = None,
+                 idle_seconds: Optional[float] = None, wait_seconds: Optional[float] = None):
+        self.max_per_key = max_per_key or config.DB_POOL_MAX_PER_KEY
+        self.max_total = max_total or config.DB_POOL_MAX_TOTAL
+        self.idle_seconds = idle_seconds if idle_seconds is not None else config.DB_POOL_IDLE_SECONDS
+        self.wait_seconds = wait_seconds if wait_seconds is not None else config.DB_POOL_WAIT_SECONDS
+        self._idle: Dict[tuple, deque] = {}     # key -> deque of (connection, released_at), oldest first
+        self._in_use: Dict[tuple, int] = {}
+        self._total = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def connection(self, db_config: Dict):
+        """Borrow a connection for `db_config`; it is returned to the pool afterwards.
+
+        A connection whose block raised is closed instead of reused, so no
+        half-finished transaction leaks to the next borrower.
+        """
+        key = pool_key(db_config)
+        conn = self._acquire(key)
+        try:
+            yield conn
+        except BaseException:
+            self._discard(key, conn)
+            raise
+        self._release(key, conn)
+
+    def _acquire(self, key: tuple):
+        deadline = time.monotonic() + self.wait_seconds
+        with self._condition:
+            while True:
+                self._evict_idle()
+                idle = self._idle.get(key)
+                if idle:
+                    conn, _ = idle.pop()  # Most recently used first; the oldest age out
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    break
+                if self._in_use.get(key, 0) < self.max_per_key and (self._total < self.max_total or self._close_oldest_idle()):
+                    conn = None
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError(f"No database connection available for {key[0]}/{key[3]} "
+                                    f"within {self.wait_seconds}s")
+                self._condition.wait(remaining)
+
+        # Connect / check outside the lock; a slow server must not block other targets
+        try:
+            if conn is not None and not conn.is_connected():
+                conn.close()
+                conn = None
+            if conn is None:
+                host, user, password, database = key
+                conn = mysql.connector.connect(host=host, user=user, password=password, database=database,
+                                               connection_timeout=config.DB_POOL_CONNECT_TIMEOUT)
+                logger.info("Opened pooled connection to %s/%s", host, database)
+            return conn
+        except BaseException:
+            with self._condition:
+                self._in_use[key] -= 1
+                self._total -= 1
+                self._condition.notify_all()
+            raise
+
+    def _release(self, key: tuple, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Error:
+            self._discard(key, conn)
+            return
+        with self._condition:
+            self._in_use[key] -= 1
+            self._idle.setdefault(key, deque()).append((conn, time.monotonic()))
+            self._evict_idle()
+            self._condition.notify_all()
+
+    def _discard(self, key: tuple, conn):
+        _close_quietly(conn)
+        with self._condition:
+            self._in_use[key] -= 1
+            self._total -= 1
+            self._condition.notify_all()
+
+    def _evict_idle(self):
+        """Close connections idle for longer than idle_seconds (lock held)"""
+        cutoff = time.monotonic() - self.idle_seconds
+        for key in list(self._idle):
+            idle = self._idle[key]
+            while idle and idle[0][1] < cutoff:
+                _close_quietly(idle.popleft()[0])
+                self._total -= 1
+            if not idle:
+                del self._idle[key]
+
+    def _close_oldest_idle(self) -> bool:
+        """Make room for another target by closing the least recently used idle connection (lock held)"""
+        oldest_key = min(self._idle, key=lambda k: self._idle[k][0][1], default=None)
+        if oldest_key is None:
+            return False
+        _close_quietly(self._idle[oldest_key].popleft()[0])
+        self._total -= 1
+        if not self._idle[oldest_key]:
+            del self._idle[oldest_key]
+        return True
+
+    def close_all(self):
+        """Close every idle connection (borrowed ones are closed when they come back with an error)"""
+        with self._condition:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    _close_quietly(conn)
+                    self._total -= 1
+            self._idle.clear()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                "targets": len(set(self._idle) | {key for key, count in self._in_use.items() if count}),
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "in_use": sum(self._in_use.values()),
+                "total": self._total
+            }
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from app.api.endpoints import router
+from app.services.task_manager import task_manager, TaskStatus
 from app.utils.config import config
 from app.utils.logger_config import setup_detailed_logging
+from app.utils.metrics import HTTP_REQUEST_DURATION, metrics
 import logging
+import time
 
 # Setup detailed logging
 log_files = setup_detailed_logging()
@@ -17,10 +20,44 @@ app = FastAPI(
 # Include routers
 app.include_router(router, prefix="/api/v1")
 
+TASKS_BY_STATUS = metrics.gauge("mining_tasks", "Tracked tasks by status", ("status",))
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Observe API latency per route template (not per raw path, to keep label cardinality bounded)"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    counts = {status.value: 0 for status in TaskStatus}
+    for task in task_manager.get_all_tasks().values():
+        counts[task.status.value] += 1
+    for status, count in counts.items():
+        TASKS_BY_STATUS.set(count, status=status)
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     return {"message": "Association Rule Mining API", "version": config.API_VERSION}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    if config.API_WORKERS > 1:
+        # Workers share published recommendations through the memory-mapped artifact
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, workers=config.API_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
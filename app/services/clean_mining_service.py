@@ -1,48 +1,93 @@
 import pandas as pd
 import numpy as np
-from mlxtend.preprocessing import TransactionEncoder
-from mlxtend.frequent_patterns import fpgrowth, association_rules
+from mlxtend.frequent_patterns import fpgrowth
 from datetime import datetime, timedelta
+import contextvars
 import logging
 import time
 import threading
 from app.utils.config import config
+from app.utils.metrics import StageTimer
 from app.services.scoring_service import ScoringService
+from app.services.rule_kernel import FrequentItemsets, RuleSet, generate_rules, reweight_rules
+from app.services.itemset_cache import itemset_cache
+from app.services.mining_engine import (BasketMatrix, mine_partitioned, segment_codes, segmented_rule_counts,
+                                        temporal_metrics, weighted_support)
+from app.services.time_weighting import days_ago_array, rebase_days_ago, time_weights
 
 logger = logging.getLogger(__name__)
 
+def adaptive_support(num_items, num_transactions, original_support):
+    """Support actually used for FP-Growth; raised for wide item sets to prevent performance issues"""
+    if num_items > 400:
+        # For very large item sets, force high support
+        return max(0.20, 30 / num_transactions)
+    if num_items > 200:
+        # For medium item sets, use moderate support
+        return max(0.10, 15 / num_transactions)
+    if original_support < 0.02:
+        # Never go below 2% for any dataset
+        return max(0.02, 5 / num_transactions)
+    return original_support
+
+def support_schedule(target_support, start_support=None, factor=None):
+    """Supports of progressive mining: from start_support down to the target, each level `factor` times the last"""
+    support = max(start_support or config.PROGRESSIVE_START_SUPPORT, target_support)
+    factor = factor or config.PROGRESSIVE_SUPPORT_FACTOR
+    levels = []
+    while support > target_support * (1 + 1e-9):
+        levels.append(support)
+        support *= factor
+    levels.append(target_support)
+    return levels
+
 class CleanAssociationMiningService:
     """Clean, simplified association mining service with proper configuration and progress tracking"""
     
-    def __init__(self, task_id=None, task_manager=None):
+    def __init__(self, task_id=None, task_manager=None, scoring_method=None, scoring_weights=None,
+                 min_support=None, min_confidence=None, min_lift=None, significance_test=None,
+                 time_weighting_method=None, time_segmentation=None, parallel_mining=None, profiler=None,
+                 max_recommendations=None, progressive_mining=None, on_interim_model=None):
         self.scoring_service = ScoringService()
+        self.scoring_method = scoring_method
+        self.scoring_weights = scoring_weights
+        self.min_support = min_support if min_support is not None else config.MIN_SUPPORT
+        self.min_confidence = min_confidence if min_confidence is not None else config.MIN_CONFIDENCE
+        self.min_lift = min_lift if min_lift is not None else config.MIN_LIFT
+        self.significance_test = significance_test or config.SIGNIFICANCE_TEST
+        self.max_recommendations = max_recommendations or config.MAX_RECOMMENDATIONS
+        self.time_weighting_method = time_weighting_method or config.DEFAULT_TIME_WEIGHTING_METHOD
+        self.time_segmentation = time_segmentation or config.DEFAULT_TIME_SEGMENTATION
+        self.parallel_mining = config.PARALLEL_MINING if parallel_mining is None else parallel_mining
+        self.partition_stats = None
+        self.itemset_artifact = None
+        self.progressive_mining = config.PROGRESSIVE_MINING if progressive_mining is None else progressive_mining
+        # Called with (recommendations, support) for each completed level above the target support
+        self.on_interim_model = on_interim_model
+        self.support_target = None
+        self.support_reached = None
+        self.support_levels = []
+        self.stages = StageTimer()
+        self.profiler = profiler
         self.task_id = task_id
         self.task_manager = task_manager
+        self.rules = None
+        self.basket = None
+        self.sku_name_to_id = {}
+        self.sku_id_to_name = {}
     
     def _update_progress(self, progress, message):
         """Update progress if task manager is available"""
         if self.task_manager and self.task_id:
             self.task_manager.update_progress(self.task_id, progress, message)
-        logger.info(f"Progress: {progress}% - {message}")
+        logger.info("Progress: %s%% - %s", progress, message)
     
     def _calculate_adaptive_support(self, num_items, num_transactions, original_support):
         """Calculate adaptive support to prevent performance issues"""
-        if num_items > 400:
-            # For very large item sets, force high support
-            adaptive_support = max(0.20, 30 / num_transactions)
-            logger.warning(f"PERFORMANCE PROTECTION: {num_items} items - forcing support {adaptive_support:.3f}")
-        elif num_items > 200:
-            # For medium item sets, use moderate support  
-            adaptive_support = max(0.10, 15 / num_transactions)
-            logger.warning(f"Performance optimization: {num_items} items - using support {adaptive_support:.3f}")
-        elif original_support < 0.02:
-            # Never go below 2% for any dataset
-            adaptive_support = max(0.02, 5 / num_transactions)
-            logger.warning(f"Minimum support protection: using {adaptive_support:.3f} (was {original_support})")
-        else:
-            adaptive_support = original_support
-        
-        return adaptive_support
+        support = adaptive_support(num_items, num_transactions, original_support)
+        if support != original_support:
+            logger.warning("Adaptive support: %d items - using support %.3f (was %s)", num_items, support, original_support)
+        return support
     
     def run_mining_pipeline(self, df_basket, timeout_minutes=5):
         """Run the complete mining pipeline with timeout protection"""
@@ -50,13 +95,13 @@ class CleanAssociationMiningService:
             start_time = time.time()
             timeout_seconds = timeout_minutes * 60
             
-            logger.info(f"Starting clean mining pipeline")
-            logger.info(f"Input data shape: {df_basket.shape}")
+            logger.info("Starting clean mining pipeline")
+            logger.info("Input data shape: %s", df_basket.shape)
             
             # Create SKU mapping (name to ID and ID to name)
             self.sku_name_to_id = dict(zip(df_basket['SKU_NAME'], df_basket['ARTICLE_ID']))
             self.sku_id_to_name = dict(zip(df_basket['ARTICLE_ID'], df_basket['SKU_NAME']))
-            logger.info(f"Created SKU mapping for {len(self.sku_name_to_id)} unique SKUs")
+            logger.info("Created SKU mapping for %d unique SKUs", len(self.sku_name_to_id))
             
             self._update_progress(10, "Starting mining pipeline")
             
@@ -66,195 +111,403 @@ class CleanAssociationMiningService:
             
             # Step 1: Apply time weighting
             self._update_progress(20, "Applying time weighting")
-            df_weighted = self._apply_time_weighting(df_basket)
+            with self.stages.stage("weighting", rows_in=len(df_basket)) as stage:
+                df_weighted = self._apply_time_weighting(df_basket)
+                stage["rows_out"] = len(df_weighted)
             
             # Step 2: Create transactions
             self._update_progress(40, "Creating transactions")
-            transactions = self._create_transactions(df_weighted)
+            with self.stages.stage("encoding", rows_in=len(df_weighted)) as stage:
+                basket = self._create_transactions(df_weighted)
+                stage["rows_out"] = len(basket)
+            self.stages.data("encoding", basket.matrix, "order x item matrix")
             
-            if len(transactions) == 0:
+            if len(basket) == 0:
                 logger.error("No transactions created")
                 return pd.DataFrame()
             
+            # Keep the encoded baskets for the temporal metrics of the mined rules
+            self.basket = basket
+            
             # Step 3: Mine association rules with timeout
             self._update_progress(60, "Mining association rules")
-            rules = self._mine_rules_with_timeout(transactions, timeout_seconds - (time.time() - start_time))
+            rules = self._mine_rules_with_timeout(basket, timeout_seconds - (time.time() - start_time))
             
-            if rules.empty:
+            if rules is None or rules.empty:
                 logger.warning("No rules found")
                 return pd.DataFrame()
             
+            # Keep the mined rules (including multi-item antecedents) for basket scoring
+            self.rules = rules
+            
             # Step 4: Create recommendations
             self._update_progress(90, "Creating recommendations")
-            recommendations = self._create_recommendations(rules)
+            with self.stages.stage("recommendations", rows_in=len(rules)) as stage:
+                recommendations = self._create_recommendations(rules)
+                stage["rows_out"] = len(recommendations)
             
             self._update_progress(100, "Mining completed successfully")
             
             total_time = time.time() - start_time
-            logger.info(f"Mining completed in {total_time:.2f} seconds")
-            logger.info(f"Generated {len(recommendations)} recommendations from {len(rules)} rules")
+            logger.info("Mining completed in %.2f seconds", total_time)
+            logger.info("Generated %d recommendations from %d rules", len(recommendations), len(rules))
             
             return recommendations
             
         except Exception as e:
-            logger.error(f"Error in mining pipeline: {e}")
+            logger.error("Error in mining pipeline: %s", e)
             import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error("Traceback: %s", traceback.format_exc())
             return pd.DataFrame()
     
     def _apply_time_weighting(self, df_basket):
-        """Apply simple exponential time weighting"""
-        logger.info("Applying exponential time weighting")
-        
-        # Convert to datetime
-        df_basket['order_date'] = pd.to_datetime(df_basket['order_date'])
-        max_date = df_basket['order_date'].max()
+        """Day offset of every order line (int16, 0 = most recent order).
         
-        # Calculate days ago and time weight
-        df_basket['days_ago'] = (max_date - df_basket['order_date']).dt.days
-        df_basket['time_weight'] = np.exp(-config.DECAY_RATE * df_basket['days_ago'])
-        
-        logger.info(f"Time weighting applied - weight range: {df_basket['time_weight'].min():.3f} to {df_basket['time_weight'].max():.3f}")
+        The encoding turns it into each order's day; the weights themselves
+        are applied per order when rules are generated (see _time_weighted_rules).
+        """
+        if 'days_ago' in df_basket.columns:
+            days_ago = rebase_days_ago(df_basket['days_ago'].to_numpy())
+        else:
+            days_ago = days_ago_array(df_basket['order_date'])
+        df_basket['days_ago'] = days_ago
         return df_basket
     
+    def order_weights(self, basket):
+        """Weight of every order under the configured time weighting method, or None for `none`"""
+        if self.time_weighting_method == "none":
+            return None
+        weights = time_weights(basket.order_days, self.time_weighting_method)
+        if logger.isEnabledFor(logging.INFO) and weights.size:
+            logger.info("%s time weights over %d orders: %.3f to %.3f", self.time_weighting_method,
+                        weights.size, weights.min(), weights.max())
+        return weights
+    
+    def _time_weighted_rules(self, itemsets, rules):
+        """Rules with every metric recomputed from time-weighted order counts.
+        
+        Itemsets are found and rules filtered by plain order counts (so cached
+        itemsets, sweeps and partitioned mining stay exact); support,
+        confidence, lift and the scores built from them follow the weights.
+        """
+        weights = self.order_weights(self.basket) if self.basket is not None else None
+        if weights is None or rules.empty:
+            return rules
+        return reweight_rules(rules, itemsets, weighted_support(self.basket, itemsets.items, weights))
+    
     def _create_transactions(self, df_weighted):
-        """Create transaction list from weighted data"""
-        logger.info("Creating transaction list")
+        """Encode the order lines as a sparse order x item matrix (unique items per order)"""
+        logger.info("Creating transaction matrix")
         
-        transactions = []
-        for order_id, group in df_weighted.groupby('ORDER_ID'):
-            # Simple approach: just use unique items per order
-            items = group['SKU_NAME'].unique().tolist()
-            if len(items) > 0:
-                transactions.append(items)
+        basket = BasketMatrix.from_frame(df_weighted)
         
-        logger.info(f"Created {len(transactions)} transactions")
-        return transactions
+        logger.info("Created %d transactions", len(basket))
+        return basket
     
-    def _mine_rules_with_timeout(self, transactions, timeout_seconds):
+    def _mine_rules_with_timeout(self, basket, timeout_seconds):
         """Mine association rules with timeout protection"""
         try:
-            # Create transaction matrix
-            logger.info("Creating transaction matrix")
-            te = TransactionEncoder()
-            onehot = te.fit(transactions).transform(transactions)
-            basket_matrix = pd.DataFrame(onehot, columns=te.columns_)
-            
-            num_items = basket_matrix.shape[1]
-            num_transactions = basket_matrix.shape[0]
+            num_items = basket.n_items
+            num_transactions = len(basket)
             
-            logger.info(f"Transaction matrix: {basket_matrix.shape}")
-            logger.info(f"Matrix density: {(basket_matrix.sum().sum() / (num_transactions * num_items) * 100):.2f}%")
+            logger.info("Transaction matrix: (%d, %d)", num_transactions, num_items)
+            logger.info("Matrix density: %.2f%%", basket.density * 100)
             
             # Calculate adaptive support
-            adaptive_support = self._calculate_adaptive_support(num_items, num_transactions, config.MIN_SUPPORT)
-            
-            # Mine frequent itemsets with timeout
-            logger.info(f"Starting FP-Growth with support={adaptive_support:.3f}, timeout={timeout_seconds:.0f}s")
-            
-            result_container = {'itemsets': None, 'error': None, 'completed': False}
-            
-            def run_fpgrowth():
-                try:
-                    result_container['itemsets'] = fpgrowth(
-                        basket_matrix, 
-                        min_support=adaptive_support, 
-                        use_colnames=True
-                    )
-                    result_container['completed'] = True
-                    logger.info("FP-Growth completed successfully")
-                except Exception as e:
-                    result_container['error'] = e
-                    logger.error(f"FP-Growth error: {e}")
-            
-            # Run with timeout
-            fpgrowth_thread = threading.Thread(target=run_fpgrowth)
-            fpgrowth_thread.daemon = True
-            fpgrowth_thread.start()
-            
-            # Monitor progress
-            start_monitor = time.time()
-            while fpgrowth_thread.is_alive() and (time.time() - start_monitor) < timeout_seconds:
-                time.sleep(5)
-                elapsed = time.time() - start_monitor
-                logger.info(f"FP-Growth running... {elapsed:.0f}s elapsed")
-            
-            if fpgrowth_thread.is_alive():
-                logger.error(f"FP-Growth timed out after {timeout_seconds:.0f}s")
-                logger.error("Consider using fewer items or higher min_support")
-                return pd.DataFrame()
-            
-            if result_container['error']:
-                raise result_container['error']
+            adaptive_support = self._calculate_adaptive_support(num_items, num_transactions, self.min_support)
             
-            freq_itemsets = result_container['itemsets']
+            self.support_target = adaptive_support
+            if self.progressive_mining:
+                return self._mine_progressively(basket, adaptive_support, timeout_seconds)
             
-            if freq_itemsets.empty:
-                logger.warning(f"No frequent itemsets found with support={adaptive_support:.3f}")
-                return pd.DataFrame()
+            itemsets = self._itemsets_for_support(basket, adaptive_support, timeout_seconds)
+            if itemsets is None:
+                return None
+            self.support_reached = adaptive_support
             
-            logger.info(f"Found {len(freq_itemsets)} frequent itemsets")
+            if len(itemsets) == 0:
+                logger.warning("No frequent itemsets found with support=%.3f", adaptive_support)
+                return None
             
-            # Generate association rules
-            logger.info("Generating association rules")
-            rules = association_rules(
-                freq_itemsets, 
-                metric="lift", 
-                min_threshold=config.MIN_LIFT
-            )
+            logger.info("Found %d frequent itemsets", len(itemsets))
             
+            rules = self._generate_rules(itemsets)
             if rules.empty:
                 logger.warning("No rules found")
-                return pd.DataFrame()
-            
-            # Filter by confidence
-            initial_count = len(rules)
-            rules = rules[rules['confidence'] >= config.MIN_CONFIDENCE]
-            
-            logger.info(f"Filtered rules: {initial_count} -> {len(rules)} (confidence >= {config.MIN_CONFIDENCE})")
+                return None
             
             return rules
             
         except Exception as e:
-            logger.error(f"Error in rule mining: {e}")
+            logger.error("Error in rule mining: %s", e)
+            return None
+    
+    def _itemsets_for_support(self, basket, min_support, timeout_seconds, store=True):
+        """Frequent itemsets at `min_support`, from the itemset cache or by mining; None if mining timed out.
+        
+        Freshly mined itemsets are stored as an artifact unless `store` is false.
+        """
+        # Reuse the itemsets of an earlier run over the same baskets and support
+        cached = itemset_cache.find(basket, min_support) if config.ITEMSET_CACHE_ENABLED else None
+        if cached is not None:
+            self.itemset_artifact = cached.key
+            logger.info("Reusing %d cached frequent itemsets (%s)", len(cached.itemsets), cached.key)
+            return cached.itemsets
+        
+        self.itemset_artifact = None
+        itemsets = self._mine_itemsets(basket, min_support, timeout_seconds)
+        if itemsets is not None and store:
+            self._store_itemsets(basket, itemsets, min_support)
+        return itemsets
+    
+    def _store_itemsets(self, basket, itemsets, min_support):
+        """Save itemsets to the itemset cache and remember the artifact key"""
+        if not config.ITEMSET_CACHE_ENABLED:
+            return
+        try:
+            item_ids = [self.sku_name_to_id.get(name, name) for name in basket.labels]
+            self.itemset_artifact = itemset_cache.save(basket, itemsets, item_ids, min_support)
+        except OSError as e:
+            logger.warning("Could not store itemset artifact: %s", e)
+    
+    def _mine_progressively(self, basket, target_support, timeout_seconds):
+        """Mine from a high support down to the target while time remains.
+        
+        Rules found at a lower support include those found at a higher one, so
+        the rules of the lowest completed level are the best model within the
+        budget; a level that times out leaves them in place. Only the itemsets
+        of that level are stored as an artifact.
+        """
+        deadline = time.time() + timeout_seconds
+        levels = support_schedule(target_support)
+        logger.info("Progressive mining over supports %s", ", ".join(f"{level:.4g}" for level in levels))
+        
+        best_rules, best_level = None, None
+        for step, support in enumerate(levels):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                logger.warning("Time budget used up before support %.4g", support)
+                break
+            self._update_progress(60 + 25 * step / len(levels), f"Mining at support {support:.4g}")
+            
+            level_start = time.time()
+            itemsets = self._itemsets_for_support(basket, support, remaining, store=False)
+            level = {"support": support, "completed": itemsets is not None,
+                     "itemsets": len(itemsets) if itemsets is not None else None, "rules": None}
+            self.support_levels.append(level)
+            if itemsets is None:
+                level["seconds"] = round(time.time() - level_start, 3)
+                logger.warning("Support %.4g not reached within the time budget; keeping support %s",
+                               support, self.support_reached)
+                break
+            
+            rules = self._generate_rules(itemsets) if len(itemsets) else None
+            level["rules"] = len(rules) if rules is not None else 0
+            level["seconds"] = round(time.time() - level_start, 3)
+            self.support_reached = support
+            if rules is None or rules.empty:
+                continue
+            best_rules, best_level = rules, (itemsets, support, self.itemset_artifact)
+            
+            # Report the model found so far while lower supports are mined
+            if self.on_interim_model is not None and support > target_support:
+                recommendations = self._create_recommendations(rules)
+                if not recommendations.empty:
+                    self.on_interim_model(recommendations, support)
+        
+        self.itemset_artifact = None
+        if best_level is not None:
+            itemsets, support, cached_key = best_level
+            if cached_key is not None:
+                self.itemset_artifact = cached_key
+            else:
+                self._store_itemsets(basket, itemsets, support)
+        
+        if best_rules is None:
+            logger.warning("No rules found down to support %s", self.support_reached)
+        elif self.support_reached != target_support:
+            logger.warning("Progressive mining stopped at support %.4g (target %.4g): %d rules",
+                           self.support_reached, target_support, len(best_rules))
+        return best_rules
+    
+    def _mine_itemsets(self, basket, min_support, timeout_seconds):
+        """Run FP-Growth (or partitioned mining) in a worker thread; None if it timed out"""
+        num_transactions = len(basket)
+        logger.info("Starting FP-Growth with support=%.3f, timeout=%.0fs", min_support, timeout_seconds)
+        
+        result_container = {'itemsets': None, 'error': None, 'completed': False}
+        
+        def run_fpgrowth():
+            try:
+                if self.parallel_mining:
+                    # Time segments mined concurrently, merged by exact counting over the full window
+                    result_container['itemsets'], self.partition_stats = mine_partitioned(
+                        basket,
+                        segment_codes(basket.order_days, self.time_segmentation),
+                        min_support,
+                        workers=config.MINING_WORKERS or None,
+                        min_partition_orders=config.MINING_MIN_PARTITION_ORDERS,
+                        timeout=timeout_seconds
+                    )
+                else:
+                    freq_itemsets = fpgrowth(
+                        basket.to_frame(), 
+                        min_support=min_support, 
+                        use_colnames=False
+                    )
+                    result_container['itemsets'] = FrequentItemsets.from_frame(freq_itemsets, basket.labels, num_transactions)
+                result_container['completed'] = True
+                logger.info("FP-Growth completed successfully")
+            except TimeoutError as e:
+                # Partition workers were terminated; reported like any other timeout
+                logger.error("FP-Growth error: %s", e)
+            except Exception as e:
+                result_container['error'] = e
+                logger.error("FP-Growth error: %s", e)
+        
+        # Run with timeout
+        with self.stages.stage("mining", rows_in=num_transactions) as stage:
+            target = self.profiler.thread_target(run_fpgrowth) if self.profiler else run_fpgrowth
+            # Run in a copy of this context so the worker's records keep the task ID
+            fpgrowth_thread = threading.Thread(target=contextvars.copy_context().run, args=(target,))
+            fpgrowth_thread.daemon = True
+            fpgrowth_thread.start()
+            
+            # Monitor progress (join returns as soon as FP-Growth finishes)
+            start_monitor = time.time()
+            while fpgrowth_thread.is_alive() and (time.time() - start_monitor) < timeout_seconds:
+                fpgrowth_thread.join(timeout=min(5, max(timeout_seconds - (time.time() - start_monitor), 0)))
+                if fpgrowth_thread.is_alive():
+                    elapsed = time.time() - start_monitor
+                    logger.info("FP-Growth running... %.0fs elapsed", elapsed)
+            
+            if result_container['itemsets'] is not None:
+                stage["rows_out"] = len(result_container['itemsets'])
+        
+        if fpgrowth_thread.is_alive():
+            logger.error("FP-Growth timed out after %.0fs", timeout_seconds)
+            logger.error("Consider using fewer items or higher min_support")
+            return None
+        
+        if result_container['error']:
+            raise result_container['error']
+        
+        return result_container['itemsets']
+    
+    def _generate_rules(self, itemsets):
+        """Generate association rules (confidence and lift filters fused into the kernel)"""
+        logger.info("Generating association rules")
+        with self.stages.stage("rule_generation", rows_in=len(itemsets)) as stage:
+            rules = generate_rules(
+                itemsets,
+                min_confidence=self.min_confidence,
+                min_lift=self.min_lift,
+                significance_test=self.significance_test,
+                alpha=config.SIGNIFICANCE_ALPHA,
+                correction=config.SIGNIFICANCE_CORRECTION
+            )
+            rules = self._time_weighted_rules(itemsets, rules)
+            stage["rows_out"] = len(rules)
+        
+        if not rules.empty:
+            logger.info("Generated %d rules (confidence >= %s, lift >= %s)", len(rules), self.min_confidence, self.min_lift)
+        return rules
+    
+    def recommendations_from_artifact(self, artifact):
+        """Rules and recommendations from cached itemsets with this service's thresholds (no mining)"""
+        self.basket = artifact.basket
+        self.itemset_artifact = artifact.key
+        self.sku_name_to_id = dict(zip(artifact.basket.labels, artifact.item_ids.tolist()))
+        self.sku_id_to_name = {sku_id: name for name, sku_id in self.sku_name_to_id.items()}
+        
+        rules = self._generate_rules(artifact.itemsets)
+        self.rules = rules
+        if rules.empty:
             return pd.DataFrame()
+        
+        with self.stages.stage("recommendations", rows_in=len(rules)) as stage:
+            recommendations = self._create_recommendations(rules)
+            stage["rows_out"] = len(recommendations)
+        return recommendations
     
-    def _create_recommendations(self, rules):
+    def mine_itemsets(self, df_basket, timeout_minutes=5):
+        """Encoded baskets and frequent itemsets at min_support (adaptively raised), without rules.
+        
+        Returns (basket, itemsets); itemsets is None if mining timed out. The
+        support used is left in support_target.
+        """
+        self.sku_name_to_id = dict(zip(df_basket['SKU_NAME'], df_basket['ARTICLE_ID']))
+        self.sku_id_to_name = dict(zip(df_basket['ARTICLE_ID'], df_basket['SKU_NAME']))
+        
+        # Same encoding as a mining run, so both share cached itemsets
+        with self.stages.stage("weighting", rows_in=len(df_basket)) as stage:
+            df_weighted = self._apply_time_weighting(df_basket)
+            stage["rows_out"] = len(df_weighted)
+        with self.stages.stage("encoding", rows_in=len(df_weighted)) as stage:
+            basket = self._create_transactions(df_weighted)
+            stage["rows_out"] = len(basket)
+        self.basket = basket
+        
+        self.support_target = self._calculate_adaptive_support(basket.n_items, len(basket), self.min_support)
+        itemsets = self._itemsets_for_support(basket, self.support_target, timeout_minutes * 60)
+        if itemsets is not None:
+            self.support_reached = self.support_target
+        return basket, itemsets
+
+    def _temporal_metrics(self, rules: RuleSet):
+        """Per-rule stability and trend from support counted per time segment"""
+        if self.basket is None:
+            return np.full(len(rules), 0.5), np.zeros(len(rules))
+        
+        segments = segment_codes(self.basket.order_days, self.time_segmentation)
+        counts, segment_sizes = segmented_rule_counts(
+            self.basket, np.hstack([rules.antecedents, rules.consequents]), segments
+        )
+        stability, trend = temporal_metrics(counts, segment_sizes)
+        logger.info("Temporal metrics over %d %s segments: mean stability %.3f, mean trend %.3f",
+                    int((segment_sizes > 0).sum()), self.time_segmentation, stability.mean(), trend.mean())
+        return stability, trend
+    
+    def _create_recommendations(self, rules: RuleSet):
         """Create recommendations from rules"""
         logger.info("Creating recommendations")
         
-        recommendations = []
+        # One recommendation per (antecedent item, consequent item) of every rule
+        antecedents, consequents, rule_positions = rules.pairs()
         
-        for _, rule in rules.iterrows():
-            antecedents = list(rule['antecedents'])
-            consequents = list(rule['consequents'])
-            
-            for antecedent in antecedents:
-                for consequent in consequents:
-                    # Get SKU IDs from names
-                    main_item_id = self.sku_name_to_id.get(antecedent, antecedent)
-                    recommended_item_id = self.sku_name_to_id.get(consequent, consequent)
-                    
-                    recommendations.append({
-                        'main_item': main_item_id,          # Now stores SKU ID
-                        'recommended_item': recommended_item_id,  # Now stores SKU ID
-                        'main_item_name': antecedent,       # Keep name for reference
-                        'recommended_item_name': consequent, # Keep name for reference
-                        'confidence_score': rule['confidence'],
-                        'lift_score': rule['lift'],
-                        'support_score': rule['support'],
-                        'composite_score': rule['confidence'] * rule['lift'],
-                        'temporal_stability': 0.5,  # Default value
-                        'temporal_trend': 0.0,      # Default value
-                        'temporal_composite_score': rule['confidence'] * rule['lift'],
-                        'recommendation_rank': 1
-                    })
-        
-        if not recommendations:
+        if len(rule_positions) == 0:
             return pd.DataFrame()
         
-        # Convert to DataFrame and add ranking
-        rec_df = pd.DataFrame(recommendations)
+        names = rules.labels
+        # Get SKU IDs from names
+        ids = np.array([self.sku_name_to_id.get(name, name) for name in names], dtype=object)
+        stability, trend = self._temporal_metrics(rules)
+        confidence = rules['confidence'][rule_positions]
+        lift = rules['lift'][rule_positions]
+        composite_score = confidence * lift
+        
+        rec_df = pd.DataFrame({
+            'main_item': ids[antecedents],                # Now stores SKU ID
+            'recommended_item': ids[consequents],         # Now stores SKU ID
+            'main_item_name': names[antecedents],         # Keep name for reference
+            'recommended_item_name': names[consequents],  # Keep name for reference
+            'confidence_score': confidence,
+            'lift_score': lift,
+            'support_score': rules['support'][rule_positions],
+            'composite_score': composite_score,
+            'temporal_stability': stability[rule_positions],
+            'temporal_trend': trend[rule_positions],
+            'temporal_composite_score': composite_score,
+            'recommendation_rank': 1
+        })
+        
+        # Optionally replace the default confidence * lift score with a ScoringService method
+        if self.scoring_method:
+            scores = self.scoring_service.score(rec_df, self.scoring_method, self.scoring_weights)
+            rec_df['composite_score'] = scores
+            if self.scoring_method in ScoringService.TEMPORAL_METHODS:
+                rec_df['temporal_composite_score'] = scores
+            logger.info("Scored recommendations with %s", self.scoring_method)
         
         # Add proper ranking within each main item
         rec_df['recommendation_rank'] = (
@@ -264,7 +517,8 @@ class CleanAssociationMiningService:
         )
         
         # Keep only top recommendations per item
-        rec_df = rec_df[rec_df['recommendation_rank'] <= config.MAX_RECOMMENDATIONS]
+        rec_df = rec_df[rec_df['recommendation_rank'] <= self.max_recommendations]
         
-        logger.info(f"Created {len(rec_df)} recommendations for {rec_df['main_item'].nunique()} items")
-        return rec_df
\ No newline at end of file
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Created %d recommendations for %d items", len(rec_df), rec_df['main_item'].nunique())
+        return rec_df
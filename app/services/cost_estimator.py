@@ -0,0 +1,239 @@
+"""
+Pre-flight cost estimate of a mining run.
+
+Order, line and SKU counts and the number of orders containing every SKU come
+from aggregate queries; itemset and rule counts come from mining a hashed
+sample of orders at the same support (relative supports carry over from the
+sample to the full window). Before mining the sample, frequent pairs are
+counted with one sparse product so an explosive support is caught without
+running FP-Growth. Runtime and RSS are projected with a linear cost model
+calibrated on the synthetic benchmark data, scaled by ``MINING_COST_SCALE``.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import fpgrowth
+
+from app.services.clean_mining_service import adaptive_support
+from app.services.mining_engine import BasketMatrix
+from app.services.rule_kernel import FrequentItemsets, generate_rules
+from app.utils.config import config
+from app.utils.metrics import peak_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+BUDGET_ACTIONS = ("off", "warn", "downgrade", "reject")
+
+# Supports tried, in order, when the requested one is over budget
+SUPPORT_GRID = (0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5)
+
+# Linear cost model (single core, `python -m benchmarks.e2e` data)
+COST_MODEL = {
+    "fetch_seconds_per_line": 10e-6,
+    "pipeline_seconds_per_line": 5e-6,
+    "seconds_per_itemset_order": 3e-8,   # FP-Growth conditional trees grow with the orders
+    "seconds_per_rule_order": 5e-8,      # Temporal metrics count every rule in every order
+    "bytes_per_line": 512,
+    "bytes_per_rule": 8192
+}
+
+
+class OrderStats:
+    """Aggregate statistics of the order lines a mining run would read"""
+
+    def __init__(self, lines: int, orders: int, days: int, item_orders):
+        self.lines = int(lines)
+        self.orders = int(orders)
+        self.days = int(days)
+        self.item_orders = np.asarray(item_orders, dtype=np.int64)
+
+    @property
+    def skus(self) -> int:
+        return len(self.item_orders)
+
+    @property
+    def density(self) -> float:
+        cells = self.orders * self.skus
+        return float(self.item_orders.sum()) / cells if cells else 0.0
+
+    @classmethod
+    def from_dict(cls, stats: Dict):
+        return cls(stats["lines"], stats["orders"], stats["days"], stats["item_orders"])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        """Statistics of already fetched order lines"""
+        days = int(df["days_ago"].max() - df["days_ago"].min()) + 1 if "days_ago" in df.columns and len(df) else 0
+        item_orders = df.groupby("SKU_NAME")["ORDER_ID"].nunique().to_numpy()
+        return cls(len(df), df["ORDER_ID"].nunique(), days, item_orders)
+
+
+class CostEstimator:
+    """Estimates itemsets, rules, runtime and RSS of a mining run and checks them against budgets"""
+
+    def __init__(self, stats: OrderStats, sample: Optional[BasketMatrix] = None, min_confidence: float = None,
+                 min_lift: float = None):
+        self.stats = stats
+        self.sample = sample
+        self.min_confidence = min_confidence if min_confidence is not None else config.MIN_CONFIDENCE
+        self.min_lift = min_lift if min_lift is not None else config.MIN_LIFT
+        self.budget = {
+            "seconds": config.MINING_BUDGET_SECONDS,
+            "rss_mb": config.MINING_BUDGET_RSS_MB,
+            "itemsets": config.MINING_BUDGET_ITEMSETS
+        }
+        self._mined = None  # (support, FrequentItemsets) of the sample, reused for higher supports
+
+    def effective_support(self, min_support: float) -> float:
+        """Support FP-Growth will actually use (see CleanAssociationMiningService)"""
+        if self.stats.orders == 0:
+            return min_support
+        return adaptive_support(self.stats.skus, self.stats.orders, min_support)
+
+    def estimate(self, min_support: float, action: Optional[str] = None) -> Dict:
+        """Full estimate for a requested support, with a recommended support and budget decision"""
+        action = action or config.MINING_BUDGET_ACTION
+        if action not in BUDGET_ACTIONS:
+            raise ValueError(f"Unknown budget action: {action}")
+        projection = self._project(self.effective_support(min_support))
+        violations = self._violations(projection)
+
+        recommended = min_support if not violations else self._recommend_support(min_support)
+        if not violations or action == "off":
+            decision = "ok"
+        elif action == "warn":
+            decision = "warn"
+        elif action == "downgrade" and recommended is not None:
+            decision = "downgrade"
+        else:
+            decision = "reject"
+
+        return {
+            "orders": self.stats.orders,
+            "lines": self.stats.lines,
+            "skus": self.stats.skus,
+            "days": self.stats.days,
+            "density": round(self.stats.density, 6),
+            "sample_orders": len(self.sample) if self.sample is not None else 0,
+            "requested_support": min_support,
+            **projection,
+            "budget": self.budget,
+            "violations": violations,
+            "recommended_support": recommended,
+            "decision": decision
+        }
+
+    def _project(self, support: float) -> Dict:
+        """Itemset/rule counts and projected runtime and RSS at an effective support"""
+        stats = self.stats
+        item_support = stats.item_orders / stats.orders if stats.orders else np.zeros(0)
+        frequent_items = int((item_support >= support).sum())
+        itemsets, rules, method = self._itemsets_and_rules(item_support, frequent_items, support)
+
+        model = COST_MODEL
+        scale = config.MINING_COST_SCALE
+        fetch_seconds = stats.lines * model["fetch_seconds_per_line"] * scale
+        mining_seconds = (stats.lines * model["pipeline_seconds_per_line"]
+                          + itemsets * stats.orders * model["seconds_per_itemset_order"]
+                          + rules * stats.orders * model["seconds_per_rule_order"]) * scale
+        base_rss = peak_rss_bytes() or 0
+        rss = base_rss + stats.lines * model["bytes_per_line"] + rules * model["bytes_per_rule"]
+
+        return {
+            "effective_support": round(support, 6),
+            "frequent_items": frequent_items,
+            "expected_itemsets": int(itemsets),
+            "expected_rules": int(rules),
+            "itemset_estimate": method,
+            "projected_seconds": {
+                "fetch": round(fetch_seconds, 2),
+                "mining": round(mining_seconds, 2),
+                "total": round(fetch_seconds + mining_seconds, 2)
+            },
+            "projected_rss_mb": round(rss / 1024 / 1024, 1)
+        }
+
+    def _itemsets_and_rules(self, item_support: np.ndarray, frequent_items: int, support: float):
+        """Expected (itemsets, rules, method) at a support"""
+        if self.sample is None or len(self.sample) == 0:
+            # Independence: a pair is frequent when the product of its item supports is
+            sorted_support = np.sort(item_support[item_support >= support])
+            needed = support / np.maximum(sorted_support, 1e-12)
+            partners = len(sorted_support) - np.searchsorted(sorted_support, needed, side="left")
+            pairs = int((partners - (sorted_support >= needed)).sum() // 2)
+            return frequent_items + pairs, 2 * pairs, "independence"
+
+        if self._mined is not None and support >= self._mined[0]:
+            itemsets = self._mined[1]
+            itemsets = itemsets.filter(itemsets.support >= support)
+        else:
+            frequent_pairs = self._sample_frequent_pairs(support)
+            if frequent_items + frequent_pairs > self.budget["itemsets"]:
+                # Already over budget; skip mining the sample (lower bound)
+                return frequent_items + frequent_pairs, 2 * frequent_pairs, "pairs_lower_bound"
+            frame = self.sample.to_frame()
+            found = fpgrowth(frame, min_support=support, use_colnames=False)
+            itemsets = FrequentItemsets.from_frame(found, self.sample.labels, len(self.sample))
+            self._mined = (support, itemsets)
+
+        rules = generate_rules(itemsets, min_confidence=self.min_confidence, min_lift=self.min_lift)
+        # Singletons come from the full statistics, larger itemsets from the sample
+        larger = int((itemsets.sizes > 1).sum()) if len(itemsets) else 0
+        return frequent_items + larger, len(rules), "sample"
+
+    def _sample_frequent_pairs(self, support: float) -> int:
+        """Pairs of sample items co-occurring in at least `support` of the sample orders"""
+        matrix = self.sample.matrix
+        n = matrix.shape[0]
+        column_counts = np.asarray(matrix.sum(axis=0)).ravel()
+        columns = np.flatnonzero(column_counts >= support * n)
+        if columns.size < 2:
+            return 0
+        sub = matrix[:, columns].astype(np.int32)
+        co_occurrence = (sub.T @ sub).tocoo()
+        upper = co_occurrence.row < co_occurrence.col
+        return int((co_occurrence.data[upper] >= support * n).sum())
+
+    def _violations(self, projection: Dict) -> List[str]:
+        violations = []
+        if projection["expected_itemsets"] > self.budget["itemsets"]:
+            violations.append(f"expected itemsets {projection['expected_itemsets']} > {self.budget['itemsets']}")
+        if projection["projected_seconds"]["total"] > self.budget["seconds"]:
+            violations.append(f"projected runtime {projection['projected_seconds']['total']}s > {self.budget['seconds']}s")
+        if projection["projected_rss_mb"] > self.budget["rss_mb"]:
+            violations.append(f"projected RSS {projection['projected_rss_mb']} MB > {self.budget['rss_mb']} MB")
+        return violations
+
+    def _recommend_support(self, min_support: float) -> Optional[float]:
+        """Lowest support above the requested one whose projection fits the budgets"""
+        for support in SUPPORT_GRID:
+            if support <= min_support:
+                continue
+            if not self._violations(self._project(self.effective_support(support))):
+                return support
+        return None
+
+
+def estimate_from_database(db, days_back=None, min_support: float = None, min_confidence: float = None,
+                           min_lift: float = None, action: Optional[str] = None) -> Optional[Dict]:
+    """Estimate a mining run from aggregate queries and a sample (db must be connected)"""
+    min_support = min_support if min_support is not None else config.MIN_SUPPORT
+    stats = db.fetch_order_stats(days_back=days_back)
+    if stats is None:
+        return None
+    stats = OrderStats.from_dict(stats)
+
+    sample = None
+    if stats.orders and config.MINING_ESTIMATE_SAMPLE_ORDERS > 0:
+        sample_df = db.fetch_order_sample(days_back=days_back, sample_orders=config.MINING_ESTIMATE_SAMPLE_ORDERS,
+                                          total_orders=stats.orders)
+        if sample_df is not None and not sample_df.empty:
+            sample = BasketMatrix.from_frame(sample_df)
+
+    estimate = CostEstimator(stats, sample, min_confidence, min_lift).estimate(min_support, action)
+    logger.info("Cost estimate: %s itemsets, %s rules, %ss, %s MB - %s", estimate['expected_itemsets'],
+                estimate['expected_rules'], estimate['projected_seconds']['total'], estimate['projected_rss_mb'],
+                estimate['decision'])
+    return estimate
@@ -0,0 +1,189 @@
+"""
+Cached frequent itemsets for threshold tuning without re-mining.
+
+Frequent itemsets depend only on the encoded baskets and the support used;
+confidence, lift, significance, scoring and top-N are applied afterwards. Every
+run therefore stores its itemsets, together with the baskets (needed for the
+temporal metrics) and the SKU ids, under
+``ARTIFACT_DIR/itemsets/<fingerprint>_<support>.npz``. A tuning request only
+regenerates rules and recommendations from such an artifact, and a rerun over
+unchanged data at the same support skips FP-Growth.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from app.services.mining_engine import BasketMatrix
+from app.services.rule_kernel import FrequentItemsets
+from app.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]+_[0-9.e-]+$")
+
+
+def basket_fingerprint(basket: BasketMatrix) -> str:
+    """Digest of the encoded baskets (items, order membership and order days)"""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update("\x1f".join(map(str, basket.labels)).encode("utf-8"))
+    for array in (basket.matrix.indptr, basket.matrix.indices, basket.order_days):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def artifact_key(fingerprint: str, min_support: float) -> str:
+    return f"{fingerprint}_{min_support:.6g}"
+
+
+class ItemsetArtifact:
+    """Baskets, frequent itemsets and SKU ids of one mining run"""
+
+    def __init__(self, key: str, basket: BasketMatrix, itemsets: FrequentItemsets, item_ids: np.ndarray,
+                 min_support: float):
+        self.key = key
+        self.basket = basket
+        self.itemsets = itemsets
+        self.item_ids = item_ids
+        self.min_support = min_support
+
+    def info(self) -> Dict:
+        return {
+            "artifact": self.key,
+            "min_support": self.min_support,
+            "orders": len(self.basket),
+            "items": self.basket.n_items,
+            "itemsets": len(self.itemsets)
+        }
+
+
+class ItemsetCache:
+    """Itemset artifacts on disk, with the most recently used ones kept loaded"""
+
+    def __init__(self, directory: Optional[str] = None, max_files: Optional[int] = None,
+                 max_loaded: Optional[int] = None):
+        self.directory = directory or os.path.join(config.ARTIFACT_DIR, "itemsets")
+        self.max_files = max_files or config.ITEMSET_CACHE_MAX_FILES
+        self.max_loaded = max_loaded or config.ITEMSET_CACHE_LOADED
+        self._loaded: "OrderedDict[str, ItemsetArtifact]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid itemset artifact: {key}")
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def save(self, basket: BasketMatrix, itemsets: FrequentItemsets, item_ids, min_support: float) -> str:
+        """Store the itemsets of a run; returns the artifact key"""
+        key = artifact_key(basket_fingerprint(basket), min_support)
+        item_ids = np.asarray(item_ids)
+        if item_ids.dtype == object:
+            item_ids = item_ids.astype(str)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                labels=basket.labels.astype(str),
+                item_ids=item_ids,
+                indptr=basket.matrix.indptr,
+                indices=basket.matrix.indices,
+                order_days=basket.order_days,
+                items=itemsets.items,
+                support=itemsets.support,
+                n_transactions=np.array(itemsets.n_transactions),
+                min_support=np.array(min_support)
+            )
+        os.replace(tmp_path, path)
+        logger.info("Stored %d frequent itemsets as %s (%d bytes)", len(itemsets), key, os.path.getsize(path))
+
+        self._remember(ItemsetArtifact(key, basket, itemsets, item_ids, min_support))
+        self._prune()
+        return key
+
+    def find(self, basket: BasketMatrix, min_support: float) -> Optional[ItemsetArtifact]:
+        """Artifact mined from the same baskets at the same support, if stored"""
+        return self.load(artifact_key(basket_fingerprint(basket), min_support))
+
+    def load(self, key: str) -> Optional[ItemsetArtifact]:
+        with self._lock:
+            artifact = self._loaded.get(key)
+            if artifact is not None:
+                self._loaded.move_to_end(key)
+                return artifact
+
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                labels = data["labels"].astype(object)
+                matrix = sparse.csr_matrix(
+                    (np.ones(data["indices"].size, dtype=bool), data["indices"], data["indptr"]),
+                    shape=(data["indptr"].size - 1, labels.size)
+                )
+                basket = BasketMatrix(matrix, labels, data["order_days"])
+                itemsets = FrequentItemsets(data["items"], data["support"], labels, int(data["n_transactions"]))
+                artifact = ItemsetArtifact(key, basket, itemsets, data["item_ids"], float(data["min_support"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Could not load itemset artifact %s: %s", path, e)
+            return None
+
+        # Touch the file so pruning keeps artifacts that are still used
+        os.utime(path)
+        self._remember(artifact)
+        return artifact
+
+    def list(self) -> List[Dict]:
+        """Stored artifacts, most recently used first"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".npz")]
+        except FileNotFoundError:
+            return []
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+
+        artifacts = []
+        for entry in entries:
+            key = entry.name[:-len(".npz")]
+            fingerprint, _, support = key.partition("_")
+            artifacts.append({
+                "artifact": key,
+                "fingerprint": fingerprint,
+                "min_support": float(support),
+                "size_bytes": entry.stat().st_size,
+                "last_used": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(entry.stat().st_mtime))
+            })
+        return artifacts
+
+    def _remember(self, artifact: ItemsetArtifact):
+        with self._lock:
+            self._loaded[artifact.key] = artifact
+            self._loaded.move_to_end(artifact.key)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def _prune(self):
+        """Keep the max_files most recently used artifacts"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".npz")]
+            entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        except FileNotFoundError:
+            return
+        for entry in entries[self.max_files:]:
+            try:
+                os.remove(entry.path)
+                logger.info("Removed itemset artifact %s", entry.name)
+            except OSError:
+                pass
+
+
+itemset_cache = ItemsetCache()
@@ -0,0 +1,310 @@
+"""
+Sparse basket encoding and segment-indexed rule counts.
+
+Order lines are encoded once into a sparse order x item matrix. The same
+matrix feeds FP-Growth and the temporal metrics: orders are assigned to time
+segments (daily / weekly / monthly), and the per-segment support of every rule
+is counted with sparse products, so stability and trend come from one pass
+instead of a separate mining run per segment.
+
+Segments can also be mined in parallel: each partition of consecutive
+segments runs FP-Growth in a worker process, the locally frequent itemsets are
+merged into one candidate set, and candidates are counted exactly over the
+whole window (SON algorithm), so the merged model matches a single full run.
+"""
+import logging
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import fpgrowth
+from scipy import sparse
+
+from app.services.rule_kernel import FrequentItemsets
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_DAYS = {"daily": 1, "weekly": 7, "monthly": 30}
+
+# Rules counted per sparse product; bounds the size of the gathered columns
+RULE_CHUNK_SIZE = 4096
+
+
+class BasketMatrix:
+    """Boolean order x item matrix (CSR) with item labels and each order's day offset"""
+
+    def __init__(self, matrix: sparse.csr_matrix, labels, order_days: np.ndarray):
+        self.matrix = matrix
+        self.labels = np.asarray(labels, dtype=object)
+        self.order_days = np.asarray(order_days, dtype=np.int16)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def n_items(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def density(self) -> float:
+        cells = self.matrix.shape[0] * self.matrix.shape[1]
+        return self.matrix.nnz / cells if cells else 0.0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, item_column: str = "SKU_NAME", order_column: str = "ORDER_ID",
+                   days_column: str = "days_ago"):
+        """Encode order lines; items are sorted by label so columns match TransactionEncoder"""
+        valid = df[item_column].notna().to_numpy()
+        order_codes, _ = pd.factorize(df[order_column].to_numpy()[valid])
+        item_codes, labels = pd.factorize(df[item_column].to_numpy()[valid], sort=True)
+
+        n_orders = int(order_codes.max()) + 1 if order_codes.size else 0
+        matrix = sparse.csr_matrix(
+            (np.ones(order_codes.size, dtype=bool), (order_codes, item_codes)),
+            shape=(n_orders, len(labels))
+        )
+        # Repeated (order, item) lines are summed on conversion; keep the matrix boolean
+        matrix.sum_duplicates()
+        matrix.data[:] = True
+
+        # An order belongs to the day of its most recent line
+        order_days = np.full(n_orders, np.iinfo(np.int16).max, dtype=np.int16)
+        if days_column in df.columns:
+            np.minimum.at(order_days, order_codes, df[days_column].to_numpy()[valid].astype(np.int16))
+        else:
+            order_days[:] = 0
+
+        return cls(matrix, labels, order_days)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Sparse boolean frame with integer columns, as FP-Growth expects with use_colnames=False"""
+        with warnings.catch_warnings():
+            # pandas warns about the implicit False fill value of boolean sparse columns
+            warnings.simplefilter("ignore", FutureWarning)
+            return pd.DataFrame.sparse.from_spmatrix(self.matrix, columns=range(self.n_items))
+
+
+def frequent_pairs(basket: BasketMatrix, min_support: float) -> FrequentItemsets:
+    """Frequent items and item pairs (FP-Growth with max_len=2) from one sparse co-occurrence product.
+
+    Counts are exact, so higher supports can be served by filtering the result.
+    """
+    n = len(basket)
+    if n == 0:
+        return FrequentItemsets(np.zeros((0, 2), dtype=np.int32), np.zeros(0), basket.labels, 0)
+
+    item_support = np.asarray(basket.matrix.sum(axis=0, dtype=np.int64)).ravel() / n
+    items = np.flatnonzero(item_support >= min_support)
+
+    # Only frequent items can form frequent pairs; count those pairs once (upper triangle)
+    sub = basket.matrix[:, items].astype(np.int32)
+    co_occurrence = sparse.triu(sub.T @ sub, k=1).tocoo()
+    pair_support = co_occurrence.data / n
+    frequent = pair_support >= min_support
+
+    singles = np.column_stack([items, np.full(items.size, -1)])
+    pairs = np.column_stack([items[co_occurrence.row[frequent]], items[co_occurrence.col[frequent]]])
+    return FrequentItemsets(
+        np.vstack([singles, pairs]),
+        np.concatenate([item_support[items], pair_support[frequent]]),
+        basket.labels, n
+    )
+
+
+def segment_codes(order_days: np.ndarray, segmentation: str = "weekly") -> np.ndarray:
+    """Segment of every order; segment 0 holds the most recent orders"""
+    if segmentation not in SEGMENT_DAYS:
+        raise ValueError(f"Unknown time segmentation: {segmentation}")
+    return np.asarray(order_days, dtype=np.int64) // SEGMENT_DAYS[segmentation]
+
+
+def segmented_rule_counts(basket: BasketMatrix, itemsets: np.ndarray, segments: np.ndarray,
+                          chunk_size: int = RULE_CHUNK_SIZE,
+                          weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Count the orders containing every itemset, per segment.
+
+    ``itemsets`` is a -1 padded item id matrix (one row per rule, antecedent
+    and consequent together). With ``weights`` each order counts with its
+    weight. Returns (segments x rules counts, orders per segment).
+    """
+    n_segments = int(segments.max()) + 1 if segments.size else 0
+    values = np.ones(segments.size, dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    segment_matrix = sparse.csr_matrix(
+        (values, (segments, np.arange(segments.size))),
+        shape=(n_segments, segments.size)
+    )
+    segment_sizes = np.bincount(segments, minlength=n_segments)
+
+    # Padding repeats the first item of the row, which leaves the product unchanged
+    itemsets = np.where(itemsets >= 0, itemsets, itemsets[:, :1])
+    columns = basket.matrix.tocsc().astype(np.float32)
+
+    counts = np.zeros((n_segments, len(itemsets)), dtype=np.float32)
+    for start in range(0, len(itemsets), chunk_size):
+        chunk = itemsets[start:start + chunk_size]
+        contains_all = columns[:, chunk[:, 0]]
+        for slot in range(1, chunk.shape[1]):
+            contains_all = contains_all.multiply(columns[:, chunk[:, slot]])
+        counts[:, start:start + len(chunk)] = (segment_matrix @ sparse.csc_matrix(contains_all)).toarray()
+
+    return counts, segment_sizes
+
+
+def weighted_support(basket: BasketMatrix, itemsets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Share of the total order weight held by the orders containing each itemset"""
+    total = float(np.sum(weights))
+    if total <= 0 or len(itemsets) == 0:
+        return np.zeros(len(itemsets))
+    counts, _ = segmented_rule_counts(basket, itemsets, np.zeros(len(basket), dtype=np.int64), weights=weights)
+    return counts[0].astype(np.float64) / total
+
+
+def temporal_metrics(counts: np.ndarray, segment_sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Stability and trend of every rule from its per-segment support.
+
+    Stability is 1 / (1 + coefficient of variation) of the segment supports.
+    Trend is the least-squares slope of support over time (oldest to newest
+    segment), expressed as the relative change across the window and clipped
+    to [-1, 1]. Segments without orders are ignored.
+    """
+    n_rules = counts.shape[1]
+    active = segment_sizes > 0
+    if active.sum() == 0 or n_rules == 0:
+        return np.full(n_rules, 0.5), np.zeros(n_rules)
+
+    support = counts[active] / segment_sizes[active, None]
+    mean = support.mean(axis=0)
+    std = support.std(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean > 0, std / mean, 0.0)
+        stability = 1.0 / (1.0 + cv)
+
+        # Segment 0 is the most recent, so time runs opposite to the segment index
+        time_axis = -np.flatnonzero(active).astype(np.float64)
+        centered = time_axis - time_axis.mean()
+        denominator = (centered ** 2).sum()
+        if denominator > 0:
+            slope = centered @ (support - mean) / denominator
+            span = time_axis.max() - time_axis.min()
+            trend = np.where(mean > 0, slope * span / mean, 0.0)
+        else:
+            trend = np.zeros(n_rules)
+
+    return stability, np.clip(trend, -1.0, 1.0)
+
+
+def partition_segments(segments: np.ndarray, min_orders: int) -> np.ndarray:
+    """Group consecutive segments into partitions of at least `min_orders` orders.
+
+    Returns the partition of every order; partition 0 holds the most recent
+    orders and a short oldest tail is folded into the previous partition.
+    """
+    sizes = np.bincount(segments)
+    partition_of_segment = np.zeros(sizes.size, dtype=np.int64)
+    partition, filled = 0, 0
+    for segment, size in enumerate(sizes):
+        if filled >= min_orders:
+            partition, filled = partition + 1, 0
+        partition_of_segment[segment] = partition
+        filled += size
+    if partition > 0 and filled < min_orders:
+        partition_of_segment[partition_of_segment == partition] = partition - 1
+    return partition_of_segment[segments]
+
+
+def _mine_partition(matrix: sparse.csr_matrix, min_support: float) -> Tuple[np.ndarray, float]:
+    """Locally frequent itemsets of one partition as a padded item id matrix (runs in a worker process)"""
+    start = time.perf_counter()
+    frame = BasketMatrix(matrix, np.arange(matrix.shape[1]), np.zeros(matrix.shape[0])).to_frame()
+    itemsets = fpgrowth(frame, min_support=min_support, use_colnames=False)
+    rows = FrequentItemsets.from_frame(itemsets, frame.columns, matrix.shape[0]).items
+    return rows, time.perf_counter() - start
+
+
+def mine_partitioned(basket: BasketMatrix, segments: np.ndarray, min_support: float,
+                     workers: Optional[int] = None, min_partition_orders: int = 1000,
+                     timeout: Optional[float] = None):
+    """Mine partitions of time segments concurrently and merge them into one itemset model.
+
+    Partitions are weighted by their order count only: an itemset's merged
+    support is its exact count summed over all partitions, divided by the
+    orders in the window. Itemsets are found by plain order counts (time
+    weights only enter the rule metrics), so the result equals a single
+    full-window run.
+
+    Workers are spawned rather than forked, since the caller is usually a
+    threaded server. If they do not finish within `timeout` seconds they are
+    terminated and TimeoutError is raised.
+
+    Returns (FrequentItemsets over the whole window, per-partition stats).
+    """
+    partitions = partition_segments(segments, min_partition_orders)
+    n_partitions = int(partitions.max()) + 1 if partitions.size else 0
+    order = np.argsort(partitions, kind="stable")
+    bounds = np.searchsorted(partitions[order], np.arange(n_partitions + 1))
+    members = [order[bounds[p]:bounds[p + 1]] for p in range(n_partitions)]
+
+    workers = min(workers or os.cpu_count() or 1, n_partitions)
+    logger.info("Mining %d partitions of %d orders with %d workers", n_partitions, len(basket), workers)
+    jobs = [(basket.matrix[rows], min_support) for rows in members]
+    if workers > 1:
+        results = _mine_in_processes(jobs, workers, timeout)
+    else:
+        results = [_mine_partition(*job) for job in jobs]
+
+    # Union of locally frequent itemsets, in a fixed (lexicographic) order
+    width = max([rows.shape[1] for rows, _ in results if len(rows)], default=1)
+    local = [np.pad(rows, ((0, 0), (0, width - rows.shape[1])), constant_values=-1)
+             for rows, _ in results if len(rows)]
+    if not local:
+        empty = FrequentItemsets(np.zeros((0, 1), dtype=np.int32), np.zeros(0), basket.labels, len(basket))
+        return empty, _partition_stats(segments, members, results)
+    candidates = np.unique(np.vstack(local), axis=0)
+
+    # Exact counts per partition; any globally frequent itemset is frequent in some partition
+    counts, _ = segmented_rule_counts(basket, candidates, partitions)
+    support = counts.sum(axis=0, dtype=np.float64) / len(basket)
+    frequent = support >= min_support
+    logger.info("Merged %d candidate itemsets into %d frequent itemsets", len(candidates), int(frequent.sum()))
+
+    itemsets = FrequentItemsets(candidates[frequent], support[frequent], basket.labels, len(basket))
+    return itemsets, _partition_stats(segments, members, results)
+
+
+def _mine_in_processes(jobs, workers: int, timeout: Optional[float]) -> List[Tuple[np.ndarray, float]]:
+    """Run _mine_partition over the jobs in spawned worker processes, terminating them on timeout"""
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [executor.submit(_mine_partition, *job) for job in jobs]
+        _, pending = wait(futures, timeout=timeout)
+        if pending:
+            processes = list((executor._processes or {}).values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join(5)
+            raise TimeoutError(f"Partitioned mining did not finish within {timeout:g}s")
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _partition_stats(segments, members, results) -> List[Dict]:
+    """Orders, locally frequent itemsets and mining time of every partition"""
+    return [
+        {
+            "partition": p,
+            "segments": [int(segments[rows].min()), int(segments[rows].max())],
+            "orders": int(rows.size),
+            "local_itemsets": int(len(local_rows)),
+            "seconds": round(seconds, 3)
+        }
+        for p, (rows, (local_rows, seconds)) in enumerate(zip(members, results))
+    ]
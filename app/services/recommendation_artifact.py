@@ -0,0 +1,301 @@
+"""
+Compact read-only binary artifact for published recommendations.
+
+The artifact is memory-mapped by every API worker, so N workers share a single
+page-cache copy of the model instead of each building its own index.
+
+Layout (little-endian, every section 8-byte aligned):
+
+    header          magic, format version, score width, counts, version length
+    model version   utf-8
+    string offsets  uint64[n_strings + 1]  -> string blob
+    string blob     utf-8 SKU codes
+    parent codes    uint32[n_parents]      -> string id
+    row offsets     uint32[n_parents + 1]  -> pairs
+    child codes     uint32[n_pairs]        -> string id
+    scores          float16 | float32[n_pairs]
+"""
+import hashlib
+import mmap
+import os
+import re
+import struct
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.rule_index import RuleIndex
+from app.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ARMREC\x00\x01"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIIIIQ")
+SCORE_DTYPES = {"float16": np.float16, "float32": np.float32}
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def artifact_slug(key: str) -> str:
+    """File-system safe name for a recommendations table key"""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", key)
+
+
+def key_directory(directory: str, key: str) -> str:
+    """Directory holding the artifacts of one recommendations table key.
+
+    The digest keeps keys apart whose slugs coincide or extend each other, so
+    cleaning up one key never touches another key's files.
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(directory, f"{artifact_slug(key)}-{digest}")
+
+
+def pointer_path(directory: str, key: str) -> str:
+    """Path of the small file naming the current artifact for a key"""
+    return os.path.join(key_directory(directory, key), "recommendations.current")
+
+
+def write_recommendation_artifact(path: str, entries: Dict[str, Tuple[Tuple[str, float], ...]],
+                                  version: str, score_dtype: str = "float32"):
+    """Write (parent -> ranked (child, score) pairs) to a binary artifact at `path`"""
+    dtype = np.dtype(SCORE_DTYPES[score_dtype])
+
+    # String table shared by parents and children
+    parents = sorted(entries)
+    string_ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(code: str) -> int:
+        string_id = string_ids.get(code)
+        if string_id is None:
+            string_id = len(strings)
+            string_ids[code] = string_id
+            strings.append(code.encode("utf-8"))
+        return string_id
+
+    parent_codes = np.array([intern(parent) for parent in parents], dtype="<u4")
+    row_offsets = np.zeros(len(parents) + 1, dtype="<u4")
+    child_codes: List[int] = []
+    scores: List[float] = []
+    for row, parent in enumerate(parents):
+        for child, score in entries[parent]:
+            child_codes.append(intern(child))
+            scores.append(score)
+        row_offsets[row + 1] = len(child_codes)
+
+    string_offsets = np.zeros(len(strings) + 1, dtype="<u8")
+    np.cumsum([len(s) for s in strings], out=string_offsets[1:])
+    blob = b"".join(strings)
+    version_bytes = version.encode("utf-8")
+
+    sections = [
+        string_offsets.tobytes(),
+        blob,
+        parent_codes.tobytes(),
+        row_offsets.tobytes(),
+        np.asarray(child_codes, dtype="<u4").tobytes(),
+        np.asarray(scores, dtype=dtype.newbyteorder("<")).tobytes()
+    ]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, dtype.itemsize, len(parents), len(child_codes),
+                            len(strings), len(version_bytes), len(blob)))
+        f.write(version_bytes)
+        for section in sections:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(section)
+    os.replace(tmp_path, path)
+
+
+class MappedRecommendationIndex:
+    """Recommendation index served straight from a memory-mapped artifact"""
+
+    def __init__(self, path: str, source: str = "artifact"):
+        self.path = path
+        self.source = source
+        self.loaded_at = time.time()
+        self.created_at = datetime.fromtimestamp(os.path.getmtime(path))
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, format_version, score_width, n_parents, n_pairs,
+         n_strings, version_length, blob_length) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a recommendation artifact: {path}")
+
+        offset = HEADER.size
+        self.version = self._mmap[offset:offset + version_length].decode("utf-8")
+        offset += version_length
+
+        def section(dtype, count):
+            nonlocal offset
+            offset = _align(offset)
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        self._string_offsets = section("<u8", n_strings + 1)
+        offset = _align(offset)
+        self._blob_offset = offset
+        offset += blob_length
+        self._parent_codes = section("<u4", n_parents)
+        self._row_offsets = section("<u4", n_parents + 1)
+        self._child_codes = section("<u4", n_pairs)
+        self._scores = section("<f2" if score_width == 2 else "<f4", n_pairs)
+
+        self.parent_count = n_parents
+        self.pair_count = n_pairs
+        # Only parent codes are decoded up front; they map to their (start, end) pair range
+        names = self._strings(self._parent_codes)
+        row_offsets = self._row_offsets.tolist()
+        self._rows = {name: (row_offsets[row], row_offsets[row + 1]) for row, name in enumerate(names)}
+
+    def _strings(self, string_ids: np.ndarray) -> List[str]:
+        starts = self._string_offsets[string_ids].tolist()
+        ends = self._string_offsets[string_ids + 1].tolist()
+        blob = self._mmap
+        base = self._blob_offset
+        return [blob[base + start:base + end].decode("utf-8") for start, end in zip(starts, ends)]
+
+    def lookup(self, item: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return up to `limit` (child, score) pairs for an item, best first"""
+        pair_range = self._rows.get(item)
+        if pair_range is None:
+            return []
+
+        start, end = pair_range
+        end = min(end, start + max(limit, 0))
+        # Scores are stored as PROXIMITY_SCORE (3 decimals); undo float16/float32 rounding noise
+        scores = [round(score, 3) for score in self._scores[start:end].tolist()]
+        return list(zip(self._strings(self._child_codes[start:end]), scores))
+
+    def lookup_many(self, items, limit: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        """Return recommendations for several items with a single gather over the mapped arrays"""
+        items = list(dict.fromkeys(items))
+        limit = max(limit, 0)
+        ranges = [self._rows.get(item) for item in items]
+        positions = [
+            np.arange(start, min(end, start + limit), dtype=np.int64)
+            for start, end in (pair_range for pair_range in ranges if pair_range is not None)
+        ]
+        if not positions:
+            return {item: [] for item in items}
+
+        gathered = np.concatenate(positions)
+        children = self._strings(self._child_codes[gathered])
+        scores = [round(score, 3) for score in self._scores[gathered].tolist()]
+
+        results: Dict[str, List[Tuple[str, float]]] = {}
+        cursor = 0
+        for item, pair_range in zip(items, ranges):
+            if pair_range is None:
+                results[item] = []
+                continue
+            count = min(pair_range[1], pair_range[0] + limit) - pair_range[0]
+            results[item] = list(zip(children[cursor:cursor + count], scores[cursor:cursor + count]))
+            cursor += count
+        return results
+
+    def to_rule_index(self) -> RuleIndex:
+        """Treat every (parent -> child) pair in the artifact as a single-item rule"""
+        items = np.array(self._strings(np.arange(len(self._string_offsets) - 1)), dtype=str)
+        parents = np.repeat(self._parent_codes, np.diff(self._row_offsets))
+        return RuleIndex.from_pairs(items, parents, self._child_codes, self._scores, self.version)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._rows
+
+    def __len__(self) -> int:
+        return self.parent_count
+
+    def info(self) -> dict:
+        """Describe the index for status endpoints"""
+        return {
+            "model_version": self.version,
+            "source": self.source,
+            "created_at": self.created_at.isoformat(),
+            "parents": self.parent_count,
+            "pairs": self.pair_count,
+            "artifact": os.path.basename(self.path),
+            "artifact_bytes": len(self._mmap)
+        }
+
+
+class RecommendationArtifactStore:
+    """Publishes artifacts to a shared directory and detects publishes from other workers"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(config.ARTIFACT_DIR, "recommendations")
+
+    def publish(self, key: str, entries, version: str) -> str:
+        """Write a new artifact and point the key at it; returns the artifact path"""
+        directory = key_directory(self.directory, key)
+        os.makedirs(directory, exist_ok=True)
+        filename = f"recommendations_{artifact_slug(version)}.bin"
+        path = os.path.join(directory, filename)
+        write_recommendation_artifact(path, entries, version, config.RECOMMENDATION_ARTIFACT_SCORE_DTYPE)
+
+        pointer = pointer_path(self.directory, key)
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            f.write(filename)
+        os.replace(f"{pointer}.tmp", pointer)
+
+        self._cleanup(directory, "recommendations_", ".bin", keep=filename)
+        logger.info("Wrote recommendation artifact %s (%d bytes)", path, os.path.getsize(path))
+        return path
+
+    def _rules_path(self, key: str, version: str) -> str:
+        return os.path.join(key_directory(self.directory, key), f"rules_{artifact_slug(version)}.npz")
+
+    def publish_rules(self, key: str, rule_index: RuleIndex) -> str:
+        """Write the basket-scoring rule index for a model version"""
+        path = self._rules_path(key, rule_index.version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        rule_index.save(tmp_path)
+        os.replace(tmp_path, path)
+
+        self._cleanup(os.path.dirname(path), "rules_", ".npz", keep=os.path.basename(path))
+        return path
+
+    def load_rules(self, key: str, version: str) -> Optional[RuleIndex]:
+        """Load the rule index published with a model version, if present"""
+        path = self._rules_path(key, version)
+        if not os.path.exists(path):
+            return None
+        try:
+            return RuleIndex.load(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load rule index %s: %s", path, e)
+            return None
+
+    def current(self, key: str) -> Optional[Tuple[str, int]]:
+        """Return (artifact path, pointer mtime) for the key, if one has been published"""
+        pointer = pointer_path(self.directory, key)
+        try:
+            mtime = os.stat(pointer).st_mtime_ns
+            with open(pointer, "r", encoding="utf-8") as f:
+                filename = f.read().strip()
+        except OSError:
+            return None
+        return os.path.join(key_directory(self.directory, key), filename), mtime
+
+    @staticmethod
+    def _cleanup(directory: str, prefix: str, suffix: str, keep: str):
+        """Remove superseded files of one key; files still mapped elsewhere are left for the next publish"""
+        for filename in os.listdir(directory):
+            if filename.startswith(prefix) and filename.endswith(suffix) and filename != keep:
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except OSError:
+                    pass
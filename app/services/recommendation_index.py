@@ -0,0 +1,322 @@
+"""
+In-memory recommendation index for serving lookups without a database round trip
+"""
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.recommendation_artifact import MappedRecommendationIndex, RecommendationArtifactStore
+from app.services.rule_index import RuleIndex
+from app.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+Recommendation = Tuple[str, float]
+
+
+def normalize_proximity_scores(scores: np.ndarray) -> np.ndarray:
+    """Normalize composite scores to the 0.001 - 0.999 range stored as PROXIMITY_SCORE"""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
+        return scores
+    min_score = scores.min()
+    max_score = scores.max()
+    if max_score == min_score:
+        return np.full(scores.shape, 0.5)
+    return 0.001 + (scores - min_score) / (max_score - min_score) * 0.998
+
+
+class RecommendationIndex:
+    """Immutable SKU code -> top-N (child, score) index tagged with a model version"""
+
+    def __init__(self, entries: Dict[str, Tuple[Recommendation, ...]], version: str, source: str):
+        self._entries = entries
+        self.version = version
+        self.source = source
+        self.created_at = datetime.now()
+        self.loaded_at = time.time()
+        self.parent_count = len(entries)
+        self.pair_count = sum(len(children) for children in entries.values())
+
+    def lookup(self, item: str, limit: int = 10) -> List[Recommendation]:
+        """Return up to `limit` (child, score) pairs for an item, best first"""
+        return list(self._entries.get(item, ())[:limit])
+
+    def lookup_many(self, items: Iterable[str], limit: int = 10) -> Dict[str, List[Recommendation]]:
+        """Return recommendations for several items in one pass"""
+        entries = self._entries
+        return {item: list(entries.get(item, ())[:limit]) for item in items}
+
+    def to_rule_index(self) -> RuleIndex:
+        """Treat every (parent -> child) recommendation as a single-item rule"""
+        item_ids: Dict[str, int] = {}
+        parents, children, scores = [], [], []
+        for parent, recommendations in self._entries.items():
+            parent_id = item_ids.setdefault(parent, len(item_ids))
+            for child, score in recommendations:
+                parents.append(parent_id)
+                children.append(item_ids.setdefault(child, len(item_ids)))
+                scores.append(score)
+        return RuleIndex.from_pairs(np.array(list(item_ids), dtype=str), np.array(parents),
+                                    np.array(children), np.array(scores), self.version)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._entries
+
+    def __len__(self) -> int:
+        return self.parent_count
+
+    def info(self) -> dict:
+        """Describe the index for status endpoints"""
+        return {
+            "model_version": self.version,
+            "source": self.source,
+            "created_at": self.created_at.isoformat(),
+            "parents": self.parent_count,
+            "pairs": self.pair_count
+        }
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, float]], version: str, source: str, top_n: Optional[int] = None):
+        """Build an index from (parent, child, score) rows in any order"""
+        top_n = top_n or config.RECOMMENDATION_INDEX_TOP_N
+        grouped: Dict[str, Dict[str, float]] = {}
+        for parent, child, score in rows:
+            children = grouped.setdefault(str(parent), {})
+            child = str(child)
+            score = float(score or 0.0)
+            # (parent, child) is the table's primary key; keep the best score like INSERT IGNORE does
+            if score > children.get(child, -1.0):
+                children[child] = score
+
+        entries = {
+            parent: tuple(sorted(children.items(), key=lambda rec: rec[1], reverse=True)[:top_n])
+            for parent, children in grouped.items()
+        }
+        return cls(entries, version=version, source=source)
+
+    @classmethod
+    def from_recommendations(cls, recommendations_df, version: str, source: str = "mining", top_n: Optional[int] = None):
+        """Build an index from the mining pipeline output, scored the same way as the database"""
+        if recommendations_df is None or recommendations_df.empty:
+            return cls({}, version=version, source=source)
+
+        scores = np.round(normalize_proximity_scores(recommendations_df['composite_score'].to_numpy()), 3)
+        rows = zip(
+            recommendations_df['main_item'].astype(str).to_numpy(),
+            recommendations_df['recommended_item'].astype(str).to_numpy(),
+            scores
+        )
+        return cls.from_rows(rows, version=version, source=source, top_n=top_n)
+
+
+class RecommendationIndexStore:
+    """Holds the published index per recommendations table and swaps it atomically"""
+
+    def __init__(self, artifact_store: Optional[RecommendationArtifactStore] = None):
+        self._indexes: Dict[str, RecommendationIndex] = {}
+        self._failed_loads: Dict[str, float] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._artifacts = artifact_store
+        self._artifact_checked: Dict[str, float] = {}
+        self._artifact_mtimes: Dict[str, int] = {}
+        self._rule_indexes: Dict[str, RuleIndex] = {}
+
+    def get(self, key: str) -> Optional[RecommendationIndex]:
+        """Get the currently published index (lock-free read of an immutable snapshot)"""
+        self._refresh_from_artifact(key)
+        return self._indexes.get(key)
+
+    def publish(self, key: str, index: RecommendationIndex, rule_index: Optional[RuleIndex] = None,
+                persist: bool = True):
+        """Atomically replace the published index for a recommendations table.
+
+        With artifacts enabled the index is written to the shared artifact
+        directory and served from its memory map, so other workers pick up the
+        same model on their next lookup. The optional rule index (used for
+        basket scoring) is persisted first so it is in place before the switch.
+        """
+        if persist and self._artifacts is not None and isinstance(index, RecommendationIndex):
+            try:
+                if rule_index is not None:
+                    self._artifacts.publish_rules(key, rule_index)
+                path = self._artifacts.publish(key, index._entries, index.version)
+                mapped = MappedRecommendationIndex(path, source=index.source)
+                current = self._artifacts.current(key)
+                if current is not None:
+                    self._artifact_mtimes[key] = current[1]
+                index = mapped
+            except Exception as e:
+                logger.error("Error writing recommendation artifact for %s, serving from memory: %s", key, e)
+
+        self._swap(key, index, rule_index)
+        logger.info("Published recommendation index %s for %s: %d items, %d pairs",
+                    index.version, key, index.parent_count, index.pair_count)
+
+    def _swap(self, key: str, index, rule_index: Optional[RuleIndex] = None):
+        with self._lock:
+            indexes = dict(self._indexes)
+            indexes[key] = index
+            self._indexes = indexes
+            if rule_index is not None:
+                rule_indexes = dict(self._rule_indexes)
+                rule_indexes[key] = rule_index
+                self._rule_indexes = rule_indexes
+            self._failed_loads.pop(key, None)
+
+    def get_rule_index(self, key: str) -> Optional[RuleIndex]:
+        """Get the rule index matching the published model version.
+
+        Falls back to the rule artifact written by the publishing worker, and
+        finally to the pair recommendations treated as single-item rules.
+        """
+        index = self.get(key)
+        if index is None:
+            return None
+
+        rule_index = self._rule_indexes.get(key)
+        if rule_index is not None and rule_index.version == index.version:
+            return rule_index
+
+        rule_index = self._artifacts.load_rules(key, index.version) if self._artifacts is not None else None
+        if rule_index is None:
+            rule_index = index.to_rule_index()
+
+        with self._lock:
+            rule_indexes = dict(self._rule_indexes)
+            rule_indexes[key] = rule_index
+            self._rule_indexes = rule_indexes
+        return rule_index
+
+    def _refresh_from_artifact(self, key: str):
+        """Map a newer artifact published by another worker (checked at most once per interval)"""
+        if self._artifacts is None:
+            return
+
+        now = time.time()
+        if now - self._artifact_checked.get(key, 0.0) < config.RECOMMENDATION_ARTIFACT_CHECK_SECONDS:
+            return
+        self._artifact_checked[key] = now
+
+        current = self._artifacts.current(key)
+        if current is None or self._artifact_mtimes.get(key) == current[1]:
+            return
+
+        mapped = self._map_artifact(key, current)
+        if mapped is not None:
+            self._swap(key, mapped)
+            logger.info("Mapped recommendation artifact %s for %s", mapped.version, key)
+
+    def _map_artifact(self, key: str, current=None) -> Optional[MappedRecommendationIndex]:
+        """Map the artifact the pointer currently names, if there is one"""
+        if current is None:
+            current = self._artifacts.current(key) if self._artifacts is not None else None
+            if current is None:
+                return None
+
+        path, mtime = current
+        try:
+            mapped = MappedRecommendationIndex(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not map recommendation artifact %s: %s", path, e)
+            return None
+
+        self._artifact_mtimes[key] = mtime
+        return mapped
+
+    def invalidate(self, key: str):
+        """Drop the published index so the next lookup reloads it"""
+        with self._lock:
+            indexes = dict(self._indexes)
+            indexes.pop(key, None)
+            self._indexes = indexes
+            self._failed_loads.pop(key, None)
+
+    def get_or_load(self, key: str, loader: Callable[[], Optional[RecommendationIndex]]):
+        """Get the published index, loading it once on a miss and refreshing it in the background when stale"""
+        self._refresh_from_artifact(key)
+
+        now = time.time()
+        failed_at = self._failed_loads.get(key)
+        retry_pending = failed_at is not None and now - failed_at < config.RECOMMENDATION_INDEX_RETRY_SECONDS
+
+        index = self._indexes.get(key)
+        if index is not None:
+            ttl = config.RECOMMENDATION_INDEX_TTL_SECONDS
+            if ttl > 0 and now - index.loaded_at > ttl and not retry_pending:
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+            return index
+
+        if retry_pending:
+            return None
+
+        return self._load(key, loader)
+
+    def _refresh(self, key: str, loader: Callable[[], Optional[RecommendationIndex]]):
+        """Background TTL refresh; at most one is in flight per key"""
+        try:
+            self._load(key, loader, wait=False)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _load(self, key: str, loader: Callable[[], Optional[RecommendationIndex]], wait: bool = True) -> Optional[RecommendationIndex]:
+        """Run the loader with at most one concurrent load per key"""
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        if not load_lock.acquire(blocking=False):
+            if not wait:
+                return self._indexes.get(key)
+            # Another request is loading; wait for it and use its result
+            with load_lock:
+                return self._indexes.get(key)
+
+        try:
+            current = self._indexes.get(key)
+            if current is not None and time.time() - current.loaded_at <= config.RECOMMENDATION_INDEX_TTL_SECONDS:
+                return current
+
+            # Only mining runs (and explicit reloads) write the shared artifact. One
+            # written within the TTL is mapped; an older one is reloaded from the
+            # database, and that load is kept in this worker
+            artifact = self._artifacts.current(key) if self._artifacts is not None else None
+            ttl = config.RECOMMENDATION_INDEX_TTL_SECONDS
+            if artifact is not None and (ttl <= 0 or time.time() - artifact[1] / 1e9 <= ttl):
+                mapped = self._map_artifact(key, artifact)
+                if mapped is not None:
+                    mapped.loaded_at = artifact[1] / 1e9
+                    self._swap(key, mapped)
+                    return mapped
+
+            index = loader()
+            if index is None:
+                with self._lock:
+                    self._failed_loads[key] = time.time()
+                return current
+
+            self.publish(key, index, persist=False)
+            return index
+        except Exception as e:
+            logger.error("Error loading recommendation index for %s: %s", key, e)
+            with self._lock:
+                self._failed_loads[key] = time.time()
+            return self._indexes.get(key)
+        finally:
+            load_lock.release()
+
+
+# Global recommendation index store
+recommendation_index_store = RecommendationIndexStore(
+    RecommendationArtifactStore() if config.RECOMMENDATION_ARTIFACTS_ENABLED else None
+)
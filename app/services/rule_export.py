@@ -0,0 +1,154 @@
+"""
+Server-side exports of mined rules.
+
+Every mining run stores its full rule table once as CSV under
+``ARTIFACT_DIR/exports/<export_id>/``. Downloads are produced from that file
+in chunks: CSV is served as is, gzip and Parquet are converted on first
+request (chunk by chunk, so a multi-million-row table never sits in memory)
+and cached next to it. Export directories are removed after
+``EXPORT_TTL_SECONDS``.
+"""
+import gzip
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+from app.utils.config import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet exports are optional
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# format -> (file name, media type)
+EXPORT_FORMATS = {
+    "csv": ("rules.csv", "text/csv"),
+    "csv.gz": ("rules.csv.gz", "application/gzip"),
+    "parquet": ("rules.parquet", "application/vnd.apache.parquet")
+}
+
+_EXPORT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+_COPY_BUFFER = 1024 * 1024
+
+_cleanup_lock = threading.Lock()
+_last_cleanup = 0.0
+
+
+def export_directory(export_id: str) -> str:
+    if not _EXPORT_ID_PATTERN.match(export_id):
+        raise ValueError(f"Invalid export id: {export_id}")
+    return os.path.join(config.ARTIFACT_DIR, "exports", export_id)
+
+
+def available_formats():
+    return [name for name in EXPORT_FORMATS if name != "parquet" or pq is not None]
+
+
+def store_rules(export_id: str, rules: pd.DataFrame) -> str:
+    """Write the full rule table of a run (the source of every export format)"""
+    directory = export_directory(export_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, EXPORT_FORMATS["csv"][0])
+    _write_atomic(path, lambda tmp: rules.to_csv(tmp, index=False, chunksize=config.EXPORT_CHUNK_ROWS))
+    logger.info("Stored %d rules for export %s", len(rules), export_id)
+    cleanup_exports()
+    return path
+
+
+def export_file(export_id: str, fmt: str) -> Optional[str]:
+    """Path of an export in `fmt`, converting from the stored CSV on first use; None if nothing was stored"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet" and pq is None:
+        raise ValueError("Parquet exports require pyarrow")
+
+    directory = export_directory(export_id)
+    source = os.path.join(directory, EXPORT_FORMATS["csv"][0])
+    if not os.path.isfile(source):
+        return None
+
+    path = os.path.join(directory, EXPORT_FORMATS[fmt][0])
+    if fmt != "csv" and not os.path.isfile(path):
+        start = time.perf_counter()
+        convert = _write_gzip if fmt == "csv.gz" else _write_parquet
+        _write_atomic(path, lambda tmp: convert(source, tmp))
+        logger.info("Converted export %s to %s in %.2fs", export_id, fmt, time.perf_counter() - start)
+    return path
+
+
+def remove_export(export_id: str):
+    try:
+        shutil.rmtree(export_directory(export_id))
+    except (FileNotFoundError, ValueError):
+        pass
+    except OSError as e:
+        # e.g. a download still holding a file open on Windows
+        logger.warning("Could not remove export %s: %s", export_id, e)
+
+
+def cleanup_exports(max_age_seconds: Optional[float] = None):
+    """Remove exports older than EXPORT_TTL_SECONDS (at most once a minute unless an age is given)"""
+    global _last_cleanup
+    now = time.time()
+    if max_age_seconds is None:
+        with _cleanup_lock:
+            if now - _last_cleanup < 60:
+                return
+            _last_cleanup = now
+        max_age_seconds = config.EXPORT_TTL_SECONDS
+
+    root = os.path.join(config.ARTIFACT_DIR, "exports")
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir() and now - entry.stat().st_mtime > max_age_seconds:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                logger.info("Removed expired export %s", entry.name)
+        except FileNotFoundError:
+            continue
+
+
+def _write_atomic(path: str, write):
+    """Write through a temporary file in the same directory, so readers never see a partial export"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _write_gzip(source: str, target: str):
+    with open(source, "rb") as src, gzip.open(target, "wb", compresslevel=config.EXPORT_GZIP_LEVEL) as dst:
+        shutil.copyfileobj(src, dst, _COPY_BUFFER)
+
+
+def _write_parquet(source: str, target: str):
+    writer = None
+    try:
+        for chunk in pd.read_csv(source, chunksize=config.EXPORT_CHUNK_ROWS):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer is None:
+            # No rows: keep the columns
+            pq.write_table(pa.Table.from_pandas(pd.read_csv(source, nrows=0), preserve_index=False), target)
+    finally:
+        if writer is not None:
+            writer.close()
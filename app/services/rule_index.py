@@ -0,0 +1,146 @@
+"""
+Vectorized rule index for scoring whole baskets against mined association rules
+"""
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RuleIndex:
+    """Antecedent set -> consequent rules stored as flat arrays.
+
+    Antecedents are kept in CSR form (``antecedent_ptr`` / ``antecedent_items``)
+    together with an inverted item -> rules posting list, so multi-item
+    antecedents from FP-Growth are matched against a basket by counting basket
+    hits per rule in one vectorized pass instead of a Python loop over rules.
+    """
+
+    AGGREGATIONS = ("sum", "max")
+
+    def __init__(self, items: np.ndarray, antecedent_ptr: np.ndarray, antecedent_items: np.ndarray,
+                 consequents: np.ndarray, scores: np.ndarray, version: str):
+        self.items = np.asarray(items)
+        self.antecedent_ptr = np.asarray(antecedent_ptr, dtype=np.int64)
+        self.antecedent_items = np.asarray(antecedent_items, dtype=np.int32)
+        self.consequents = np.asarray(consequents, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.version = version
+        self._item_ids = {str(item): i for i, item in enumerate(self.items.tolist())}
+        self._antecedent_sizes = np.diff(self.antecedent_ptr)
+
+        # Inverted index: rules whose antecedent contains item i are postings[item_ptr[i]:item_ptr[i + 1]]
+        entry_rules = np.repeat(np.arange(len(self.consequents), dtype=np.int32), self._antecedent_sizes)
+        order = np.argsort(self.antecedent_items, kind="stable")
+        self._postings = entry_rules[order]
+        self._item_ptr = np.zeros(len(self.items) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.antecedent_items, minlength=len(self.items)), out=self._item_ptr[1:])
+
+    @property
+    def rule_count(self) -> int:
+        return len(self.consequents)
+
+    @classmethod
+    def from_rule_set(cls, rule_set, name_to_id: Optional[Dict[str, str]], version: str):
+        """Build from a rule kernel RuleSet without materializing frozensets"""
+        name_to_id = name_to_id or {}
+        mapped = np.array([str(name_to_id.get(label, label)) for label in rule_set.labels], dtype=str)
+        items, codes = np.unique(mapped, return_inverse=True)
+        rule_scores = rule_set['confidence'] * rule_set['lift']
+
+        antecedent_blocks, ptr_blocks, consequent_blocks, score_blocks = [], [], [], []
+        offset = 0
+        for j in range(rule_set.consequents.shape[1]):
+            present = rule_set.consequents[:, j] >= 0
+            antecedents = rule_set.antecedents[present]
+            sizes = (antecedents >= 0).sum(axis=1)
+            antecedent_blocks.append(codes[antecedents[antecedents >= 0]])
+            ptr_blocks.append(offset + np.cumsum(sizes))
+            offset += int(sizes.sum())
+            consequent_blocks.append(codes[rule_set.consequents[present, j]])
+            score_blocks.append(rule_scores[present])
+
+        if not ptr_blocks:
+            return cls(items, np.zeros(1), np.zeros(0), np.zeros(0), np.zeros(0), version)
+        return cls(items, np.concatenate([[0]] + ptr_blocks), np.concatenate(antecedent_blocks),
+                   np.concatenate(consequent_blocks), np.concatenate(score_blocks), version)
+
+    @classmethod
+    def from_pairs(cls, items: np.ndarray, parents: np.ndarray, children: np.ndarray, scores: np.ndarray, version: str):
+        """Build from single-item (parent -> child, score) recommendations"""
+        return cls(items, np.arange(len(parents) + 1), parents, children, scores, version)
+
+    def score_basket(self, basket: Iterable[str], limit: int = 10, aggregation: str = "sum"):
+        """Aggregate the rules fired by a basket into top-N companion items.
+
+        Returns (recommendations, stats) where recommendations is a list of
+        (item, score, rules_matched) best first, excluding basket items.
+        """
+        if aggregation not in self.AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}")
+
+        basket = list(dict.fromkeys(basket))
+        known = [self._item_ids[item] for item in basket if item in self._item_ids]
+        stats = {
+            "rules_evaluated": self.rule_count,
+            "rules_matched": 0,
+            "unknown_items": [item for item in basket if item not in self._item_ids]
+        }
+        if not known or self.rule_count == 0:
+            return [], stats
+
+        in_basket = np.zeros(len(self.items), dtype=bool)
+        in_basket[known] = True
+
+        # A rule fires when every antecedent item is in the basket, i.e. its
+        # posting count over the basket items equals its antecedent size
+        candidates = np.concatenate([self._postings[self._item_ptr[i]:self._item_ptr[i + 1]] for i in known])
+        rules, hits = np.unique(candidates, return_counts=True)
+        fired = rules[hits == self._antecedent_sizes[rules]]
+        fired = fired[~in_basket[self.consequents[fired]]]
+
+        consequents = self.consequents[fired]
+        scores = self.scores[fired]
+        stats["rules_matched"] = int(fired.size)
+        if consequents.size == 0:
+            return [], stats
+
+        matched = np.bincount(consequents, minlength=len(self.items))
+        if aggregation == "sum":
+            totals = np.bincount(consequents, weights=scores, minlength=len(self.items))
+        else:
+            totals = np.zeros(len(self.items), dtype=np.float64)
+            np.maximum.at(totals, consequents, scores)
+
+        candidates = np.flatnonzero(matched)
+        limit = min(max(limit, 0), candidates.size)
+        if limit < candidates.size:
+            candidates = candidates[np.argpartition(-totals[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-totals[candidates], kind="stable")]
+
+        recommendations: List[Tuple[str, float, int]] = [
+            (str(self.items[i]), round(float(totals[i]), 6), int(matched[i])) for i in candidates
+        ]
+        return recommendations, stats
+
+    def save(self, path: str):
+        """Persist the index arrays (uncompressed .npz)"""
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                items=self.items.astype(str),
+                antecedent_ptr=self.antecedent_ptr,
+                antecedent_items=self.antecedent_items,
+                consequents=self.consequents,
+                scores=self.scores,
+                version=np.array(self.version)
+            )
+
+    @classmethod
+    def load(cls, path: str):
+        """Load an index written by ``save``"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['items'], data['antecedent_ptr'], data['antecedent_items'],
+                       data['consequents'], data['scores'], str(data['version']))
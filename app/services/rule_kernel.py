@@ -0,0 +1,355 @@
+"""
+Array-based association rule generation.
+
+Replaces ``mlxtend.frequent_patterns.association_rules``: frequent itemsets are
+held as a padded integer matrix with a support array, every candidate
+(antecedent, consequent) split of every itemset is generated per itemset size
+with bit masks, supports are looked up with a single sorted-key search, and all
+rule metrics are computed in one vectorized pass with the min-confidence /
+min-lift filter fused in before anything is materialized. An optional
+significance test (one-sided Fisher exact or chi-square on the 2x2 contingency
+table rebuilt from supports) with multiple-testing control prunes chance
+associations at the same stage.
+"""
+import logging
+from itertools import chain
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+logger = logging.getLogger(__name__)
+
+METRIC_NAMES = (
+    "antecedent support",
+    "consequent support",
+    "support",
+    "confidence",
+    "lift",
+    "leverage",
+    "conviction",
+    "zhangs_metric"
+)
+
+SIGNIFICANCE_TESTS = ("none", "fisher", "chi2")
+CORRECTIONS = ("none", "bonferroni", "bh")
+
+
+def _padded_rows(itemsets, width: Optional[int] = None) -> np.ndarray:
+    """Pack iterables of item ids into a sorted, -1 padded int32 matrix"""
+    sorted_sets = [sorted(itemset) for itemset in itemsets]
+    sizes = np.fromiter((len(s) for s in sorted_sets), dtype=np.int64, count=len(sorted_sets))
+    width = width or (int(sizes.max()) if sizes.size else 1)
+    rows = np.full((len(sorted_sets), width), -1, dtype=np.int32)
+    if sizes.sum():
+        flat = np.fromiter(chain.from_iterable(sorted_sets), dtype=np.int32, count=int(sizes.sum()))
+        row_index = np.repeat(np.arange(len(sorted_sets)), sizes)
+        col_index = np.arange(flat.size) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        rows[row_index, col_index] = flat
+    return rows
+
+
+class FrequentItemsets:
+    """Frequent itemsets as a (-1 padded, row-sorted) item id matrix plus supports"""
+
+    def __init__(self, items: np.ndarray, support: np.ndarray, labels, n_transactions: int):
+        self.items = np.asarray(items, dtype=np.int32)
+        self.support = np.asarray(support, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=object)
+        self.n_transactions = int(n_transactions)
+        self.sizes = (self.items >= 0).sum(axis=1)
+        self._lookup = None
+
+    def __len__(self) -> int:
+        return len(self.support)
+
+    @classmethod
+    def from_frame(cls, freq_itemsets: pd.DataFrame, labels, n_transactions: int):
+        """Build from an FP-Growth result whose itemsets hold column indices (use_colnames=False)"""
+        return cls(_padded_rows(freq_itemsets['itemsets']), freq_itemsets['support'].to_numpy(),
+                   labels, n_transactions)
+
+    def filter(self, mask: np.ndarray) -> "FrequentItemsets":
+        """Keep only the itemsets selected by a boolean mask"""
+        return FrequentItemsets(self.items[mask], self.support[mask], self.labels, self.n_transactions)
+
+    def lookup(self, rows: np.ndarray) -> np.ndarray:
+        """Return the itemset position of each query row (same width, -1 padded), or -1 if absent"""
+        if self._lookup is None:
+            self._lookup = _ItemsetLookup(self.items, len(self.labels))
+        return self._lookup.find(rows)
+
+
+class _ItemsetLookup:
+    """Exact row matching via packed integer keys (or row-wise unique when keys would overflow)"""
+
+    def __init__(self, items: np.ndarray, n_labels: int):
+        self.items = items
+        self.bits = max(1, int(np.ceil(np.log2(n_labels + 2))))
+        self.packed = self.bits * items.shape[1] <= 63
+        if self.packed:
+            keys = self._pack(items)
+            self.order = np.argsort(keys, kind="stable")
+            self.sorted_keys = keys[self.order]
+
+    def _pack(self, rows: np.ndarray) -> np.ndarray:
+        keys = np.zeros(len(rows), dtype=np.int64)
+        for column in range(rows.shape[1]):
+            keys |= (rows[:, column].astype(np.int64) + 1) << (self.bits * column)
+        return keys
+
+    def find(self, rows: np.ndarray) -> np.ndarray:
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        if self.packed:
+            keys = self._pack(rows)
+            positions = np.searchsorted(self.sorted_keys, keys)
+            positions = np.minimum(positions, len(self.sorted_keys) - 1)
+            found = self.sorted_keys[positions] == keys
+            return np.where(found, self.order[positions], -1)
+
+        stacked = np.vstack([self.items, rows])
+        _, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        position_of_group = np.full(inverse.max() + 1, -1, dtype=np.int64)
+        position_of_group[inverse[:len(self.items)]] = np.arange(len(self.items))
+        return position_of_group[inverse[len(self.items):]]
+
+
+class RuleSet:
+    """Association rules as padded antecedent/consequent matrices plus metric arrays"""
+
+    def __init__(self, antecedents: np.ndarray, consequents: np.ndarray, metrics: Dict[str, np.ndarray],
+                 labels, n_transactions: int):
+        self.antecedents = antecedents
+        self.consequents = consequents
+        self.metrics = metrics
+        self.labels = np.asarray(labels, dtype=object)
+        self.n_transactions = n_transactions
+
+    def __len__(self) -> int:
+        return len(self.antecedents)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        return self.metrics[metric]
+
+    def filter(self, mask: np.ndarray) -> "RuleSet":
+        """Keep only the rules selected by a boolean mask"""
+        return RuleSet(self.antecedents[mask], self.consequents[mask],
+                       {name: values[mask] for name, values in self.metrics.items()},
+                       self.labels, self.n_transactions)
+
+    def pairs(self):
+        """Explode rules into (antecedent item, consequent item, rule position) arrays"""
+        antecedent_items, consequent_items, rule_positions = [], [], []
+        rule_ids = np.arange(len(self))
+        for i in range(self.antecedents.shape[1]):
+            for j in range(self.consequents.shape[1]):
+                present = (self.antecedents[:, i] >= 0) & (self.consequents[:, j] >= 0)
+                antecedent_items.append(self.antecedents[present, i])
+                consequent_items.append(self.consequents[present, j])
+                rule_positions.append(rule_ids[present])
+
+        if not rule_positions:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+
+        rule_positions = np.concatenate(rule_positions)
+        order = np.argsort(rule_positions, kind="stable")
+        return (np.concatenate(antecedent_items)[order], np.concatenate(consequent_items)[order],
+                rule_positions[order])
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialize an mlxtend-compatible rules frame (frozensets of item labels)"""
+        def as_sets(rows):
+            return [frozenset(self.labels[row[row >= 0]]) for row in rows]
+
+        frame = pd.DataFrame({
+            "antecedents": as_sets(self.antecedents),
+            "consequents": as_sets(self.consequents)
+        })
+        for name, values in self.metrics.items():
+            frame[name] = values
+        return frame
+
+
+def significance_pvalues(support: np.ndarray, support_a: np.ndarray, support_c: np.ndarray,
+                         n_transactions: int, test: str = "fisher") -> np.ndarray:
+    """One-sided p-values for positive association of A and C, from supports.
+
+    The 2x2 contingency table of every rule is rebuilt from its supports and
+    the transaction count, and tested in bulk: ``fisher`` is the exact
+    hypergeometric upper tail P(X >= n_AC), ``chi2`` the Pearson chi-square
+    statistic (halved p-value, 1 for negative associations).
+    """
+    if test not in SIGNIFICANCE_TESTS or test == "none":
+        raise ValueError(f"Unknown significance test: {test}")
+
+    n = float(n_transactions)
+    count_ac = np.rint(support * n)
+    count_a = np.rint(support_a * n)
+    count_c = np.rint(support_c * n)
+
+    if test == "fisher":
+        return stats.hypergeom.sf(count_ac - 1, n, count_c, count_a)
+
+    expected = count_a * count_c / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Pearson chi-square of a 2x2 table in closed form
+        denominator = count_a * (n - count_a) * count_c * (n - count_c)
+        statistic = np.where(denominator > 0, n * (n * count_ac - count_a * count_c) ** 2 / denominator, 0.0)
+    p_values = stats.chi2.sf(statistic, 1) / 2
+    return np.where(count_ac > expected, p_values, 1.0)
+
+
+def adjust_pvalues(p_values: np.ndarray, correction: str = "bh") -> np.ndarray:
+    """Multiple-testing adjustment over the whole rule family (Bonferroni or Benjamini-Hochberg)"""
+    if correction not in CORRECTIONS:
+        raise ValueError(f"Unknown p-value correction: {correction}")
+
+    m = p_values.size
+    if correction == "none" or m == 0:
+        return p_values
+    if correction == "bonferroni":
+        return np.minimum(p_values * m, 1.0)
+
+    order = np.argsort(p_values, kind="stable")
+    ranked = p_values[order] * m / np.arange(1, m + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    adjusted = np.empty_like(ranked)
+    adjusted[order] = np.minimum(ranked, 1.0)
+    return adjusted
+
+
+def generate_rules(itemsets: FrequentItemsets, min_confidence: float = 0.0, min_lift: float = 0.0,
+                   significance_test: str = "none", alpha: float = 0.05, correction: str = "bh") -> RuleSet:
+    """Generate every rule from frequent itemsets with fused confidence/lift filtering.
+
+    With ``significance_test`` set to ``fisher`` or ``chi2`` the surviving
+    rules are additionally kept only when their adjusted p-value is below
+    ``alpha``; the adjusted p-value is returned as the ``p_value`` metric.
+    """
+    width = itemsets.items.shape[1] if len(itemsets) else 1
+    antecedent_blocks, consequent_blocks = [], []
+    support_blocks, antecedent_support_blocks, consequent_support_blocks = [], [], []
+    candidates = 0
+
+    for size in range(2, int(itemsets.sizes.max(initial=0)) + 1):
+        positions = np.flatnonzero(itemsets.sizes == size)
+        if positions.size == 0:
+            continue
+        rows = itemsets.items[positions, :size]
+        support_ac = itemsets.support[positions]
+
+        # Every non-empty proper subset of the itemset is a candidate antecedent
+        for mask in range(1, (1 << size) - 1):
+            antecedent_cols = [c for c in range(size) if mask >> c & 1]
+            consequent_cols = [c for c in range(size) if not mask >> c & 1]
+
+            antecedent_rows = np.full((len(rows), width), -1, dtype=np.int32)
+            antecedent_rows[:, :len(antecedent_cols)] = rows[:, antecedent_cols]
+            consequent_rows = np.full((len(rows), width), -1, dtype=np.int32)
+            consequent_rows[:, :len(consequent_cols)] = rows[:, consequent_cols]
+
+            antecedent_pos = itemsets.lookup(antecedent_rows)
+            consequent_pos = itemsets.lookup(consequent_rows)
+            known = (antecedent_pos >= 0) & (consequent_pos >= 0)
+            candidates += len(rows)
+
+            support_a = itemsets.support[antecedent_pos[known]]
+            support_c = itemsets.support[consequent_pos[known]]
+            support = support_ac[known]
+
+            # Fused filter: only rules passing confidence and lift are kept
+            confidence = support / support_a
+            lift = confidence / support_c
+            keep = (confidence >= min_confidence) & (lift >= min_lift)
+
+            antecedent_blocks.append(antecedent_rows[known][keep])
+            consequent_blocks.append(consequent_rows[known][keep])
+            support_blocks.append(support[keep])
+            antecedent_support_blocks.append(support_a[keep])
+            consequent_support_blocks.append(support_c[keep])
+
+    if not support_blocks:
+        empty_rows = np.zeros((0, width), dtype=np.int32)
+        metrics = {name: np.zeros(0) for name in METRIC_NAMES}
+        return RuleSet(empty_rows, empty_rows.copy(), metrics, itemsets.labels, itemsets.n_transactions)
+
+    antecedents = np.concatenate(antecedent_blocks)
+    consequents = np.concatenate(consequent_blocks)
+    support = np.concatenate(support_blocks)
+    support_a = np.concatenate(antecedent_support_blocks)
+    support_c = np.concatenate(consequent_support_blocks)
+
+    p_value = None
+    if significance_test and significance_test != "none":
+        p_value = adjust_pvalues(
+            significance_pvalues(support, support_a, support_c, itemsets.n_transactions, significance_test),
+            correction
+        )
+        significant = p_value < alpha
+        logger.info("Significance filter (%s, %s, alpha=%s): %d of %d rules kept",
+                    significance_test, correction, alpha, int(significant.sum()), significant.size)
+        antecedents, consequents = antecedents[significant], consequents[significant]
+        support, support_a, support_c = support[significant], support_a[significant], support_c[significant]
+        p_value = p_value[significant]
+
+    metrics = _rule_metrics(support, support_a, support_c)
+    if p_value is not None:
+        metrics["p_value"] = p_value
+
+    rules = RuleSet(antecedents, consequents, metrics, itemsets.labels, itemsets.n_transactions)
+    logger.info("Rule kernel: %d candidate rules -> %d (confidence >= %s, lift >= %s)",
+                candidates, len(rules), min_confidence, min_lift)
+    return rules
+
+
+def _rule_metrics(support: np.ndarray, support_a: np.ndarray, support_c: np.ndarray) -> Dict[str, np.ndarray]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        confidence = np.where(support_a > 0, support / support_a, 0.0)
+        lift = np.where(support_c > 0, confidence / support_c, 0.0)
+        leverage = support - support_a * support_c
+        conviction = np.where(confidence < 1.0, (1.0 - support_c) / (1.0 - confidence), np.inf)
+        denominator = np.maximum(support * (1 - support_a), support_a * (support_c - support))
+        zhangs_metric = np.where(denominator == 0, 0.0, leverage / denominator)
+
+    return {
+        "antecedent support": support_a,
+        "consequent support": support_c,
+        "support": support,
+        "confidence": confidence,
+        "lift": lift,
+        "leverage": leverage,
+        "conviction": conviction,
+        "zhangs_metric": zhangs_metric
+    }
+
+
+def reweight_rules(rules: RuleSet, itemsets: FrequentItemsets, itemset_support: np.ndarray) -> RuleSet:
+    """Recompute every rule metric from another support per itemset (e.g. time weighted).
+
+    The rules themselves are unchanged. The antecedent, the consequent and
+    their union are all frequent itemsets, so each support is a lookup.
+    """
+    if rules.empty:
+        return rules
+
+    # The rule's itemset: antecedent and consequent items merged into one sorted, -1 padded row
+    padding = np.iinfo(np.int32).max
+    union = np.hstack([rules.antecedents, rules.consequents])
+    union = np.sort(np.where(union >= 0, union, padding), axis=1)[:, :itemsets.items.shape[1]]
+    union = np.where(union == padding, -1, union).astype(np.int32)
+
+    metrics = _rule_metrics(itemset_support[itemsets.lookup(union)],
+                            itemset_support[itemsets.lookup(rules.antecedents)],
+                            itemset_support[itemsets.lookup(rules.consequents)])
+    if "p_value" in rules.metrics:
+        metrics["p_value"] = rules["p_value"]
+    return RuleSet(rules.antecedents, rules.consequents, metrics, rules.labels, rules.n_transactions)
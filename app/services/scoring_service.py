@@ -1,169 +1,159 @@
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
 import logging
+from app.utils.config import config
 
 logger = logging.getLogger(__name__)
 
+# Accepted column names per metric (mlxtend rule frames and recommendation frames)
+METRIC_COLUMNS = {
+    "confidence": ("confidence", "confidence_score"),
+    "lift": ("lift", "lift_score"),
+    "support": ("support", "support_score"),
+    "temporal_stability": ("temporal_stability",),
+    "temporal_trend": ("temporal_trend",)
+}
+
+# Defaults used when a metric column is missing
+METRIC_DEFAULTS = {"temporal_stability": 0.5, "temporal_trend": 0.0}
+
 class ScoringService:
-    def __init__(self):
-        self.scaler = MinMaxScaler()
-    
-    def calculate_composite_score(self, rules_df, method="weighted_product"):
-        """Calculate composite scores for association rules"""
-        
+    """Vectorized scoring engine for association rules.
+
+    Metrics are read as NumPy columns without copying the frame, min-max
+    normalized once per call, and scores are written back into the frame in
+    place. Weights come from ``Config`` unless overridden per call.
+    """
+
+    STANDARD_METHODS = ("weighted_product", "weighted_sum", "normalized_product")
+    TEMPORAL_METHODS = ("temporal_weighted", "temporal_trend_focused", "temporal_stability_focused")
+
+    def __init__(self, weights=None, temporal_weights=None, dtype=None):
+        self.dtype = np.dtype(dtype or config.SCORING_DTYPE)
+        self.weights = {
+            "confidence": config.SCORING_CONFIDENCE_WEIGHT,
+            "lift": config.SCORING_LIFT_WEIGHT,
+            "support": config.SCORING_SUPPORT_WEIGHT,
+            **(weights or {})
+        }
+        self.temporal_weights = {
+            "confidence": config.TEMPORAL_CONFIDENCE_WEIGHT,
+            "lift": config.TEMPORAL_LIFT_WEIGHT,
+            "support": config.TEMPORAL_SUPPORT_WEIGHT,
+            "temporal_stability": config.TEMPORAL_STABILITY_WEIGHT,
+            "temporal_trend": config.TEMPORAL_TREND_WEIGHT,
+            **(temporal_weights or {})
+        }
+
+    def calculate_composite_score(self, rules_df, method="weighted_product", weights=None):
+        """Calculate composite scores for association rules (written to `composite_score` in place)"""
+
         if rules_df.empty:
             return rules_df
-        
-        # Create a copy to avoid modifying original
-        scored_df = rules_df.copy()
-        
-        if method == "weighted_product":
-            return self._weighted_product_score(scored_df)
-        elif method == "weighted_sum":
-            return self._weighted_sum_score(scored_df)
-        elif method == "normalized_product":
-            return self._normalized_product_score(scored_df)
-        else:
+
+        if method not in self.STANDARD_METHODS:
             raise ValueError(f"Unknown scoring method: {method}")
-    
-    def calculate_temporal_composite_score(self, rules_df, method="temporal_weighted"):
-        """Calculate composite scores with temporal factors"""
-        
+
+        metrics = _Metrics(rules_df, self.dtype)
+        rules_df['composite_score'] = self._score(method, metrics, weights)
+
+        logger.info(f"Applied {method} scoring")
+        return rules_df
+
+    def calculate_temporal_composite_score(self, rules_df, method="temporal_weighted", weights=None):
+        """Calculate composite scores with temporal factors (written to `temporal_composite_score` in place)"""
+
         if rules_df.empty:
             return rules_df
-        
-        # Create a copy to avoid modifying original
-        scored_df = rules_df.copy()
-        
-        if method == "temporal_weighted":
-            return self._temporal_weighted_score(scored_df)
-        elif method == "temporal_trend_focused":
-            return self._temporal_trend_focused_score(scored_df)
-        elif method == "temporal_stability_focused":
-            return self._temporal_stability_focused_score(scored_df)
-        else:
+
+        if method not in self.TEMPORAL_METHODS:
             # Fallback to standard scoring
-            return self.calculate_composite_score(scored_df, "normalized_product")
-    
-    def _temporal_weighted_score(self, df, weights=None):
+            return self.calculate_composite_score(rules_df, "normalized_product")
+
+        metrics = _Metrics(rules_df, self.dtype)
+        rules_df['temporal_composite_score'] = self._score(method, metrics, weights)
+
+        logger.info(f"Applied {method} scoring")
+        return rules_df
+
+    def calculate_all_scores(self, rules_df, weights=None, temporal_weights=None):
+        """Compute every scoring method in one pass, writing `score_<method>` columns in place"""
+
+        if rules_df.empty:
+            return rules_df
+
+        metrics = _Metrics(rules_df, self.dtype)
+        for method in self.STANDARD_METHODS:
+            rules_df[f'score_{method}'] = self._score(method, metrics, weights)
+        for method in self.TEMPORAL_METHODS:
+            rules_df[f'score_{method}'] = self._score(method, metrics, temporal_weights)
+
+        logger.info("Applied all scoring methods")
+        return rules_df
+
+    def score(self, rules_df, method, weights=None):
+        """Return the scores of any standard or temporal method as an array"""
+        if method not in self.STANDARD_METHODS + self.TEMPORAL_METHODS:
+            raise ValueError(f"Unknown scoring method: {method}")
+        return self._score(method, _Metrics(rules_df, self.dtype), weights)
+
+    def _score(self, method, metrics, weights=None):
+        if method in self.TEMPORAL_METHODS:
+            weights = {**self.temporal_weights, **(weights or {})}
+        else:
+            weights = {**self.weights, **(weights or {})}
+        return getattr(self, f"_{method}_score")(metrics, weights)
+
+    def _temporal_weighted_score(self, m, weights):
         """Calculate temporal weighted composite score"""
-        if weights is None:
-            weights = {
-                "confidence": 0.25,
-                "lift": 0.25,
-                "support": 0.15,
-                "temporal_stability": 0.20,
-                "temporal_trend": 0.15
-            }
-        
-        # Ensure temporal columns exist
-        if 'temporal_stability' not in df.columns:
-            df['temporal_stability'] = 0.5
-        if 'temporal_trend' not in df.columns:
-            df['temporal_trend'] = 0.0
-        
-        # Normalize all metrics to 0-1 scale
-        metrics = ['confidence', 'lift', 'support', 'temporal_stability']
-        df[metrics] = self.scaler.fit_transform(df[metrics])
-        
-        # Normalize temporal trend from [-1,1] to [0,1]
-        df['temporal_trend_normalized'] = (df['temporal_trend'] + 1) / 2
-        
-        df['temporal_composite_score'] = (
-            df['confidence'] * weights['confidence'] +
-            df['lift'] * weights['lift'] +
-            df['support'] * weights['support'] +
-            df['temporal_stability'] * weights['temporal_stability'] +
-            df['temporal_trend_normalized'] * weights['temporal_trend']
+        # Temporal trend is mapped from [-1,1] to [0,1]; the other metrics are min-max normalized
+        trend = (m.raw('temporal_trend') + 1) / 2
+
+        return (
+            m.normalized('confidence') * weights['confidence'] +
+            m.normalized('lift') * weights['lift'] +
+            m.normalized('support') * weights['support'] +
+            m.normalized('temporal_stability') * weights['temporal_stability'] +
+            trend * weights['temporal_trend']
         )
-        
-        logger.info("Applied temporal weighted scoring")
-        return df
-    
-    def _temporal_trend_focused_score(self, df):
+
+    def _temporal_trend_focused_score(self, m, weights):
         """Score focusing on temporal trends (good for trending products)"""
-        if 'temporal_trend' not in df.columns:
-            df['temporal_trend'] = 0.0
-        
-        # Normalize base metrics
-        metrics = ['confidence', 'lift', 'support']
-        df[metrics] = self.scaler.fit_transform(df[metrics])
-        
-        # Base score
-        base_score = df['confidence'] * df['lift'] * df['support']
-        
+        base_score = m.normalized('confidence') * m.normalized('lift') * m.normalized('support')
+
         # Trend bonus (higher weight for positive trends)
-        trend_bonus = np.maximum(0, df['temporal_trend']) * 0.5
-        
-        df['temporal_composite_score'] = base_score + trend_bonus
-        
-        logger.info("Applied temporal trend-focused scoring")
-        return df
-    
-    def _temporal_stability_focused_score(self, df):
+        trend_bonus = np.maximum(0, m.raw('temporal_trend')) * 0.5
+
+        return base_score + trend_bonus
+
+    def _temporal_stability_focused_score(self, m, weights):
         """Score focusing on temporal stability (good for consistent patterns)"""
-        if 'temporal_stability' not in df.columns:
-            df['temporal_stability'] = 0.5
-        
-        # Normalize base metrics
-        metrics = ['confidence', 'lift', 'support', 'temporal_stability']
-        df[metrics] = self.scaler.fit_transform(df[metrics])
-        
-        # Weighted score with high emphasis on stability
-        df['temporal_composite_score'] = (
-            df['confidence'] * 0.3 +
-            df['lift'] * 0.3 +
-            df['support'] * 0.2 +
-            df['temporal_stability'] * 0.2
+        return (
+            m.normalized('confidence') * 0.3 +
+            m.normalized('lift') * 0.3 +
+            m.normalized('support') * 0.2 +
+            m.normalized('temporal_stability') * 0.2
         )
-        
-        logger.info("Applied temporal stability-focused scoring")
-        return df
-    
-    def _weighted_product_score(self, df, weights=None):
+
+    def _weighted_product_score(self, m, weights):
         """Calculate weighted product score"""
-        if weights is None:
-            weights = {"confidence": 0.4, "lift": 0.4, "support": 0.2}
-        
-        df['composite_score'] = (
-            (df['confidence'] ** weights['confidence']) *
-            (df['lift'] ** weights['lift']) *
-            (df['support'] ** weights['support'])
+        return (
+            np.power(m.raw('confidence'), weights['confidence']) *
+            np.power(m.raw('lift'), weights['lift']) *
+            np.power(m.raw('support'), weights['support'])
         )
-        
-        logger.info("Applied weighted product scoring")
-        return df
-    
-    def _weighted_sum_score(self, df, weights=None):
+
+    def _weighted_sum_score(self, m, weights):
         """Calculate weighted sum score"""
-        if weights is None:
-            weights = {"confidence": 0.4, "lift": 0.4, "support": 0.2}
-        
-        # Normalize metrics to 0-1 scale
-        metrics = ['confidence', 'lift', 'support']
-        df[metrics] = self.scaler.fit_transform(df[metrics])
-        
-        df['composite_score'] = (
-            df['confidence'] * weights['confidence'] +
-            df['lift'] * weights['lift'] +
-            df['support'] * weights['support']
+        return (
+            m.normalized('confidence') * weights['confidence'] +
+            m.normalized('lift') * weights['lift'] +
+            m.normalized('support') * weights['support']
         )
-        
-        logger.info("Applied weighted sum scoring")
-        return df
-    
-    def _normalized_product_score(self, df):
+
+    def _normalized_product_score(self, m, weights):
         """Calculate normalized product score"""
-        # Normalize metrics to 0-1 scale
-        metrics = ['confidence', 'lift', 'support']
-        df[metrics] = self.scaler.fit_transform(df[metrics])
-        
-        df['composite_score'] = df['confidence'] * df['lift'] * df['support']
-        
-        logger.info("Applied normalized product scoring")
-        return df
-    
+        return m.normalized('confidence') * m.normalized('lift') * m.normalized('support')
+
     def rank_recommendations(self, recommendations_df):
         """Add ranking to recommendations"""
         recommendations_df['recommendation_rank'] = (
@@ -171,5 +161,38 @@ class ScoringService:
             .rank(method='dense', ascending=False)
             .astype(int)
         )
-        
-        return recommendations_df
\ No newline at end of file
+
+        return recommendations_df
+
+class _Metrics:
+    """Lazily resolved metric columns with cached min-max normalization"""
+
+    def __init__(self, df, dtype):
+        self._df = df
+        self._dtype = dtype
+        self._raw = {}
+        self._normalized = {}
+
+    def raw(self, metric):
+        values = self._raw.get(metric)
+        if values is None:
+            column = next((c for c in METRIC_COLUMNS[metric] if c in self._df.columns), None)
+            if column is None:
+                if metric not in METRIC_DEFAULTS:
+                    raise KeyError(f"Missing metric column for {metric}")
+                values = np.full(len(self._df), METRIC_DEFAULTS[metric], dtype=self._dtype)
+            else:
+                values = self._df[column].to_numpy(dtype=self._dtype, copy=False)
+            self._raw[metric] = values
+        return values
+
+    def normalized(self, metric):
+        values = self._normalized.get(metric)
+        if values is None:
+            raw = self.raw(metric)
+            low = raw.min()
+            span = raw.max() - low
+            # Constant columns normalize to 0, matching MinMaxScaler
+            values = (raw - low) / span if span > 0 else np.zeros_like(raw)
+            self._normalized[metric] = values
+        return values
@@ -2,13 +2,17 @@
 Task Manager for tracking background job status
 """
 import uuid
+import json
 import time
 from enum import Enum
-from typing import Dict, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 import threading
 import logging
+from app.services.rule_export import remove_export
+from app.utils.profiling import remove_profile
+from app.utils.task_logs import remove_task_logs
 
 logger = logging.getLogger(__name__)
 
@@ -31,18 +35,45 @@ class TaskInfo:
     error: Optional[str] = None
     result: Optional[Any] = None
     metadata: Dict[str, Any] = None
+    version: int = 0
+    _snapshots: Dict[bool, Tuple[int, str]] = field(default_factory=dict, repr=False, compare=False)
 
-    def to_dict(self):
-        """Convert to dictionary for JSON serialization"""
-        data = asdict(self)
-        # Convert datetime objects to ISO strings
-        for key in ['created_at', 'started_at', 'completed_at']:
-            if data[key]:
-                data[key] = data[key].isoformat()
-        # Convert enum to string
-        data['status'] = data['status'].value
+    def touch(self):
+        """Bump the version so cached snapshots are rebuilt on the next read"""
+        self.version += 1
+
+    def to_dict(self, include_result: bool = True):
+        """Convert to dictionary for JSON serialization.
+
+        Builds a shallow dict instead of ``dataclasses.asdict`` so the result
+        payload (rules list, stats) is not deep-copied on every status read.
+        """
+        data = {
+            'task_id': self.task_id,
+            'status': self.status.value,
+            'progress': self.progress,
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'error': self.error,
+            'metadata': self.metadata,
+            'version': self.version
+        }
+        if include_result:
+            data['result'] = self.result
         return data
 
+    def to_json(self, include_result: bool = True) -> str:
+        """Return the serialized snapshot, rebuilding it only when the task changed"""
+        cached = self._snapshots.get(include_result)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+
+        payload = json.dumps(self.to_dict(include_result), default=str)
+        self._snapshots[include_result] = (self.version, payload)
+        return payload
+
 class TaskManager:
     """
     Singleton task manager for tracking background tasks
@@ -56,6 +87,7 @@ class TaskManager:
                 if cls._instance is None:
                     cls._instance = super(TaskManager, cls).__new__(cls)
                     cls._instance._tasks: Dict[str, TaskInfo] = {}
+                    cls._instance._finalizers: Dict[str, List[Callable[[], Optional[Dict[str, Any]]]]] = {}
                     cls._instance._lock = threading.Lock()
         return cls._instance
     
@@ -82,8 +114,40 @@ class TaskManager:
                 self._tasks[task_id].status = TaskStatus.RUNNING
                 self._tasks[task_id].started_at = datetime.now()
                 self._tasks[task_id].message = message
+                self._tasks[task_id].touch()
                 logger.info(f"Task started: {task_id}")
     
+    def add_finalizer(self, task_id: str, finalizer: Callable[[], Optional[Dict[str, Any]]]):
+        """Run `finalizer` just before the task completes or fails (in the calling thread).
+        
+        A returned dict is merged into the task metadata, so it is visible as
+        soon as the task reports a final status.
+        """
+        with self._lock:
+            self._finalizers.setdefault(task_id, []).append(finalizer)
+    
+    def run_finalizers(self, task_id: str):
+        """Run and discard the finalizers of a task (a no-op when there are none)"""
+        with self._lock:
+            finalizers = self._finalizers.pop(task_id, [])
+        
+        for finalizer in finalizers:
+            try:
+                values = finalizer()
+            except Exception as e:
+                logger.error(f"Task finalizer failed: {task_id} - {e}")
+                continue
+            if values:
+                self.update_metadata(task_id, values)
+    
+    def update_metadata(self, task_id: str, values: Dict[str, Any]):
+        """Merge values into the task metadata (a new dict, so published snapshots are never mutated)"""
+        with self._lock:
+            if task_id in self._tasks:
+                task = self._tasks[task_id]
+                task.metadata = {**(task.metadata or {}), **values}
+                task.touch()
+    
     def update_progress(self, task_id: str, progress: float, message: str = ""):
         """Update task progress (0.0 to 1.0)"""
         with self._lock:
@@ -91,10 +155,12 @@ class TaskManager:
                 self._tasks[task_id].progress = max(0.0, min(1.0, progress))
                 if message:
                     self._tasks[task_id].message = message
-                logger.debug(f"Task progress: {task_id} - {progress:.1%}")
+                self._tasks[task_id].touch()
+                logger.debug("Task progress: %s - %.1f%%", task_id, progress * 100)
     
     def complete_task(self, task_id: str, result: Any = None, message: str = "Task completed"):
         """Mark task as completed"""
+        self.run_finalizers(task_id)
         with self._lock:
             if task_id in self._tasks:
                 self._tasks[task_id].status = TaskStatus.COMPLETED
@@ -102,16 +168,19 @@ class TaskManager:
                 self._tasks[task_id].progress = 1.0
                 self._tasks[task_id].message = message
                 self._tasks[task_id].result = result
+                self._tasks[task_id].touch()
                 logger.info(f"Task completed: {task_id}")
     
     def fail_task(self, task_id: str, error: str, message: str = "Task failed"):
         """Mark task as failed"""
+        self.run_finalizers(task_id)
         with self._lock:
             if task_id in self._tasks:
                 self._tasks[task_id].status = TaskStatus.FAILED
                 self._tasks[task_id].completed_at = datetime.now()
                 self._tasks[task_id].error = error
                 self._tasks[task_id].message = message
+                self._tasks[task_id].touch()
                 logger.error(f"Task failed: {task_id} - {error}")
     
     def get_task(self, task_id: str) -> Optional[TaskInfo]:
@@ -119,6 +188,24 @@ class TaskManager:
         with self._lock:
             return self._tasks.get(task_id)
     
+    def get_task_json(self, task_id: str, include_result: bool = True) -> Optional[Tuple[int, str]]:
+        """Get the cached JSON snapshot of a task as (version, payload)"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            return task.version, task.to_json(include_result)
+    
+    def get_tasks_json(self, include_result: bool = True, status: Optional[TaskStatus] = None) -> Tuple[int, str]:
+        """Get cached JSON snapshots of all tasks (optionally filtered by status) as (count, payload)"""
+        with self._lock:
+            snapshots = [
+                task.to_json(include_result)
+                for task in self._tasks.values()
+                if status is None or task.status == status
+            ]
+        return len(snapshots), "[" + ",".join(snapshots) + "]"
+    
     def get_all_tasks(self) -> Dict[str, TaskInfo]:
         """Get all tasks"""
         with self._lock:
@@ -145,6 +232,10 @@ class TaskManager:
             
             for task_id in to_remove:
                 del self._tasks[task_id]
+                self._finalizers.pop(task_id, None)
+                remove_task_logs(task_id)
+                remove_export(task_id)
+                remove_profile(task_id)
                 logger.info(f"Cleaned up old task: {task_id}")
     
     def cancel_task(self, task_id: str):
@@ -154,6 +245,7 @@ class TaskManager:
                 self._tasks[task_id].status = TaskStatus.CANCELLED
                 self._tasks[task_id].completed_at = datetime.now()
                 self._tasks[task_id].message = "Task cancelled"
+                self._tasks[task_id].touch()
                 logger.info(f"Task cancelled: {task_id}")
 
 # Global task manager instance
@@ -0,0 +1,98 @@
+"""
+Multi-threshold sweeps over one set of frequent itemsets.
+
+Itemsets are mined once at the lowest support of the grid and rules are
+generated once at its lowest confidence and lift. Every other (support,
+confidence, lift) combination selects a subset of those rules: a rule's
+support is that of its itemset, and all subsets of a frequent itemset are
+frequent at that support too. Each grid cell is therefore a mask over the
+same rule arrays. It reports rule and recommendation counts (top
+``max_recommendations`` per item, as a mining run would keep), SKU and order
+coverage, and the distribution of the default ``confidence * lift`` score.
+"""
+import logging
+from itertools import product
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.mining_engine import BasketMatrix
+from app.services.rule_kernel import FrequentItemsets, generate_rules, reweight_rules
+
+logger = logging.getLogger(__name__)
+
+SCORE_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def _score_summary(scores: np.ndarray) -> Dict:
+    if scores.size == 0:
+        return None
+    quantiles = np.quantile(scores, SCORE_QUANTILES)
+    summary = {"min": float(scores.min()), "mean": float(scores.mean()), "max": float(scores.max())}
+    summary.update({f"p{int(q * 100)}": float(value) for q, value in zip(SCORE_QUANTILES, quantiles)})
+    return summary
+
+
+def sweep_thresholds(basket: BasketMatrix, itemsets: FrequentItemsets, supports: Sequence[float],
+                     confidences: Sequence[float], lifts: Sequence[float], max_recommendations: int,
+                     support_mined: float, itemset_support: Optional[np.ndarray] = None) -> List[Dict]:
+    """Statistics of every (support, confidence, lift) combination from one rule generation pass.
+
+    Cells below `support_mined` (the support the itemsets were mined at)
+    cannot be derived and are returned with ``available: false``.
+    Thresholds apply to plain order counts, as in a mining run; with
+    `itemset_support` (time-weighted support per itemset) the scores use the
+    weighted metrics.
+    """
+    rules = generate_rules(itemsets, min_confidence=min(confidences), min_lift=min(lifts))
+    antecedents, consequents, rule_positions = rules.pairs()
+    support = rules["support"][rule_positions]
+    confidence = rules["confidence"][rule_positions]
+    lift = rules["lift"][rule_positions]
+    if itemset_support is not None:
+        weighted = reweight_rules(rules, itemsets, itemset_support)
+        score = (weighted["confidence"] * weighted["lift"])[rule_positions]
+    else:
+        score = confidence * lift
+
+    # Recommendations grouped by main item, best score first (the order rank is computed in)
+    order = np.lexsort((-score, antecedents))
+    antecedents, consequents, rule_positions = antecedents[order], consequents[order], rule_positions[order]
+    support, confidence, lift, score = support[order], confidence[order], lift[order], score[order]
+
+    columns = basket.matrix.tocsc()
+    n_orders, n_items = len(basket), basket.n_items
+    cells = []
+    for min_support, min_confidence, min_lift in product(sorted(supports), sorted(confidences), sorted(lifts)):
+        cell = {"min_support": min_support, "min_confidence": min_confidence, "min_lift": min_lift,
+                "available": min_support >= support_mined * (1 - 1e-9)}
+        if not cell["available"]:
+            cells.append(cell)
+            continue
+
+        keep = (support >= min_support) & (confidence >= min_confidence) & (lift >= min_lift)
+        main, kept_score = antecedents[keep], score[keep]
+
+        # Dense rank of the score within each main item, as in _create_recommendations
+        top = np.zeros(main.size, dtype=bool)
+        if main.size:
+            new_item = np.r_[True, main[1:] != main[:-1]]
+            value_index = np.cumsum(new_item | np.r_[True, kept_score[1:] != kept_score[:-1]])
+            rank = value_index - np.maximum.accumulate(np.where(new_item, value_index, 0)) + 1
+            top = rank <= max_recommendations
+
+        covered = np.unique(main[top])
+        covered_orders = columns[:, covered].getnnz(axis=1) > 0 if covered.size else np.zeros(n_orders, dtype=bool)
+        cell.update({
+            "rules": int(np.unique(rule_positions[keep]).size),
+            "recommendations": int(top.sum()),
+            "items_covered": int(covered.size),
+            "item_coverage": round(covered.size / n_items, 4) if n_items else 0.0,
+            "order_coverage": round(float(covered_orders.mean()), 4) if n_orders else 0.0,
+            "score": _score_summary(kept_score[top])
+        })
+        cells.append(cell)
+
+    logger.info("Threshold sweep: %d cells from %d rules (%d itemsets at support %s)",
+                len(cells), len(rules), len(itemsets), support_mined)
+    return cells
@@ -0,0 +1,131 @@
+"""
+Vectorized time weighting kernels.
+
+Order dates are reduced to an int16 ``days_ago`` array once (per order line or
+per order). Each method then builds a weight lookup table with one entry per
+day offset and gathers it, so no datetime arithmetic happens per row. The
+mining pipeline weights every order by its day and recomputes rule support,
+confidence and lift from the weighted counts (``none`` keeps plain counts).
+"""
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+TIME_WEIGHTING_METHODS = (
+    "none",
+    "exponential_decay",
+    "linear_decay",
+    "seasonal_patterns",
+    "recency_frequency",
+    "trend_adaptive"
+)
+
+MAX_DAYS_AGO = np.iinfo(np.int16).max
+
+
+def days_ago_array(order_dates) -> np.ndarray:
+    """Days between each order date and the most recent one, as int16.
+
+    Dates are factorized first so the date arithmetic runs once per distinct
+    day rather than once per order line.
+    """
+    codes, unique_dates = pd.factorize(pd.Series(order_dates), sort=False)
+    if len(unique_dates) == 0:
+        return np.zeros(len(codes), dtype=np.int16)
+
+    days = pd.to_datetime(unique_dates).to_numpy().astype("datetime64[D]").astype(np.int64)
+    offsets = np.clip(days.max() - days, 0, MAX_DAYS_AGO).astype(np.int16)
+    return offsets[codes]
+
+
+def rebase_days_ago(days_ago) -> np.ndarray:
+    """Shift day offsets from the database (relative to today) so the most recent order is day 0"""
+    days_ago = np.asarray(days_ago, dtype=np.int64)
+    if days_ago.size == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.clip(days_ago - days_ago.min(), 0, MAX_DAYS_AGO).astype(np.int16)
+
+
+def _exponential(days: np.ndarray, decay_rate: float) -> np.ndarray:
+    return np.exp(-decay_rate * days)
+
+
+def _uniform_table(days, counts, decay_rate):
+    """Every day weighs 1"""
+    return np.ones(days.size)
+
+
+def _exponential_decay_table(days, counts, decay_rate):
+    """w(d) = exp(-rate * d)"""
+    return _exponential(days, decay_rate)
+
+
+def _linear_decay_table(days, counts, decay_rate):
+    """Weight falls linearly from 1 today towards 0 just beyond the oldest day"""
+    return 1.0 - days / (days.size + 1.0)
+
+
+def _seasonal_patterns_table(days, counts, decay_rate):
+    """Exponential decay modulated by a cycle that peaks on days in phase with today (weekly by default)"""
+    amplitude = config.SEASONAL_AMPLITUDE
+    cycle = 1.0 + amplitude * np.cos(2 * np.pi * days / config.SEASONAL_PERIOD_DAYS)
+    return _exponential(days, decay_rate) * cycle / (1.0 + amplitude)
+
+
+def _recency_frequency_table(days, counts, decay_rate):
+    """Exponential decay scaled by each day's volume relative to the busiest day"""
+    frequency = np.sqrt(counts / counts.max()) if counts.max() > 0 else np.ones(days.size)
+    return _exponential(days, decay_rate) * frequency
+
+
+def _trend_adaptive_table(days, counts, decay_rate):
+    """Exponential decay whose rate follows the volume trend: steeper when demand is growing"""
+    active = counts > 0
+    if active.sum() < 2 or counts.mean() == 0:
+        return _exponential(days, decay_rate)
+
+    # Least-squares slope of daily volume against days ago, relative to mean volume over the horizon
+    x = days[active]
+    y = counts[active]
+    slope = np.polyfit(x, y, 1)[0]
+    relative_change = -slope * days.size / counts.mean()
+    adapted_rate = decay_rate * float(np.clip(1.0 + relative_change, 0.5, 2.0))
+    logger.info("Trend adaptive weighting: relative volume change %.3f, decay rate %.4f", relative_change, adapted_rate)
+    return _exponential(days, adapted_rate)
+
+
+_TABLES = {
+    "none": _uniform_table,
+    "exponential_decay": _exponential_decay_table,
+    "linear_decay": _linear_decay_table,
+    "seasonal_patterns": _seasonal_patterns_table,
+    "recency_frequency": _recency_frequency_table,
+    "trend_adaptive": _trend_adaptive_table
+}
+
+
+def time_weight_table(days_ago: np.ndarray, method: str = "exponential_decay",
+                      decay_rate: Optional[float] = None) -> np.ndarray:
+    """Weight lookup table indexed by day offset (0 = most recent day)"""
+    if method not in _TABLES:
+        raise ValueError(f"Unknown time weighting method: {method}")
+
+    decay_rate = config.DECAY_RATE if decay_rate is None else decay_rate
+    counts = np.bincount(days_ago, minlength=1).astype(np.float64)
+    days = np.arange(counts.size, dtype=np.float64)
+    return _TABLES[method](days, counts, decay_rate)
+
+
+def time_weights(days_ago: np.ndarray, method: str = "exponential_decay",
+                 decay_rate: Optional[float] = None) -> np.ndarray:
+    """Per-row weights for an int16 days_ago array"""
+    days_ago = np.asarray(days_ago, dtype=np.int16)
+    if days_ago.size == 0:
+        return np.zeros(0)
+    return time_weight_table(days_ago, method, decay_rate)[days_ago]
@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Config:
     # Database Configuration
     DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -10,6 +12,13 @@ class Config:
     DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
     DB_NAME = os.getenv("DB_NAME", "neo")
     
+    # Pooled connections (app/database/pool.py), keyed by host, user and database
+    DB_POOL_MAX_PER_KEY = int(os.getenv("DB_POOL_MAX_PER_KEY", "4"))
+    DB_POOL_MAX_TOTAL = int(os.getenv("DB_POOL_MAX_TOTAL", "32"))
+    DB_POOL_IDLE_SECONDS = float(os.getenv("DB_POOL_IDLE_SECONDS", "300"))  # Idle connections are closed after this
+    DB_POOL_WAIT_SECONDS = float(os.getenv("DB_POOL_WAIT_SECONDS", "10"))  # Wait for a free connection before failing
+    DB_POOL_CONNECT_TIMEOUT = int(os.getenv("DB_POOL_CONNECT_TIMEOUT", "10"))
+    
     # Source tables (where to read data from)
     ORDER_TABLE = os.getenv("ORDER_TABLE", "wms_to_wcs_order_line_request_data")
     SKU_MASTER_TABLE = os.getenv("SKU_MASTER_TABLE", "sku_master")
@@ -23,14 +32,39 @@ class Config:
     MIN_LIFT = float(os.getenv("MIN_LIFT", "1.0"))
     MAX_RECOMMENDATIONS = int(os.getenv("MAX_RECOMMENDATIONS", "3"))
     
+    # Significance pruning of rules (none, fisher, chi2) with multiple-testing correction (none, bonferroni, bh)
+    SIGNIFICANCE_TEST = os.getenv("SIGNIFICANCE_TEST", "none")
+    SIGNIFICANCE_ALPHA = float(os.getenv("SIGNIFICANCE_ALPHA", "0.05"))
+    SIGNIFICANCE_CORRECTION = os.getenv("SIGNIFICANCE_CORRECTION", "bh")
+    
     # Time-based weighting
     DECAY_RATE = float(os.getenv("DECAY_RATE", "0.05"))
+    SEASONAL_PERIOD_DAYS = float(os.getenv("SEASONAL_PERIOD_DAYS", "7"))
+    SEASONAL_AMPLITUDE = float(os.getenv("SEASONAL_AMPLITUDE", "0.5"))
     
     # Enhanced time-based modeling settings
     DEFAULT_TIME_WEIGHTING_METHOD = os.getenv("DEFAULT_TIME_WEIGHTING_METHOD", "exponential_decay")
     DEFAULT_TIME_SEGMENTATION = os.getenv("DEFAULT_TIME_SEGMENTATION", "weekly")
     USE_ENHANCED_MINING = os.getenv("USE_ENHANCED_MINING", "true").lower() == "true"
     
+    # Parallel per-segment mining (segments grouped into partitions of at least MINING_MIN_PARTITION_ORDERS orders)
+    PARALLEL_MINING = os.getenv("PARALLEL_MINING", "false").lower() == "true"
+    MINING_WORKERS = int(os.getenv("MINING_WORKERS", "0"))  # 0 = one per CPU core
+    MINING_MIN_PARTITION_ORDERS = int(os.getenv("MINING_MIN_PARTITION_ORDERS", "1000"))
+    
+    # Progressive mining: supports from PROGRESSIVE_START_SUPPORT down to the target, multiplied by the factor per level
+    PROGRESSIVE_MINING = os.getenv("PROGRESSIVE_MINING", "false").lower() == "true"
+    PROGRESSIVE_START_SUPPORT = float(os.getenv("PROGRESSIVE_START_SUPPORT", "0.2"))
+    PROGRESSIVE_SUPPORT_FACTOR = float(os.getenv("PROGRESSIVE_SUPPORT_FACTOR", "0.5"))
+    
+    # Pre-flight cost budgets: runs estimated over budget are logged, downgraded to a higher support or rejected (off, warn, downgrade, reject)
+    MINING_BUDGET_ACTION = os.getenv("MINING_BUDGET_ACTION", "warn")
+    MINING_BUDGET_SECONDS = float(os.getenv("MINING_BUDGET_SECONDS", "300"))
+    MINING_BUDGET_RSS_MB = float(os.getenv("MINING_BUDGET_RSS_MB", "4096"))
+    MINING_BUDGET_ITEMSETS = int(os.getenv("MINING_BUDGET_ITEMSETS", "100000"))
+    MINING_ESTIMATE_SAMPLE_ORDERS = int(os.getenv("MINING_ESTIMATE_SAMPLE_ORDERS", "5000"))  # 0 = aggregates only
+    MINING_COST_SCALE = float(os.getenv("MINING_COST_SCALE", "1.0"))  # >1 on slower hardware
+    
     # Temporal scoring weights
     TEMPORAL_CONFIDENCE_WEIGHT = float(os.getenv("TEMPORAL_CONFIDENCE_WEIGHT", "0.25"))
     TEMPORAL_LIFT_WEIGHT = float(os.getenv("TEMPORAL_LIFT_WEIGHT", "0.25"))
@@ -38,9 +72,65 @@ class Config:
     TEMPORAL_STABILITY_WEIGHT = float(os.getenv("TEMPORAL_STABILITY_WEIGHT", "0.20"))
     TEMPORAL_TREND_WEIGHT = float(os.getenv("TEMPORAL_TREND_WEIGHT", "0.15"))
     
+    # Standard scoring weights and numeric precision (float64 or float32)
+    SCORING_CONFIDENCE_WEIGHT = float(os.getenv("SCORING_CONFIDENCE_WEIGHT", "0.4"))
+    SCORING_LIFT_WEIGHT = float(os.getenv("SCORING_LIFT_WEIGHT", "0.4"))
+    SCORING_SUPPORT_WEIGHT = float(os.getenv("SCORING_SUPPORT_WEIGHT", "0.2"))
+    SCORING_DTYPE = os.getenv("SCORING_DTYPE", "float64")
+    
+    # Recommendation serving (in-memory index)
+    RECOMMENDATION_INDEX_TOP_N = int(os.getenv("RECOMMENDATION_INDEX_TOP_N", "50"))
+    RECOMMENDATION_INDEX_TTL_SECONDS = int(os.getenv("RECOMMENDATION_INDEX_TTL_SECONDS", "300"))  # 0 disables background refresh
+    RECOMMENDATION_INDEX_RETRY_SECONDS = int(os.getenv("RECOMMENDATION_INDEX_RETRY_SECONDS", "30"))
+    RECOMMENDATION_BATCH_MAX_ITEMS = int(os.getenv("RECOMMENDATION_BATCH_MAX_ITEMS", "5000"))
+    
+    # Shared artifacts (memory-mapped recommendation models, etc.)
+    ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(PROJECT_ROOT, "artifacts"))
+    RECOMMENDATION_ARTIFACTS_ENABLED = os.getenv("RECOMMENDATION_ARTIFACTS_ENABLED", "true").lower() == "true"
+    RECOMMENDATION_ARTIFACT_SCORE_DTYPE = os.getenv("RECOMMENDATION_ARTIFACT_SCORE_DTYPE", "float32")  # float32, float16
+    RECOMMENDATION_ARTIFACT_CHECK_SECONDS = float(os.getenv("RECOMMENDATION_ARTIFACT_CHECK_SECONDS", "1.0"))
+    
+    # Rule exports (ARTIFACT_DIR/exports/<export_id>): CSV stored per run, gzip / Parquet converted on demand
+    EXPORT_TTL_SECONDS = int(os.getenv("EXPORT_TTL_SECONDS", "86400"))
+    EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "100000"))  # Rows per write / Parquet row group
+    EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+    
+    # Frequent itemsets of each run (ARTIFACT_DIR/itemsets), reused by reruns and threshold tuning
+    ITEMSET_CACHE_ENABLED = os.getenv("ITEMSET_CACHE_ENABLED", "true").lower() == "true"
+    ITEMSET_CACHE_MAX_FILES = int(os.getenv("ITEMSET_CACHE_MAX_FILES", "20"))
+    ITEMSET_CACHE_LOADED = int(os.getenv("ITEMSET_CACHE_LOADED", "4"))  # Artifacts kept in memory
+    SWEEP_MAX_CELLS = int(os.getenv("SWEEP_MAX_CELLS", "1000"))  # Grid size limit of /mine-rules/sweep
+    
+    # Per-task profiling (MiningRequest.profile); artifacts under ARTIFACT_DIR/profiles/<task_id>
+    PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "40"))  # Functions / allocation sites in the reports
+    PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "5"))
+    
+    # Logging: records are written by a background thread unless LOG_ASYNC=false
+    LOG_DIR = os.getenv("LOG_DIR", os.path.join(PROJECT_ROOT, "logs"))
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # Level of the app.services / app.api / app.database loggers
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # Per-logger overrides, e.g. "app.services=DEBUG,app.database=WARNING"
+    TASK_LOGS_DIR = os.getenv("TASK_LOGS_DIR", os.path.join(PROJECT_ROOT, "logs", "tasks"))  # Per-task JSON lines logs
+    TASK_LOG_LEVEL = os.getenv("TASK_LOG_LEVEL", "INFO")
+    TASK_LOG_READ_LIMIT = int(os.getenv("TASK_LOG_READ_LIMIT", "2000"))  # Max entries per task log read
+    
+    # Live log view: per-client offsets into the newest log files
+    LOG_TAIL_BYTES = int(os.getenv("LOG_TAIL_BYTES", "65536"))  # Read by a new client from the end of each file
+    LOG_TAIL_MAX_READ_BYTES = int(os.getenv("LOG_TAIL_MAX_READ_BYTES", "1048576"))  # Per file and poll
+    LOG_TAIL_MAX_CLIENTS = int(os.getenv("LOG_TAIL_MAX_CLIENTS", "64"))
+    LOG_TAIL_IDLE_SECONDS = int(os.getenv("LOG_TAIL_IDLE_SECONDS", "600"))  # Offsets of idle clients are dropped
+    LOG_STREAM_INTERVAL_SECONDS = float(os.getenv("LOG_STREAM_INTERVAL_SECONDS", "1.0"))  # SSE poll interval
+    
+    # Flask dashboard: tracked mining tasks and API server calls
+    FLASK_TRACKED_TASKS = int(os.getenv("FLASK_TRACKED_TASKS", "256"))  # Least recently polled tasks are dropped
+    FLASK_STATUS_CACHE_SECONDS = float(os.getenv("FLASK_STATUS_CACHE_SECONDS", "1.0"))  # Shared by all pollers of a task
+    FLASK_API_POOL_SIZE = int(os.getenv("FLASK_API_POOL_SIZE", "16"))  # Keep-alive connections to the API server
+    FLASK_DB_SESSIONS = int(os.getenv("FLASK_DB_SESSIONS", "256"))  # Browser sessions with their own database configuration
+    
     # API Configuration
     API_TITLE = "Association Rule Mining API"
     API_VERSION = "1.0.0"
     API_DESCRIPTION = "Production-ready association rule mining system with temporal analysis"
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
 
 config = Config()
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Incremental tailing of the component log files for the live log views.
+
+Each client keeps a byte offset (and inode) per log file, so a poll only reads
+the bytes appended since that client's previous poll. A new client starts from
+the last ``LOG_TAIL_BYTES`` of each file instead of reading it whole. When
+RotatingFileHandler rolls a file over, the rest of the old file is read from
+``<name>.1`` before continuing at the start of the new one.
+"""
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.config import config
+
+# Component logs shown in the live view (see logger_config.setup_detailed_logging)
+LIVE_LOG_KINDS = ("mining_detailed", "api_detailed", "performance")
+LIVE_LOG_LEVELS = ("INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+def parse_log_line(line: str, source: str) -> Optional[Dict]:
+    """Parse 'timestamp | level | logger:line | function() | message', or None for other lines"""
+    parts = line.rstrip("\n").split(" | ")
+    if len(parts) < 4:
+        return None
+    return {
+        "timestamp": parts[0],
+        "level": parts[1].strip(),
+        "logger": parts[2],
+        "message": " | ".join(parts[3:]),
+        "source": source
+    }
+
+
+class _FileCursor:
+    """Read position of one client in one log file"""
+
+    def __init__(self, path: str, inode: int, offset: int):
+        self.path = path
+        self.inode = inode
+        self.offset = offset
+
+
+class _ClientState:
+    def __init__(self):
+        self.cursors: Dict[str, _FileCursor] = {}
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+
+
+class LogTailer:
+    """Per-client incremental reader of the newest log file of each kind"""
+
+    def __init__(self, logs_dir: str, kinds=LIVE_LOG_KINDS, tail_bytes: int = None, max_read_bytes: int = None,
+                 max_clients: int = None, idle_seconds: float = None):
+        self.logs_dir = logs_dir
+        self.kinds = kinds
+        self.tail_bytes = tail_bytes if tail_bytes is not None else config.LOG_TAIL_BYTES
+        self.max_read_bytes = max_read_bytes if max_read_bytes is not None else config.LOG_TAIL_MAX_READ_BYTES
+        self.max_clients = max_clients if max_clients is not None else config.LOG_TAIL_MAX_CLIENTS
+        self.idle_seconds = idle_seconds if idle_seconds is not None else config.LOG_TAIL_IDLE_SECONDS
+        self._clients: "OrderedDict[str, _ClientState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def current_files(self) -> List[str]:
+        """Newest file of each kind (a new one is started on every logging setup)"""
+        files = []
+        for kind in self.kinds:
+            candidates = glob.glob(os.path.join(self.logs_dir, f"{kind}_*.log"))
+            if candidates:
+                files.append(max(candidates, key=_mtime))
+        return files
+
+    def poll(self, client_id: Optional[str] = None) -> List[Dict]:
+        """Entries appended since this client's last poll, oldest first.
+
+        A new (or anonymous) client gets the entries in the last `tail_bytes`
+        of each file.
+        """
+        if client_id is None:
+            return self._read(_ClientState())
+        state = self._client(client_id)
+        with state.lock:
+            return self._read(state)
+
+    def _client(self, client_id: str) -> _ClientState:
+        now = time.monotonic()
+        with self._lock:
+            state = self._clients.pop(client_id, None) or _ClientState()
+            state.last_seen = now
+            self._clients[client_id] = state
+            # Forget clients that stopped polling, and the least recent ones over the limit
+            while self._clients:
+                oldest_id, oldest = next(iter(self._clients.items()))
+                if len(self._clients) <= self.max_clients and now - oldest.last_seen < self.idle_seconds:
+                    break
+                del self._clients[oldest_id]
+            return state
+
+    def _read(self, state: _ClientState) -> List[Dict]:
+        is_new = not state.cursors
+        entries = []
+        files = self.current_files()
+        for path in files:
+            cursor = state.cursors.get(path)
+            if cursor is None:
+                # Files that appear after the first poll are new and read from the start
+                cursor = self._open_cursor(path, from_tail=is_new)
+                if cursor is None:
+                    continue
+                state.cursors[path] = cursor
+            entries.extend(self._read_file(cursor))
+        # Stop tracking files that were replaced by a newer one
+        for path in list(state.cursors):
+            if path not in files:
+                del state.cursors[path]
+        entries.sort(key=lambda entry: entry["timestamp"])
+        return entries
+
+    def _open_cursor(self, path: str, from_tail: bool) -> Optional[_FileCursor]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        offset = max(stat.st_size - self.tail_bytes, 0) if from_tail else 0
+        cursor = _FileCursor(path, stat.st_ino, offset)
+        if offset:
+            # Start at the first complete line inside the tail window
+            with open(path, "rb") as f:
+                f.seek(offset)
+                cursor.offset += len(f.readline())
+        return cursor
+
+    def _read_file(self, cursor: _FileCursor) -> List[Dict]:
+        try:
+            stat = os.stat(cursor.path)
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        if stat.st_ino != cursor.inode:
+            # Rotated: finish the old file (now <name>.1) if it is still there, then start over
+            rotated = cursor.path + ".1"
+            try:
+                if os.stat(rotated).st_ino == cursor.inode:
+                    entries.extend(self._read_from(rotated, cursor))
+            except FileNotFoundError:
+                pass
+            cursor.inode = stat.st_ino
+            cursor.offset = 0
+        elif stat.st_size < cursor.offset:
+            # Truncated in place
+            cursor.offset = 0
+
+        if stat.st_size > cursor.offset:
+            entries.extend(self._read_from(cursor.path, cursor))
+        return entries
+
+    def _read_from(self, path: str, cursor: _FileCursor) -> List[Dict]:
+        """Parse the complete lines after the cursor (at most max_read_bytes) and advance it"""
+        with open(path, "rb") as f:
+            f.seek(cursor.offset)
+            data = f.read(self.max_read_bytes)
+        end = data.rfind(b"\n") + 1
+        if not end:
+            if len(data) < self.max_read_bytes:
+                return []  # Partial line still being written
+            end = len(data)  # A single line longer than a read; skip it
+        cursor.offset += end
+
+        source = os.path.basename(cursor.path)
+        entries = []
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            entry = parse_log_line(line, source)
+            if entry is None:
+                # Continuation line (e.g. a traceback) of the previous record
+                if entries and line:
+                    entries[-1]["message"] += "\n" + line
+                continue
+            entries.append(entry)
+        return [entry for entry in entries if entry["level"] in LIVE_LOG_LEVELS]
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
@@ -2,16 +2,101 @@
 Enhanced Logging Configuration for Association Mining System
 """
 
+import atexit
 import logging
 import os
+import queue
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from app.utils.config import config
+from app.utils.task_logs import TaskContextFilter, TaskLogHandler
 
-def setup_detailed_logging():
-    """Setup detailed logging for mining operations"""
+# Handlers written by the background listener thread, keyed by logger name prefix
+LOG_ROUTES = {
+    'app.services': 'mining',
+    'app.api': 'api',
+    'app.database': 'database',
+    'performance': 'performance'
+}
+
+_listener = None
+
+class _RoutingHandler(logging.Handler):
+    """Sends each record to the console and to the log file of its component (runs on the listener thread)"""
+    
+    def __init__(self, console, files):
+        super().__init__()
+        self.console = console
+        self.files = files
+    
+    def handle(self, record):
+        if record.levelno >= self.console.level:
+            self.console.handle(record)
+        for prefix, handler in self.files.items():
+            if (record.name == prefix or record.name.startswith(prefix + '.')) and record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+    
+    def flush(self):
+        self.console.flush()
+        for handler in self.files.values():
+            handler.flush()
+    
+    def close(self):
+        for handler in [self.console, *self.files.values()]:
+            handler.close()
+        super().close()
+
+class _LightQueueHandler(QueueHandler):
+    """Queue handler that only merges the message arguments on the calling thread.
+    
+    The stock handler fully formats and copies every record before queueing it;
+    here formatting is left to the listener's handlers.
+    """
+    
+    _exception_formatter = logging.Formatter()
+    
+    def prepare(self, record):
+        # Args may be mutated after the call returns, so merge them now
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # Tracebacks keep frames alive; render them before handing the record over
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def parse_log_levels(spec):
+    """Parse "logger=LEVEL,logger=LEVEL" into {logger: level}"""
+    levels = {}
+    for entry in (spec or '').split(','):
+        if '=' not in entry:
+            continue
+        name, level = (part.strip() for part in entry.split('=', 1))
+        levels[name] = logging.getLevelName(level.upper()) if not level.isdigit() else int(level)
+        if not isinstance(levels[name], int):
+            raise ValueError(f"Unknown log level for {name}: {level}")
+    return levels
+
+def setup_detailed_logging(logs_dir=None, asynchronous=None, level=None, levels=None):
+    """Setup detailed logging for mining operations.
+    
+    Records are put on a queue by the calling thread and formatted and
+    written by a single background listener thread (set LOG_ASYNC=false to
+    write synchronously). Records logged inside a task context are also
+    appended to that task's JSON lines log. LOG_LEVEL sets the level of the
+    application loggers and LOG_LEVELS overrides it per logger, e.g.
+    "app.services=DEBUG".
+    """
+    global _listener
+    
+    asynchronous = config.LOG_ASYNC if asynchronous is None else asynchronous
+    level = logging.getLevelName((level or config.LOG_LEVEL).upper())
+    levels = parse_log_levels(config.LOG_LEVELS) if levels is None else levels
     
     # Create logs directory
-    logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
+    logs_dir = logs_dir or config.LOG_DIR
     os.makedirs(logs_dir, exist_ok=True)
     
     # Create timestamp for session
@@ -25,13 +110,21 @@ def setup_detailed_logging():
         'performance': os.path.join(logs_dir, f'performance_{timestamp}.log')
     }
     
+    # Stop a previous listener (flushing its queue) before replacing the handlers
+    stop_logging()
+    
     # Configure root logger
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)
+    root_logger.setLevel(level)
     
     # Clear existing handlers
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+        handler.close()
+    for prefix in LOG_ROUTES:
+        for handler in logging.getLogger(prefix).handlers[:]:
+            logging.getLogger(prefix).removeHandler(handler)
+            handler.close()
     
     # Create formatters
     detailed_formatter = logging.Formatter(
@@ -48,98 +141,90 @@ def setup_detailed_logging():
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
-    root_logger.addHandler(console_handler)
-    
-    # File handlers for different components
-    handlers = {}
-    
-    # Mining operations detailed log
-    mining_handler = RotatingFileHandler(
-        log_files['mining'], 
-        maxBytes=50*1024*1024,  # 50MB
-        backupCount=5
-    )
-    mining_handler.setLevel(logging.DEBUG)
-    mining_handler.setFormatter(detailed_formatter)
-    
-    # API operations log
-    api_handler = RotatingFileHandler(
-        log_files['api'],
-        maxBytes=20*1024*1024,  # 20MB
-        backupCount=3
-    )
-    api_handler.setLevel(logging.DEBUG)
-    api_handler.setFormatter(detailed_formatter)
-    
-    # Database operations log
-    db_handler = RotatingFileHandler(
-        log_files['database'],
-        maxBytes=20*1024*1024,  # 20MB
-        backupCount=3
-    )
-    db_handler.setLevel(logging.DEBUG)
-    db_handler.setFormatter(detailed_formatter)
-    
-    # Performance log
-    perf_handler = RotatingFileHandler(
-        log_files['performance'],
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=2
-    )
-    perf_handler.setLevel(logging.INFO)
-    perf_handler.setFormatter(detailed_formatter)
     
-    # Configure specific loggers
-    mining_logger = logging.getLogger('app.services')
-    mining_logger.addHandler(mining_handler)
-    mining_logger.setLevel(logging.DEBUG)
-    
-    api_logger = logging.getLogger('app.api')
-    api_logger.addHandler(api_handler)
-    api_logger.setLevel(logging.DEBUG)
-    
-    db_logger = logging.getLogger('app.database')
-    db_logger.addHandler(db_handler)
-    db_logger.setLevel(logging.DEBUG)
+    # File handlers for different components: (size, backups, level)
+    file_settings = {
+        'mining': (50*1024*1024, 5, logging.DEBUG),
+        'api': (20*1024*1024, 3, logging.DEBUG),
+        'database': (20*1024*1024, 3, logging.DEBUG),
+        'performance': (10*1024*1024, 2, logging.INFO)
+    }
+    file_handlers = {}
+    for prefix, name in LOG_ROUTES.items():
+        max_bytes, backup_count, handler_level = file_settings[name]
+        handler = RotatingFileHandler(log_files[name], maxBytes=max_bytes, backupCount=backup_count)
+        handler.setLevel(handler_level)
+        handler.setFormatter(detailed_formatter)
+        file_handlers[prefix] = handler
+    
+    routing_handler = _RoutingHandler(console_handler, file_handlers)
+    task_handler = TaskLogHandler(level=logging.getLevelName(config.TASK_LOG_LEVEL.upper()))
+    if asynchronous:
+        # Callers only enqueue; formatting and disk I/O happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        queue_handler = _LightQueueHandler(log_queue)
+        queue_handler.addFilter(TaskContextFilter())
+        root_logger.addHandler(queue_handler)
+        _listener = QueueListener(log_queue, routing_handler, task_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        routing_handler.addFilter(TaskContextFilter())
+        root_logger.addHandler(routing_handler)
+        task_handler.addFilter(TaskContextFilter())
+        root_logger.addHandler(task_handler)
     
-    perf_logger = logging.getLogger('performance')
-    perf_logger.addHandler(perf_handler)
-    perf_logger.setLevel(logging.INFO)
+    # Per-logger levels; records below a logger's level are dropped before any formatting
+    for prefix in LOG_ROUTES:
+        logging.getLogger(prefix).setLevel(logging.INFO if prefix == 'performance' else level)
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level)
     
     # Log the setup
     logging.info("=" * 80)
     logging.info("ASSOCIATION MINING SYSTEM - DETAILED LOGGING STARTED")
     logging.info("=" * 80)
-    logging.info(f"Session Timestamp: {timestamp}")
-    logging.info(f"Logs Directory: {logs_dir}")
+    logging.info("Session Timestamp: %s", timestamp)
+    logging.info("Logs Directory: %s (%s writer)", logs_dir, "background" if asynchronous else "synchronous")
     for log_type, log_path in log_files.items():
-        logging.info(f"{log_type.upper()} Log: {log_path}")
+        logging.info("%s Log: %s", log_type.upper(), log_path)
     logging.info("=" * 80)
     
     return log_files
 
+def stop_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(stop_logging)
+
 def log_performance(operation, start_time, end_time, details=None):
     """Log performance metrics"""
     perf_logger = logging.getLogger('performance')
-    duration = end_time - start_time
+    if not perf_logger.isEnabledFor(logging.INFO):
+        return
     
-    message = f"PERFORMANCE | {operation} | Duration: {duration:.3f}s"
     if details:
-        message += f" | Details: {details}"
-    
-    perf_logger.info(message)
+        perf_logger.info("PERFORMANCE | %s | Duration: %.3fs | Details: %s", operation, end_time - start_time, details)
+    else:
+        perf_logger.info("PERFORMANCE | %s | Duration: %.3fs", operation, end_time - start_time)
 
 def log_memory_usage(operation, stage):
     """Log current memory usage"""
+    perf_logger = logging.getLogger('performance')
+    if not perf_logger.isEnabledFor(logging.INFO):
+        return
+    
     try:
         import psutil
-        import os
         
         process = psutil.Process(os.getpid())
         memory_mb = process.memory_info().rss / 1024 / 1024
-        
-        perf_logger = logging.getLogger('performance')
-        perf_logger.info(f"MEMORY | {operation} | {stage} | Memory: {memory_mb:.1f} MB")
+        perf_logger.info("MEMORY | %s | %s | Memory: %.1f MB", operation, stage, memory_mb)
         
     except ImportError:
         pass  # psutil not available
@@ -147,10 +232,12 @@ def log_memory_usage(operation, stage):
 def log_data_info(operation, data, stage):
     """Log data information (shape, size, etc.)"""
     logger = logging.getLogger('app.services.mining_service')
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     
     if hasattr(data, 'shape'):
-        logger.debug(f"DATA_INFO | {operation} | {stage} | Shape: {data.shape}")
+        logger.debug("DATA_INFO | %s | %s | Shape: %s", operation, stage, data.shape)
     elif hasattr(data, '__len__'):
-        logger.debug(f"DATA_INFO | {operation} | {stage} | Length: {len(data)}")
+        logger.debug("DATA_INFO | %s | %s | Length: %d", operation, stage, len(data))
     else:
-        logger.debug(f"DATA_INFO | {operation} | {stage} | Type: {type(data)}")
\ No newline at end of file
+        logger.debug("DATA_INFO | %s | %s | Type: %s", operation, stage, type(data))
\ No newline at end of file
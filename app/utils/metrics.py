@@ -0,0 +1,230 @@
+"""
+In-process metrics with Prometheus text exposition, and pipeline stage timing
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.logger_config import log_data_info, log_memory_usage, log_performance
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process metrics and renders them in the Prometheus text format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4"
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=HTTP_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "API request latency", ("method", "route", "status")
+)
+STAGE_DURATION = metrics.histogram(
+    "mining_stage_duration_seconds", "Mining pipeline stage duration", ("stage",), STAGE_BUCKETS
+)
+STAGE_PEAK_RSS = metrics.gauge(
+    "mining_stage_peak_rss_bytes", "Process peak RSS at the end of the last run of a stage", ("stage",)
+)
+STAGE_ROWS_IN = metrics.counter("mining_stage_rows_in_total", "Rows entering a mining stage", ("stage",))
+STAGE_ROWS_OUT = metrics.counter("mining_stage_rows_out_total", "Rows produced by a mining stage", ("stage",))
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None when it cannot be read"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+        memory = psutil.Process(os.getpid()).memory_info()
+        return getattr(memory, "peak_wset", memory.rss)
+    except ImportError:
+        return None
+
+
+class StageTimer:
+    """Records duration, peak RSS and rows in/out of every pipeline stage.
+
+    Stages are listed in the task result and fed to the process metrics.
+    """
+
+    def __init__(self, operation: str = "mining"):
+        self.operation = operation
+        self.stages: List[Dict] = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        """Time a block; set ``record["rows_out"]`` inside it to report output rows"""
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            record["duration_seconds"] = round(end - start, 4)
+            peak = peak_rss_bytes()
+            record["peak_rss_mb"] = round(peak / 1024 / 1024, 1) if peak is not None else None
+            self.stages.append(record)
+            self._observe(record, peak)
+            log_performance(f"{self.operation}.{name}", start, end,
+                            f"rows_in={record['rows_in']} rows_out={record['rows_out']}")
+            log_memory_usage(self.operation, name)
+
+    def data(self, name: str, data, stage: str):
+        """Log the shape of data passed between stages"""
+        log_data_info(f"{self.operation}.{name}", data, stage)
+
+    def _observe(self, record: Dict, peak: Optional[int]):
+        name = record["stage"]
+        STAGE_DURATION.observe(record["duration_seconds"], stage=name)
+        if peak is not None:
+            STAGE_PEAK_RSS.set(peak, stage=name)
+        if record["rows_in"] is not None:
+            STAGE_ROWS_IN.inc(record["rows_in"], stage=name)
+        if record["rows_out"] is not None:
+            STAGE_ROWS_OUT.inc(record["rows_out"], stage=name)
+
+    def to_list(self) -> List[Dict]:
+        return list(self.stages)
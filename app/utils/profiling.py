@@ -0,0 +1,176 @@
+"""
+Opt-in per-task profiling: CPU profile (cProfile) and top allocation sites (tracemalloc)
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import shutil
+import threading
+import time
+import tracemalloc
+from functools import wraps
+from typing import Dict, List, Optional
+
+from app.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILES = ("cpu.prof", "cpu.txt", "allocations.txt")
+
+_TASK_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# tracemalloc is process-wide; it stays on while any profiled task is running
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def profile_directory(task_id: str) -> str:
+    """Directory holding the profile artifacts of a task"""
+    if not _TASK_ID_PATTERN.match(task_id):
+        raise ValueError(f"Invalid task id: {task_id}")
+    return os.path.join(config.ARTIFACT_DIR, "profiles", task_id)
+
+
+def profile_file(task_id: str, name: str) -> Optional[str]:
+    """Path of a profile artifact, or None when it is unknown or was not written"""
+    if name not in PROFILE_FILES:
+        return None
+    path = os.path.join(profile_directory(task_id), name)
+    return path if os.path.isfile(path) else None
+
+
+def remove_profile(task_id: str):
+    """Remove the profile artifacts of a task, if any were written"""
+    try:
+        shutil.rmtree(profile_directory(task_id))
+    except (FileNotFoundError, ValueError):
+        pass
+    except OSError as e:
+        logger.warning("Could not remove profile of task %s: %s", task_id, e)
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(config.PROFILE_TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+class TaskProfiler:
+    """Profiles one task: the calling thread plus any worker threads wrapped with `thread_target`.
+
+    Only created for tasks that ask for it, so unprofiled tasks pay nothing.
+    Allocation sites are process-wide while tracing, so concurrent tasks show
+    up in each other's allocation report.
+    """
+
+    def __init__(self, task_id: str, top_n: Optional[int] = None):
+        self.task_id = task_id
+        self.directory = profile_directory(task_id)
+        self.top_n = top_n or config.PROFILE_TOP_N
+        self._profile = cProfile.Profile()
+        self._thread_profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._started = None
+        self._summary = None
+
+    def start(self):
+        _start_tracemalloc()
+        tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        logger.info("Profiling task %s", self.task_id)
+
+    def thread_target(self, target):
+        """Wrap a thread target so its CPU time is included in the task profile"""
+        @wraps(target)
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one active profiler per process; run unprofiled
+                logger.warning("Thread of task %s runs unprofiled: %s", self.task_id, e)
+                return target(*args, **kwargs)
+            try:
+                return target(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._thread_profiles.append(profile)
+        return profiled
+
+    def stop(self) -> Dict:
+        """Stop profiling, write the artifacts and return a summary for the task status (idempotent)"""
+        if self._summary is not None:
+            return self._summary
+        self._profile.disable()
+        wall_seconds = time.perf_counter() - self._started
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        _stop_tracemalloc()
+
+        os.makedirs(self.directory, exist_ok=True)
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            # Threads still running (e.g. a timed-out FP-Growth) are left out
+            for profile in self._thread_profiles:
+                stats.add(profile)
+        stats.dump_stats(os.path.join(self.directory, "cpu.prof"))
+
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        with open(os.path.join(self.directory, "cpu.txt"), "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+
+        allocations = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )).statistics("traceback")[:self.top_n]
+        with open(os.path.join(self.directory, "allocations.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Traced memory: current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB\n\n")
+            for rank, stat in enumerate(allocations, start=1):
+                f.write(f"#{rank}: {stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                for line in stat.traceback.format():
+                    f.write(f"  {line}\n")
+                f.write("\n")
+
+        self._summary = {
+            "wall_seconds": round(wall_seconds, 3),
+            "peak_traced_mb": round(peak / 1024 / 1024, 1),
+            "top_functions": self._top_functions(stats, 5),
+            "top_allocations": [
+                {"site": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "blocks": stat.count}
+                for stat in allocations[:5]
+            ],
+            "files": {name: f"/api/v1/task/{self.task_id}/profile/{name}" for name in PROFILE_FILES}
+        }
+        logger.info("Profile of task %s written to %s", self.task_id, self.directory)
+        return self._summary
+
+    @staticmethod
+    def _top_functions(stats: pstats.Stats, limit: int) -> List[Dict]:
+        """Functions with the highest cumulative time"""
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": calls,
+                "cumulative_seconds": round(cumulative, 4)
+            }
+            for (filename, line, name), (_, calls, _, cumulative, _) in rows
+        ]
@@ -0,0 +1,163 @@
+"""
+Task-scoped structured logs.
+
+The running task's ID is kept in a context variable and stamped on every log
+record by a filter. Records with a task ID are appended as JSON lines to
+``TASK_LOGS_DIR/<task_id>.jsonl`` (by the logging listener thread), and read
+back from a byte offset, so pollers only read what was appended since their
+last call.
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+current_task_id: contextvars.ContextVar = contextvars.ContextVar("task_id", default=None)
+
+_TASK_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# Live handlers, so removing a task's log can close the file they hold open
+_handlers: "weakref.WeakSet[TaskLogHandler]" = weakref.WeakSet()
+
+
+@contextmanager
+def task_context(task_id: str):
+    """Attribute every record logged inside the block (in this context) to a task"""
+    token = current_task_id.set(task_id)
+    try:
+        yield
+    finally:
+        current_task_id.reset(token)
+
+
+def task_log_path(task_id: str) -> str:
+    if not _TASK_ID_PATTERN.match(task_id):
+        raise ValueError(f"Invalid task id: {task_id}")
+    return os.path.join(config.TASK_LOGS_DIR, f"{task_id}.jsonl")
+
+
+class TaskContextFilter(logging.Filter):
+    """Stamps the current task ID on each record (runs on the calling thread)"""
+
+    def filter(self, record):
+        record.task_id = current_task_id.get()
+        return True
+
+
+class TaskLogHandler(logging.Handler):
+    """Appends records that carry a task ID to that task's JSON lines file"""
+
+    def __init__(self, level=logging.INFO, max_open_files: int = 16):
+        super().__init__(level)
+        self.max_open_files = max_open_files
+        self._files: "OrderedDict[str, object]" = OrderedDict()
+        os.makedirs(config.TASK_LOGS_DIR, exist_ok=True)
+        _handlers.add(self)
+
+    def emit(self, record):
+        task_id = getattr(record, "task_id", None)
+        if not task_id:
+            return
+        try:
+            entry = {
+                "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage()
+            }
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            if record.exc_text:
+                entry["exception"] = record.exc_text
+            self._file(task_id).write(json.dumps(entry) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def _file(self, task_id: str):
+        f = self._files.pop(task_id, None)
+        if f is None:
+            # Keep a bounded number of task files open; least recently written are closed
+            while len(self._files) >= self.max_open_files:
+                self._files.popitem(last=False)[1].close()
+            # Line buffered, so readers see every complete record
+            f = open(task_log_path(task_id), "a", encoding="utf-8", buffering=1)
+        self._files[task_id] = f
+        return f
+
+    def close_task(self, task_id: str):
+        """Close the task's file if it is open (a later record reopens it)"""
+        self.acquire()
+        try:
+            f = self._files.pop(task_id, None)
+            if f is not None:
+                f.close()
+        finally:
+            self.release()
+
+    def close(self):
+        self.acquire()
+        try:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+        finally:
+            self.release()
+        super().close()
+
+
+def read_task_logs(task_id: str, offset: int = 0, limit: int = 500) -> Optional[Dict]:
+    """Read up to `limit` entries starting at a byte offset.
+
+    Returns the entries and the offset to pass on the next call, or None when
+    the task has no log file. A partially written last line is left for the
+    next read.
+    """
+    path = task_log_path(task_id)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    entries = []
+    with f:
+        f.seek(max(int(offset), 0))
+        position = f.tell()
+        while len(entries) < limit:
+            line = f.readline()
+            if not line or not line.endswith(b"\n"):
+                break
+            position += len(line)
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        size = os.fstat(f.fileno()).st_size
+
+    return {"task_id": task_id, "entries": entries, "offset": position, "more": position < size}
+
+
+def remove_task_logs(task_id: str):
+    try:
+        path = task_log_path(task_id)
+    except ValueError:
+        return
+
+    for handler in list(_handlers):
+        handler.close_task(task_id)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # e.g. still open by a reader on Windows; leave the file rather than fail the cleanup
+        logger.warning("Could not remove task log %s: %s", path, e)
@@ -0,0 +1,204 @@
+"""
+End-to-end benchmark on synthetic order lines.
+
+Runs the mining pipeline (``CleanAssociationMiningService.run_mining_pipeline``),
+the Flask direct-mining path (``mine_top_sku_rules``) and the recommendation
+lookups, then reports throughput, per-stage time and peak memory and compares
+the timings with ``benchmarks/baselines.json``.
+
+Usage:
+    python -m benchmarks.e2e --scenario small
+    python -m benchmarks.e2e --scenario medium --check           # exit 1 on regression
+    python -m benchmarks.e2e --scenario medium --update-baseline
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.clean_mining_service import CleanAssociationMiningService
+from app.services.recommendation_artifact import MappedRecommendationIndex, write_recommendation_artifact
+from app.services.recommendation_index import RecommendationIndex
+from app.services.rule_index import RuleIndex
+from app.utils.config import config
+from app.utils.metrics import peak_rss_bytes
+from benchmarks.synthetic import generate_order_lines
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+SCENARIOS = {
+    "small": {"orders": 5_000, "skus": 300, "days": 60},
+    "medium": {"orders": 50_000, "skus": 2_000, "days": 90},
+    "large": {"orders": 500_000, "skus": 20_000, "days": 180}
+}
+
+# Metrics where larger is better; every other metric is a duration in seconds
+THROUGHPUT_METRICS = {"pipeline_lines_per_second", "lookup_per_second", "lookup_many_items_per_second",
+                      "artifact_lookup_per_second", "basket_per_second"}
+
+
+def _peak_mb():
+    peak = peak_rss_bytes()
+    return round(peak / 1024 / 1024, 1) if peak is not None else None
+
+
+def _per_second(count, func, repeat=5):
+    """Best-of-`repeat` throughput; single passes of the lookup loops are too short to be stable"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    elapsed = min(timings)
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+def bench_pipeline(df, min_support, min_confidence):
+    service = CleanAssociationMiningService(min_support=min_support, min_confidence=min_confidence)
+    start = time.perf_counter()
+    recommendations = service.run_mining_pipeline(df.copy())
+    elapsed = time.perf_counter() - start
+    metrics = {
+        "pipeline_seconds": elapsed,
+        "pipeline_lines_per_second": len(df) / elapsed,
+        "pipeline_rules": len(service.rules) if service.rules is not None else 0,
+        "pipeline_recommendations": len(recommendations)
+    }
+    for stage in service.stages.to_list():
+        metrics[f"stage_{stage['stage']}_seconds"] = stage["duration_seconds"]
+    metrics["pipeline_peak_rss_mb"] = _peak_mb()
+    return metrics, service, recommendations
+
+
+def bench_flask(df, top_n):
+    # Imported lazily: the UI module configures logging on import
+    from flask_ui_enhanced import mine_top_sku_rules
+
+    # Same selection as the popularity query: top N SKUs with at least 10 orders
+    order_counts = df.groupby("SKU_NAME")["ORDER_ID"].nunique()
+    top_skus = order_counts[order_counts >= 10].sort_values(ascending=False).head(top_n).index
+    top_df = df.loc[df["SKU_NAME"].isin(top_skus), ["ORDER_ID", "SKU_NAME", "days_ago"]]
+
+    start = time.perf_counter()
+    rules = mine_top_sku_rules(top_df.copy())
+    elapsed = time.perf_counter() - start
+    return {
+        "flask_top_skus": len(top_skus),
+        "flask_seconds": elapsed,
+        "flask_rules": len(rules) if rules is not None else 0,
+        "flask_peak_rss_mb": _peak_mb()
+    }
+
+
+def bench_lookup(service, recommendations, lookups, seed=0):
+    rng = np.random.default_rng(seed)
+    index = RecommendationIndex.from_recommendations(recommendations, version="benchmark")
+    parents = np.array(sorted(index._entries)) if len(index) else np.array(["missing"])
+    queries = rng.choice(parents, size=lookups).tolist()
+
+    metrics = {
+        "lookup_per_second": _per_second(lookups, lambda: [index.lookup(item) for item in queries]),
+        "lookup_many_items_per_second": _per_second(lookups, lambda: index.lookup_many(queries))
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "recommendations.bin")
+        write_recommendation_artifact(path, index._entries, "benchmark")
+        mapped = MappedRecommendationIndex(path)
+        metrics["artifact_lookup_per_second"] = _per_second(lookups, lambda: [mapped.lookup(item) for item in queries])
+        del mapped
+
+    if service.rules is not None:
+        rule_index = RuleIndex.from_rule_set(service.rules, service.sku_name_to_id, "benchmark")
+        baskets = [rng.choice(parents, size=rng.integers(1, 6)).tolist() for _ in range(min(lookups, 5_000))]
+        metrics["basket_per_second"] = _per_second(len(baskets), lambda: [rule_index.score_basket(b) for b in baskets])
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions of timing/throughput metrics beyond the tolerance"""
+    regressions = []
+    for name, expected in baseline.items():
+        current = results.get(name)
+        if current is None or not expected:
+            continue
+        if name in THROUGHPUT_METRICS:
+            if current < expected * (1 - tolerance):
+                regressions.append(f"{name}: {current:.1f} < baseline {expected:.1f}")
+        elif name.endswith("_seconds") and current > expected * (1 + tolerance) and current - expected > 0.01:
+            regressions.append(f"{name}: {current:.3f}s > baseline {expected:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end mining benchmark on synthetic data")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--min-confidence", type=float, default=0.2)
+    parser.add_argument("--top-n", type=int, default=20, help="SKUs used by the Flask direct-mining path")
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 on regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # Time mining itself; an itemset artifact cached by an earlier run would skip it
+    config.ITEMSET_CACHE_ENABLED = False
+    scenario = SCENARIOS[args.scenario]
+
+    start = time.perf_counter()
+    df = generate_order_lines(scenario["orders"], scenario["skus"], scenario["days"], seed=args.seed)
+    results = {"order_lines": len(df), "generate_seconds": time.perf_counter() - start}
+
+    pipeline_metrics, service, recommendations = bench_pipeline(df, args.min_support, args.min_confidence)
+    results.update(pipeline_metrics)
+    results.update(bench_flask(df, args.top_n))
+    results.update(bench_lookup(service, recommendations, args.lookups, args.seed))
+    results = {name: round(value, 4) if isinstance(value, float) else value for name, value in results.items()}
+
+    print(f"Scenario {args.scenario}: {scenario}")
+    for name, value in results.items():
+        print(f"  {name:36s} {value}")
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"scenario": args.scenario, "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        baselines[args.scenario] = results
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Updated baseline for {args.scenario} in {BASELINES_PATH}")
+        return
+
+    baseline = baselines.get(args.scenario)
+    if baseline is None:
+        print(f"No baseline for {args.scenario}; run with --update-baseline to record one")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressions against baseline (tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        if args.check:
+            raise SystemExit(1)
+    else:
+        print(f"No regressions against baseline (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
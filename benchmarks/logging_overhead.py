@@ -0,0 +1,73 @@
+"""
+Benchmark the logging overhead seen by the calling thread: synchronous rotating
+file handlers versus the background queue listener, eager f-strings versus
+lazy %-formatting for disabled levels, and the mining pipeline under each setup.
+
+Usage: python -m benchmarks.logging_overhead [--records 50000] [--orders 20000]
+"""
+import argparse
+import contextlib
+import logging
+import os
+import tempfile
+import time
+
+from app.services.clean_mining_service import CleanAssociationMiningService
+from app.utils.logger_config import setup_detailed_logging, stop_logging
+from benchmarks.synthetic import generate_order_lines
+
+
+def per_record_us(records: int, func) -> float:
+    start = time.perf_counter()
+    for i in range(records):
+        func(i)
+    return (time.perf_counter() - start) / records * 1e6
+
+
+def bench_mode(asynchronous: bool, records: int, df, logs_dir: str):
+    setup_detailed_logging(logs_dir=logs_dir, asynchronous=asynchronous, level="INFO", levels={})
+    logger = logging.getLogger("app.services.benchmark")
+    values = {"support": 0.02, "rules": 1234}
+
+    # Pipeline first, so it does not compete with the listener draining the record loops below
+    service = CleanAssociationMiningService(min_support=0.02, min_confidence=0.1, min_lift=0)
+    start = time.perf_counter()
+    service.run_mining_pipeline(df.copy())
+    results = {"pipeline_seconds": time.perf_counter() - start}
+
+    results["info"] = per_record_us(records, lambda i: logger.info("Progress: %d%% - %s", i % 100, values))
+    results["debug_lazy"] = per_record_us(records, lambda i: logger.debug("Progress: %d%% - %s", i % 100, values))
+    results["debug_fstring"] = per_record_us(records, lambda i: logger.debug(f"Progress: {i % 100}% - {values}"))
+
+    # Time to drain whatever the listener thread still has queued
+    start = time.perf_counter()
+    stop_logging()
+    results["drain_seconds"] = time.perf_counter() - start
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--skus", type=int, default=150)
+    args = parser.parse_args()
+
+    df = generate_order_lines(args.orders, args.skus, 60, seed=0)
+    rows = {}
+    with tempfile.TemporaryDirectory() as logs_dir, open(os.devnull, "w") as devnull:
+        # The console handler writes to stderr; keep it out of the measurement output
+        with contextlib.redirect_stderr(devnull):
+            for name, asynchronous in (("synchronous", False), ("queue", True)):
+                rows[name] = bench_mode(asynchronous, args.records, df, logs_dir)
+        logging.getLogger().handlers.clear()
+
+    print(f"{args.records} records per case, pipeline on {len(df)} order lines")
+    print(f"{'':14s} {'info us/rec':>12s} {'debug lazy':>11s} {'debug f-str':>12s} {'pipeline s':>11s} {'drain s':>8s}")
+    for name, row in rows.items():
+        print(f"{name:14s} {row['info']:12.2f} {row['debug_lazy']:11.3f} {row['debug_fstring']:12.3f} "
+              f"{row['pipeline_seconds']:11.3f} {row['drain_seconds']:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
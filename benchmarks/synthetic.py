@@ -0,0 +1,85 @@
+"""
+Synthetic order lines shaped like the output of ``DatabaseConnection.fetch_order_data``.
+
+SKU popularity follows a Zipf law, basket sizes a shifted negative binomial
+(many single-line orders, a long tail of large ones), order volume has a
+weekly cycle, and a set of planted bundles gives the miner real associations
+to find.
+
+Usage: python -m benchmarks.synthetic --orders 50000 --skus 2000 --days 90 --output orders.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+def generate_order_lines(orders: int = 50_000, skus: int = 2_000, days: int = 90, zipf: float = 1.1,
+                         mean_basket: float = 3.0, bundles: int = 50, bundle_rate: float = 0.25,
+                         seed: int = 0, now=None) -> pd.DataFrame:
+    """Generate order lines with ORDER_ID, ARTICLE_ID, SKU_NAME, INSERTED_TIMESTAMP, days_ago and order_date"""
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp(now or pd.Timestamp.today().normalize())
+
+    popularity = 1.0 / np.arange(1, skus + 1) ** zipf
+    popularity /= popularity.sum()
+
+    # Basket size: 1 + negative binomial with the requested mean
+    dispersion = 1.5
+    extra_mean = max(mean_basket - 1.0, 1e-6)
+    sizes = 1 + rng.negative_binomial(dispersion, dispersion / (dispersion + extra_mean), size=orders)
+    sizes = np.minimum(sizes, max(skus // 2, 1))
+
+    order_index = np.repeat(np.arange(orders), sizes)
+    sku_index = rng.choice(skus, size=order_index.size, p=popularity)
+
+    # Planted bundles of 2-3 SKUs drawn from the popular head, added to a share of orders
+    if bundles > 0 and skus >= 3:
+        head = max(3, min(skus, bundles * 4))
+        bundle_items = [rng.choice(head, size=rng.integers(2, 4), replace=False) for _ in range(bundles)]
+        bundle_popularity = 1.0 / np.arange(1, bundles + 1)
+        bundle_popularity /= bundle_popularity.sum()
+        with_bundle = np.flatnonzero(rng.random(orders) < bundle_rate)
+        chosen = rng.choice(bundles, size=with_bundle.size, p=bundle_popularity)
+        bundle_sizes = np.array([len(bundle_items[b]) for b in chosen], dtype=np.int64)
+        order_index = np.concatenate([order_index, np.repeat(with_bundle, bundle_sizes)])
+        sku_index = np.concatenate([sku_index] + [bundle_items[b] for b in chosen])
+
+    # Order days: weekly cycle (quieter weekends) with mild growth towards today
+    day_offsets = np.arange(days)
+    day_weights = (1.0 + 0.3 * np.cos(2 * np.pi * day_offsets / 7)) * (1.0 - 0.3 * day_offsets / max(days, 1))
+    day_weights /= day_weights.sum()
+    order_days = rng.choice(days, size=orders, p=day_weights)
+    seconds = rng.integers(6 * 3600, 22 * 3600, size=orders)
+    timestamps = now - pd.to_timedelta(order_days, unit="D") + pd.to_timedelta(seconds, unit="s")
+
+    df = pd.DataFrame({
+        "ORDER_ID": np.char.add("SO", np.char.zfill(order_index.astype(str), 8)),
+        "ARTICLE_ID": np.char.add("A", np.char.zfill(sku_index.astype(str), 6)),
+        "SKU_NAME": np.char.add("SKU ", np.char.zfill(sku_index.astype(str), 6)),
+        "INSERTED_TIMESTAMP": timestamps[order_index],
+        "days_ago": order_days[order_index]
+    })
+    df = df.sort_values("INSERTED_TIMESTAMP", ascending=False, kind="stable").reset_index(drop=True)
+    df["order_date"] = df["INSERTED_TIMESTAMP"].dt.date
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic order lines")
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--skus", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--mean-basket", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="CSV path")
+    args = parser.parse_args()
+
+    df = generate_order_lines(args.orders, args.skus, args.days, args.zipf, args.mean_basket, seed=args.seed)
+    df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df)} order lines for {df['ORDER_ID'].nunique()} orders to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark the time weighting kernels against per-row datetime weighting.
+
+Usage: python -m benchmarks.time_weighting [--rows 2000000] [--days 365] [--repeat 5]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.time_weighting import TIME_WEIGHTING_METHODS, days_ago_array, rebase_days_ago, time_weights
+from app.utils.config import config
+
+
+def make_order_dates(rows: int, days: int, seed: int = 0):
+    """Order dates as returned by fetch_order_data, plus the DATEDIFF days_ago column"""
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.today().normalize()
+    offsets = rng.integers(0, days, size=rows)
+    return pd.Series((today - pd.to_timedelta(offsets, unit="D")).date), offsets
+
+
+def best_of(repeat: int, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def per_row_exponential(order_dates: pd.Series) -> np.ndarray:
+    """The previous implementation: datetime conversion and day difference per row"""
+    dates = pd.to_datetime(order_dates)
+    days_ago = (dates.max() - dates).dt.days
+    return np.exp(-config.DECAY_RATE * days_ago).to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    order_dates, db_days_ago = make_order_dates(args.rows, args.days)
+    print(f"{args.rows} order lines over {args.days} days, best of {args.repeat}")
+
+    baseline = best_of(args.repeat, lambda: per_row_exponential(order_dates))
+    print(f"{'per-row exponential (baseline)':32s} {baseline * 1000:9.1f} ms")
+
+    days_ago = days_ago_array(order_dates)
+    conversion = best_of(args.repeat, lambda: days_ago_array(order_dates))
+    print(f"{'days_ago_array (from dates)':32s} {conversion * 1000:9.1f} ms")
+    conversion = best_of(args.repeat, lambda: rebase_days_ago(db_days_ago))
+    print(f"{'rebase_days_ago (from DATEDIFF)':32s} {conversion * 1000:9.1f} ms")
+    assert np.array_equal(rebase_days_ago(db_days_ago), days_ago)
+
+    assert np.allclose(time_weights(days_ago, "exponential_decay"), per_row_exponential(order_dates))
+
+    for method in TIME_WEIGHTING_METHODS:
+        elapsed = best_of(args.repeat, lambda: time_weights(days_ago, method))
+        print(f"{method:32s} {elapsed * 1000:9.1f} ms  (+ days_ago: {(elapsed + conversion) * 1000:.1f} ms, "
+              f"{baseline / (elapsed + conversion):.1f}x vs baseline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, send_from_directory, stream_with_context
 import requests
 import pandas as pd
 import numpy as np
@@ -8,8 +8,16 @@ import json
 import os
 import time
 import logging
-from mlxtend.frequent_patterns import apriori, association_rules
+import threading
+import uuid
+from collections import OrderedDict
 import warnings
+from app.database.pool import ConnectionPool
+from app.services.mining_engine import BasketMatrix, frequent_pairs
+from app.services.rule_export import EXPORT_FORMATS, available_formats, export_file, store_rules
+from app.services.rule_kernel import generate_rules
+from app.utils.config import config as app_config
+from app.utils.log_tail import LogTailer
 warnings.filterwarnings('ignore')
 
 app = Flask(__name__)
@@ -28,8 +36,37 @@ logging.basicConfig(
 BASE_URL = "http://127.0.0.1:8001"
 API_BASE = f"{BASE_URL}/api/v1"
 
-# Global variable to store user-defined database configuration
-USER_DB_CONFIG = {
+# One pooled session for all API server calls (keep-alive instead of a new connection per request)
+api_session = requests.Session()
+api_session.mount(BASE_URL, requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=app_config.FLASK_API_POOL_SIZE))
+
+class LRUStore:
+    """Thread-safe mapping bounded to the most recently used entries"""
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+# Per-client offsets into the API server's log files for the live log view
+log_tailer = LogTailer(app_config.LOG_DIR)
+
+# Database configuration of sessions that have not saved their own
+DEFAULT_DB_CONFIG = {
     'host': 'localhost',
     'user': 'root',
     'password': '',
@@ -39,6 +76,16 @@ USER_DB_CONFIG = {
     'recommendations_table': 'sku_recommendations'
 }
 
+# Each browser session (cookie) can target its own database; connections are pooled per database
+DB_SESSION_COOKIE = 'db_session'
+db_configs = LRUStore(app_config.FLASK_DB_SESSIONS)
+db_pool = ConnectionPool()
+
+def current_db_config():
+    """Database configuration of this browser session (a copy of the defaults until it saves one)"""
+    session_config = db_configs.get(request.cookies.get(DB_SESSION_COOKIE, ''))
+    return dict(session_config or DEFAULT_DB_CONFIG)
+
 def load_config():
     """Load database configuration"""
     try:
@@ -53,7 +100,7 @@ def load_config():
 def test_server_connection():
     """Test if the server is running"""
     try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
+        response = api_session.get(f"{API_BASE}/health", timeout=5)
         return response.status_code == 200, response.json() if response.status_code == 200 else None
     except Exception as e:
         return False, str(e)
@@ -64,15 +111,18 @@ def save_rules_to_database(user_config, rules_df):
         logger = logging.getLogger(__name__)
         logger.info(f"Saving {len(rules_df)} recommendations to table: {user_config['recommendations_table']}")
         
-        # Connect to database
-        connection = mysql.connector.connect(
-            host=user_config['host'],
-            user=user_config['user'],
-            password=user_config['password'],
-            database=user_config['database']
-        )
-        cursor = connection.cursor()
+        with db_pool.connection(user_config) as connection:
+            return _write_rules(connection, user_config, rules_df)
         
+    except Exception as e:
+        logger.error(f"Database save error: {e}")
+        return False
+
+def _write_rules(connection, user_config, rules_df):
+    """Recreate the recommendations table and insert the rules"""
+    logger = logging.getLogger(__name__)
+    cursor = connection.cursor()
+    try:
         # First ensure the table exists with correct schema
         table_name = user_config['recommendations_table']
         
@@ -114,14 +164,108 @@ def save_rules_to_database(user_config, rules_df):
         
         logger.info(f"Successfully saved {len(recommendations_data)} recommendations to {table_name}")
         
-        cursor.close()
-        connection.close()
-        
         return True
         
-    except Exception as e:
-        logger.error(f"Database save error: {e}")
-        return False
+    finally:
+        cursor.close()
+
+# Direct mining thresholds: the first support that yields frequent itemsets is used
+DIRECT_MINING_SUPPORTS = (0.03, 0.02)
+DIRECT_MINING_MIN_CONFIDENCE = 0.2
+# Accepted Top SKUs / Days Back values (both are interpolated into the SQL)
+DIRECT_MINING_TOP_SKUS = (5, 5000)
+DIRECT_MINING_DAYS_BACK = (1, 365)
+
+def direct_mining_params(top_skus=20, days_back=60):
+    """Validated (top_n, days_back) for direct mining; raises ValueError when out of range"""
+    params = []
+    for name, value, (low, high) in (("top_skus", top_skus, DIRECT_MINING_TOP_SKUS),
+                                     ("days_back", days_back, DIRECT_MINING_DAYS_BACK)):
+        try:
+            # Integers or integer strings only (int() would truncate 7.5 and accept True)
+            number = int(value) if isinstance(value, (int, str)) and not isinstance(value, bool) else None
+        except ValueError:
+            number = None
+        if number is None or not low <= number <= high:
+            raise ValueError(f"{name} must be an integer between {low} and {high}")
+        params.append(number)
+    return tuple(params)
+
+def mine_top_sku_rules(df):
+    """
+    Mine pair rules from (ORDER_ID, SKU_NAME, days_ago) order lines of the top SKUs.
+    Returns the scored rules (best first), or None when nothing qualifies.
+    
+    Uses the service's sparse engine: pairs are counted once at the lowest
+    support and the higher supports are served by filtering that result.
+    """
+    basket = BasketMatrix.from_frame(df)
+    all_itemsets = frequent_pairs(basket, min(DIRECT_MINING_SUPPORTS))
+    
+    frequent_itemsets = None
+    for min_support in DIRECT_MINING_SUPPORTS:
+        frequent_itemsets = all_itemsets.filter(all_itemsets.support >= min_support)
+        if len(frequent_itemsets) > 0:
+            break
+    
+    if frequent_itemsets is None or len(frequent_itemsets) == 0:
+        return None
+    
+    # Generate rules
+    rules = generate_rules(frequent_itemsets, min_confidence=DIRECT_MINING_MIN_CONFIDENCE)
+    
+    if len(rules) == 0:
+        return None
+    
+    # Create final output (pair rules: one antecedent and one consequent item each)
+    final_rules = pd.DataFrame({
+        'sku1': rules.labels[rules.antecedents[:, 0]],
+        'sku2': rules.labels[rules.consequents[:, 0]],
+        'confidence': rules['confidence'],
+        'lift': rules['lift'],
+        'support': rules['support']
+    })
+    final_rules.insert(2, 'association_composite_score',
+                       final_rules['confidence'] * 0.6 + final_rules['lift'] / final_rules['lift'].max() * 0.4)
+    return final_rules.sort_values('association_composite_score', ascending=False)
+
+def fetch_top_sku_lines(conn, user_config, top_n, days_back):
+    """Top N SKUs by orders (at least 10) and their (ORDER_ID, SKU_NAME, days_ago) order lines"""
+    # Get top N most popular SKUs
+    popularity_query = f"""
+    SELECT 
+        s.SKU_NAME,
+        COUNT(DISTINCT o.ORDER_ID) as order_count
+    FROM {user_config['order_table']} o
+    JOIN {user_config['sku_master_table']} s ON o.ARTICLE_ID = s.SKU_ID
+    WHERE o.INSERTED_TIMESTAMP >= DATE_SUB(CURDATE(), INTERVAL {days_back} DAY)
+    AND s.SKU_NAME IS NOT NULL
+    GROUP BY s.SKU_NAME
+    HAVING order_count >= 10
+    ORDER BY order_count DESC
+    LIMIT {top_n}
+    """
+    
+    popular_skus_df = pd.read_sql(popularity_query, conn)
+    popular_sku_list = popular_skus_df['SKU_NAME'].tolist()
+    
+    if not popular_sku_list:
+        return popular_sku_list, None
+    
+    # Load data for these SKUs using parameterized query
+    placeholders = ','.join(['%s'] * len(popular_sku_list))
+    main_query = f"""
+    SELECT 
+        o.ORDER_ID,
+        s.SKU_NAME,
+        DATEDIFF(CURDATE(), DATE(o.INSERTED_TIMESTAMP)) as days_ago
+    FROM {user_config['order_table']} o
+    JOIN {user_config['sku_master_table']} s ON o.ARTICLE_ID = s.SKU_ID
+    WHERE o.INSERTED_TIMESTAMP >= DATE_SUB(CURDATE(), INTERVAL {days_back} DAY)
+    AND s.SKU_NAME IN ({placeholders})
+    """
+    
+    return popular_sku_list, pd.read_sql(main_query, conn, params=popular_sku_list)
 
 def generate_rules_top_skus(user_config=None, top_n=20, days_back=60):
     """
@@ -133,131 +277,60 @@ def generate_rules_top_skus(user_config=None, top_n=20, days_back=60):
         
         # Use user config or fall back to default
         if user_config is None:
-            user_config = USER_DB_CONFIG
+            user_config = DEFAULT_DB_CONFIG
             
-        # Connect to database using user configuration
-        conn = mysql.connector.connect(
-            host=user_config['host'],
-            user=user_config['user'],
-            password=user_config['password'],
-            database=user_config['database']
-        )
-        
-        # Get top N most popular SKUs
-        popularity_query = f"""
-        SELECT 
-            s.SKU_NAME,
-            COUNT(DISTINCT o.ORDER_ID) as order_count
-        FROM {user_config['order_table']} o
-        JOIN {user_config['sku_master_table']} s ON o.ARTICLE_ID = s.SKU_ID
-        WHERE o.INSERTED_TIMESTAMP >= DATE_SUB(CURDATE(), INTERVAL {days_back} DAY)
-        AND s.SKU_NAME IS NOT NULL
-        GROUP BY s.SKU_NAME
-        HAVING order_count >= 10
-        ORDER BY order_count DESC
-        LIMIT {top_n}
-        """
-        
-        popular_skus_df = pd.read_sql(popularity_query, conn)
-        popular_sku_list = popular_skus_df['SKU_NAME'].tolist()
+        # Load the order lines of the top SKUs over a pooled connection
+        with db_pool.connection(user_config) as conn:
+            popular_sku_list, df = fetch_top_sku_lines(conn, user_config, top_n, days_back)
         
         if not popular_sku_list:
-            conn.close()
             return {"error": "No popular SKUs found"}, None
         
-        # Load data for these SKUs using parameterized query
-        placeholders = ','.join(['%s'] * len(popular_sku_list))
-        main_query = f"""
-        SELECT 
-            o.ORDER_ID,
-            s.SKU_NAME,
-            DATEDIFF(CURDATE(), DATE(o.INSERTED_TIMESTAMP)) as days_ago
-        FROM {user_config['order_table']} o
-        JOIN {user_config['sku_master_table']} s ON o.ARTICLE_ID = s.SKU_ID
-        WHERE o.INSERTED_TIMESTAMP >= DATE_SUB(CURDATE(), INTERVAL {days_back} DAY)
-        AND s.SKU_NAME IN ({placeholders})
-        """
-        
-        df = pd.read_sql(main_query, conn, params=popular_sku_list)
-        conn.close()
-        
         if df.empty:
             return {"error": "No order data found"}, None
         
-        # Apply simple time weighting
-        df['weight'] = np.exp(-df['days_ago'] / 30)
-        
-        # Create market basket (simple binary)
-        basket = df.groupby(['ORDER_ID', 'SKU_NAME'])['weight'].sum().reset_index()
-        basket_matrix = basket.pivot_table(
-            index='ORDER_ID', 
-            columns='SKU_NAME', 
-            values='weight', 
-            fill_value=0
-        )
-        basket_binary = (basket_matrix > 0).astype(int)
-        
-        # Mine with very high support
-        frequent_itemsets = apriori(basket_binary, min_support=0.03, use_colnames=True, max_len=2)
-        
-        if len(frequent_itemsets) == 0:
-            # Try lower threshold
-            frequent_itemsets = apriori(basket_binary, min_support=0.02, use_colnames=True, max_len=2)
+        final_rules = mine_top_sku_rules(df)
         
-        if len(frequent_itemsets) > 0:
-            # Generate rules
-            rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.2)
+        if final_rules is not None:
+            # Save to database
+            database_saved = False
+            try:
+                database_saved = save_rules_to_database(user_config, final_rules)
+            except Exception as db_error:
+                print(f"Database save failed: {db_error}")
             
-            if len(rules) > 0:
-                # Create final output
-                rules['sku1'] = rules['antecedents'].apply(lambda x: list(x)[0])
-                rules['sku2'] = rules['consequents'].apply(lambda x: list(x)[0])
-                rules['association_composite_score'] = (
-                    rules['confidence'] * 0.6 + 
-                    rules['lift'] / rules['lift'].max() * 0.4
-                )
-                
-                final_rules = rules[['sku1', 'sku2', 'association_composite_score', 'confidence', 'lift', 'support']].copy()
-                final_rules = final_rules.sort_values('association_composite_score', ascending=False)
-                
-                # Save to database
-                database_saved = False
-                try:
-                    database_saved = save_rules_to_database(user_config, final_rules)
-                except Exception as db_error:
-                    print(f"Database save failed: {db_error}")
-                
-                # Save to CSV
-                csv_filename = f"association_rules_ui_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                export_df = final_rules[['sku1', 'sku2', 'association_composite_score']].copy()
-                export_df.to_csv(csv_filename, index=False)
-                
-                end_time = time.time()
-                mining_duration = f"{end_time - start_time:.2f}s"
-                
-                stats = {
-                    "total_rules": len(final_rules),
-                    "top_n_skus": len(popular_sku_list),
-                    "total_orders": df['ORDER_ID'].nunique(),
-                    "csv_filename": csv_filename,
-                    "database_saved": database_saved,
-                    "mining_duration": mining_duration,
-                    "score_range": {
-                        "min": float(final_rules['association_composite_score'].min()),
-                        "max": float(final_rules['association_composite_score'].max())
-                    }
+            # Keep the full rule table server-side for exports
+            export_id = new_export_id("direct")
+            store_rules(export_id, final_rules)
+            
+            end_time = time.time()
+            mining_duration = f"{end_time - start_time:.2f}s"
+            
+            stats = {
+                "total_rules": len(final_rules),
+                "top_n_skus": len(popular_sku_list),
+                "total_orders": df['ORDER_ID'].nunique(),
+                "export_id": export_id,
+                "export_formats": available_formats(),
+                "database_saved": database_saved,
+                "mining_duration": mining_duration,
+                "score_range": {
+                    "min": float(final_rules['association_composite_score'].min()),
+                    "max": float(final_rules['association_composite_score'].max())
                 }
-                
-                return stats, final_rules.to_dict('records')
+            }
+            
+            return stats, final_rules.to_dict('records')
         
         return {"error": "No association rules could be generated"}, None
         
     except Exception as e:
         return {"error": str(e)}, None
 
-def direct_mining(user_config=None, days_back=30):
+def direct_mining(user_config=None, days_back=30, top_skus=20):
     """Direct mining without API - updated to use user configuration"""
-    return generate_rules_top_skus(user_config, top_n=20, days_back=days_back)
+    top_n, days_back = direct_mining_params(top_skus, days_back)
+    return generate_rules_top_skus(user_config, top_n=top_n, days_back=days_back)
 
 @app.route('/')
 def index():
@@ -269,7 +342,7 @@ def get_db_config():
     """Get current database configuration"""
     return jsonify({
         "success": True,
-        "config": USER_DB_CONFIG
+        "config": current_db_config()
     })
 
 @app.route('/api/db-config', methods=['GET', 'POST'])
@@ -280,15 +353,15 @@ def handle_db_config():
     if request.method == 'GET':
         return jsonify({
             "success": True,
-            "config": USER_DB_CONFIG
+            "config": current_db_config()
         })
     
     elif request.method == 'POST':
         try:
             data = request.get_json()
             
-            # Update global configuration
-            USER_DB_CONFIG.update({
+            # Update this session's configuration (other sessions keep theirs)
+            session_config = {
                 'host': data.get('host', 'localhost'),
                 'user': data.get('user', 'root'),
                 'password': data.get('password', ''),
@@ -296,15 +369,19 @@ def handle_db_config():
                 'order_table': data.get('order_table', 'wms_to_wcs_order_line_request_data'),
                 'sku_master_table': data.get('sku_master_table', 'sku_master'),
                 'recommendations_table': data.get('recommendations_table', 'sku_recommendations')
-            })
+            }
+            session_id = request.cookies.get(DB_SESSION_COOKIE) or uuid.uuid4().hex
+            db_configs.put(session_id, session_config)
             
-            logger.info(f"Database configuration updated - recommendations table: {USER_DB_CONFIG['recommendations_table']}")
+            logger.info(f"Database configuration updated - recommendations table: {session_config['recommendations_table']}")
             
-            return jsonify({
+            response = jsonify({
                 "success": True,
                 "message": "Database configuration updated successfully",
-                "config": USER_DB_CONFIG
+                "config": session_config
             })
+            response.set_cookie(DB_SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+            return response
         except Exception as e:
             logger.error(f"Database configuration update failed: {e}")
             return jsonify({
@@ -318,7 +395,7 @@ def test_db_connection():
     logger = logging.getLogger(__name__)
     
     try:
-        data = request.get_json() if request.get_json() else USER_DB_CONFIG
+        data = request.get_json() if request.get_json() else current_db_config()
         
         logger.info("Testing database connection")
         
@@ -414,12 +491,14 @@ def test_connection():
 def mine_direct():
     """Direct mining endpoint using user-defined database configuration"""
     data = request.get_json()
-    days_back = data.get('days_back', 60)
-    top_skus = data.get('top_skus', 20)
+    try:
+        top_n, days_back = direct_mining_params(data.get('top_skus', 20), data.get('days_back', 60))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     
     try:
         # Use user-defined database configuration
-        stats, rules = generate_rules_top_skus(USER_DB_CONFIG, top_n=top_skus, days_back=days_back)
+        stats, rules = generate_rules_top_skus(current_db_config(), top_n=top_n, days_back=days_back)
         
         if 'error' in stats:
             return jsonify({"success": False, "error": stats['error']})
@@ -433,159 +512,226 @@ def mine_direct():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
-# Global variable to track API mining status
-api_mining_status = {
-    "status": "idle",
-    "task_id": None,
-    "progress": 0,
-    "message": "",
-    "start_time": None
-}
-
-@app.route('/api/mine-api', methods=['POST'])
-def mine_api():
-    """Mine using the API server with progress tracking"""
-    global api_mining_status
+class TaskStatusCache:
+    """Upstream task status kept for a short TTL; concurrent pollers of one task share a single request"""
     
-    data = request.get_json()
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}  # task_id -> (fetched_at, status code, task JSON or None)
+        self._locks = {}
+        self._lock = threading.Lock()
     
-    payload = {
-        "days_back": data.get('days_back', 30),
-        "use_enhanced_mining": data.get('use_enhanced_mining', False),
-        "time_weighting_method": data.get('time_weighting_method', 'exponential_decay'),
-        "db_config": USER_DB_CONFIG  # Include database configuration
+    def _fresh(self, task_id):
+        entry = self._entries.get(task_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1], entry[2]
+        return None
+    
+    def get(self, task_id):
+        """(status code, task JSON or None); raises when the API server cannot be reached"""
+        cached = self._fresh(task_id)
+        if cached is not None:
+            return cached
+        
+        with self._lock:
+            task_lock = self._locks.setdefault(task_id, threading.Lock())
+        with task_lock:
+            # Another poller may have fetched it while we waited
+            cached = self._fresh(task_id)
+            if cached is not None:
+                return cached
+            response = api_session.get(f"{API_BASE}/task/{task_id}", timeout=10)
+            data = response.json() if response.status_code == 200 else None
+            with self._lock:
+                self._entries[task_id] = (time.monotonic(), response.status_code, data)
+                if len(self._entries) > self.max_entries:
+                    self._evict_expired()
+            return response.status_code, data
+    
+    def _evict_expired(self):
+        now = time.monotonic()
+        for task_id, entry in list(self._entries.items()):
+            if now - entry[0] >= self.ttl_seconds and not self._locks[task_id].locked():
+                del self._entries[task_id]
+                del self._locks[task_id]
+
+# Mining tasks by task ID; each browser's latest task is also remembered in a cookie
+mining_tasks = LRUStore(app_config.FLASK_TRACKED_TASKS)
+task_status_cache = TaskStatusCache(app_config.FLASK_STATUS_CACHE_SECONDS, app_config.FLASK_TRACKED_TASKS)
+MINING_TASK_COOKIE = 'mining_task'
+
+def idle_mining_status():
+    return {
+        "status": "idle",
+        "task_id": None,
+        "progress": 0,
+        "message": "",
+        "start_time": None
+    }
+
+def start_tracked_mining(payload, message, started_message, timeout):
+    """Send a mining request to the API server and track it; returns (tracking key, status, API response)"""
+    status = {
+        "status": "starting",
+        "task_id": None,
+        "progress": 0,
+        "message": message,
+        "start_time": time.time()
     }
+    response_data = None
     
     try:
-        # Start mining request
-        api_mining_status = {
-            "status": "starting",
-            "task_id": None,
-            "progress": 0,
-            "message": "Sending request to API server...",
-            "start_time": time.time()
-        }
-        
-        response = requests.post(f"{API_BASE}/mine-rules", json=payload, timeout=30)
+        response = api_session.post(f"{API_BASE}/mine-rules", json=payload, timeout=timeout)
         
         if response.status_code == 200:
             response_data = response.json()
-            api_mining_status.update({
+            status.update({
                 "status": "running",
                 "task_id": response_data.get('task_id'),
                 "progress": 10,
-                "message": "Mining request accepted by API server"
-            })
-            
-            return jsonify({
-                "success": True, 
-                "data": response_data,
-                "task_id": response_data.get('task_id'),
-                "message": "Mining started successfully"
+                "message": started_message
             })
         else:
-            api_mining_status.update({
+            status.update({
                 "status": "failed",
-                "message": f"API error: {response.text}"
+                "message": f"API error: {response.text}",
+                "error": f"API server error: {response.text}"
             })
-            return jsonify({"success": False, "error": f"API server error: {response.text}"})
-            
+    
     except Exception as e:
-        api_mining_status.update({
+        status.update({
             "status": "failed",
-            "message": f"Connection error: {str(e)}"
+            "message": f"Connection error: {str(e)}",
+            "error": str(e)
         })
-        return jsonify({"success": False, "error": str(e)})
-
-@app.route('/api/mining-progress')
-def get_mining_progress():
-    """Get current mining progress"""
-    global api_mining_status
     
-    # If we have a task_id and haven't gotten the final results yet, check the API server
-    if (api_mining_status.get("task_id") and 
-        (api_mining_status.get("status") in ["running", "starting"] or 
-         (api_mining_status.get("status") == "completed" and not api_mining_status.get("rules")))):
-        try:
-            # Check task status from API
-            task_response = requests.get(f"{API_BASE}/task/{api_mining_status['task_id']}", timeout=10)
+    # Requests that never got a task ID are tracked under a local key so the browser still sees the failure
+    key = status["task_id"] or f"local-{uuid.uuid4()}"
+    mining_tasks.put(key, status)
+    return key, status, response_data
+
+def refresh_mining_status(status):
+    """Update a tracked task from the API server (through the status cache) until its results are in"""
+    if not (status.get("task_id") and 
+            (status.get("status") in ["running", "starting"] or 
+             (status.get("status") == "completed" and not status.get("rules")))):
+        return status
+    
+    # Concurrent pollers share the stored dict: update a copy and swap it in
+    status = dict(status)
+    try:
+        # Check task status from API
+        status_code, task_data = task_status_cache.get(status['task_id'])
+        
+        if status_code == 200:
+            task_status = task_data.get('status', 'running')
             
-            if task_response.status_code == 200:
-                task_data = task_response.json()
-                task_status = task_data.get('status', 'running')
-                
-                # Update local status
-                api_mining_status.update({
-                    "status": task_status,
-                    "progress": int(task_data.get('progress', 0) * 100),
-                    "message": task_data.get('message', 'Processing...'),
-                })
-                
-                # If completed, get the results from task data
-                if task_status == 'completed':
-                    try:
-                        # Results should be in the task data itself
-                        task_result = task_data.get('result', {})
-                        
-                        print(f"DEBUG: Task result keys: {list(task_result.keys()) if task_result else 'None'}")
-                        print(f"DEBUG: Task result type: {type(task_result)}")
+            # Update local status
+            status.update({
+                "status": task_status,
+                "progress": int(task_data.get('progress', 0) * 100),
+                "message": task_data.get('message', 'Processing...'),
+            })
+            
+            # If completed, get the results from task data
+            if task_status == 'completed':
+                try:
+                    # Results should be in the task data itself
+                    task_result = task_data.get('result', {})
+                    
+                    if task_result:
+                        stats = task_result.get('stats', {})
+                        rules = task_result.get('rules', [])
                         
-                        if task_result:
-                            stats = task_result.get('stats', {})
-                            rules = task_result.get('rules', [])
-                            
-                            print(f"DEBUG: Stats keys: {list(stats.keys()) if stats else 'None'}")
-                            print(f"DEBUG: Rules count: {len(rules) if rules else 0}")
-                            
-                            api_mining_status.update({
-                                "status": "completed",
-                                "progress": 100,
-                                "message": "Mining completed successfully!",
-                                "result": task_result,
-                                "stats": stats,
-                                "rules": rules[:100]  # First 100 rules
-                            })
-                        else:
-                            api_mining_status.update({
-                                "status": "completed",
-                                "progress": 100,
-                                "message": "Mining completed but no results found",
-                                "error": "No result data in task"
-                            })
-                    except Exception as e:
-                        api_mining_status.update({
+                        status.update({
                             "status": "completed",
                             "progress": 100,
-                            "message": f"Mining completed but result processing error: {str(e)}",
-                            "error": str(e)
+                            "message": "Mining completed successfully!",
+                            "result": task_result,
+                            "stats": stats,
+                            "rules": rules[:100]  # First 100 rules
                         })
-                
-                # If failed, get error details
-                elif task_status == 'failed':
-                    error_msg = task_data.get('error', 'Unknown error occurred')
-                    api_mining_status.update({
-                        "status": "failed",
-                        "progress": 0,
-                        "message": f"Mining failed: {error_msg}",
-                        "error": error_msg
+                    else:
+                        status.update({
+                            "status": "completed",
+                            "progress": 100,
+                            "message": "Mining completed but no results found",
+                            "error": "No result data in task"
+                        })
+                except Exception as e:
+                    status.update({
+                        "status": "completed",
+                        "progress": 100,
+                        "message": f"Mining completed but result processing error: {str(e)}",
+                        "error": str(e)
                     })
-                    
-        except Exception as e:
-            # If we can't get progress, estimate based on time elapsed
-            elapsed = time.time() - api_mining_status.get('start_time', time.time())
-            estimated_progress = min(90, int(elapsed / 6))  # Roughly 1% per 6 seconds, max 90%
             
-            api_mining_status.update({
-                "progress": estimated_progress,
-                "message": f"Processing... ({elapsed:.0f}s elapsed, connection issue: {str(e)})"
-            })
+            # If failed, get error details
+            elif task_status == 'failed':
+                error_msg = task_data.get('error', 'Unknown error occurred')
+                status.update({
+                    "status": "failed",
+                    "progress": 0,
+                    "message": f"Mining failed: {error_msg}",
+                    "error": error_msg
+                })
+                
+    except Exception as e:
+        # If we can't get progress, estimate based on time elapsed
+        elapsed = time.time() - (status.get('start_time') or time.time())
+        estimated_progress = min(90, int(elapsed / 6))  # Roughly 1% per 6 seconds, max 90%
+        
+        status.update({
+            "progress": estimated_progress,
+            "message": f"Processing... ({elapsed:.0f}s elapsed, connection issue: {str(e)})"
+        })
+    
+    mining_tasks.put(status["task_id"], status)
+    return status
+
+def tracked_mining_response(body, key):
+    """JSON response that remembers the started task for this browser"""
+    response = jsonify(body)
+    response.set_cookie(MINING_TASK_COOKIE, key, httponly=True, samesite='Lax')
+    return response
+
+@app.route('/api/mine-api', methods=['POST'])
+def mine_api():
+    """Mine using the API server with progress tracking"""
+    data = request.get_json()
     
-    return jsonify(api_mining_status)
+    payload = {
+        "days_back": data.get('days_back', 30),
+        "use_enhanced_mining": data.get('use_enhanced_mining', False),
+        "time_weighting_method": data.get('time_weighting_method', 'exponential_decay'),
+        "db_config": current_db_config()  # Include this session's database configuration
+    }
+    
+    key, status, response_data = start_tracked_mining(
+        payload, "Sending request to API server...", "Mining request accepted by API server", timeout=30
+    )
+    
+    if status["status"] == "failed":
+        return tracked_mining_response({"success": False, "error": status["error"]}, key)
+    return tracked_mining_response({
+        "success": True, 
+        "data": response_data,
+        "task_id": status["task_id"],
+        "message": "Mining started successfully"
+    }, key)
+
+@app.route('/api/mining-progress')
+def get_mining_progress():
+    """Get mining progress of this browser's latest task"""
+    status = mining_tasks.get(request.cookies.get(MINING_TASK_COOKIE, ''))
+    if status is None:
+        return jsonify(idle_mining_status())
+    return jsonify(refresh_mining_status(status))
 
 @app.route('/api/mine-enhanced', methods=['POST'])
 def mine_enhanced():
     """Enhanced Temporal Mining using FastAPI backend"""
-    global api_mining_status
     logger = logging.getLogger(__name__)
     
     data = request.get_json()
@@ -594,68 +740,45 @@ def mine_enhanced():
         "days_back": data.get('days_back', 30),
         "use_enhanced_mining": True,  # Always use enhanced for this endpoint
         "time_weighting_method": data.get('time_weighting_method', 'exponential_decay'),
-        "db_config": USER_DB_CONFIG  # Include database configuration
+        "db_config": current_db_config()  # Include this session's database configuration
     }
     
-    logger.info(f"Starting enhanced mining with recommendations table: {USER_DB_CONFIG['recommendations_table']}")
+    logger.info(f"Starting enhanced mining with recommendations table: {payload['db_config']['recommendations_table']}")
     
-    try:
-        # Start mining request to FastAPI backend
-        api_mining_status = {
-            "status": "starting",
-            "task_id": None,
-            "progress": 0,
-            "message": "Sending request to Enhanced Mining API...",
-            "start_time": time.time()
-        }
-        
-        # Call FastAPI backend directly (same as mine_api)
-        response = requests.post(f"{API_BASE}/mine-rules", json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            result_data = response.json()
-            task_id = result_data.get('task_id')
-            
-            api_mining_status.update({
-                "status": "running", 
-                "task_id": task_id,
-                "progress": 10,
-                "message": "Enhanced mining task started successfully",
-            })
-        else:
-            api_mining_status.update({
-                "status": "failed",
-                "message": f"Failed to start mining: {response.text}",
-                "error": f"HTTP {response.status_code}: {response.text}"
-            })
-        
-        return jsonify({
-            "success": True,
-            "task_id": api_mining_status.get("task_id"),
-            "message": "Enhanced mining started successfully"
-        })
-        
-    except Exception as e:
-        api_mining_status.update({
-            "status": "failed",
-            "message": f"Failed to start: {str(e)}",
-            "error": str(e)
-        })
-        return jsonify({"success": False, "error": str(e)})
+    # Call FastAPI backend directly (same as mine_api)
+    key, status, _ = start_tracked_mining(
+        payload, "Sending request to Enhanced Mining API...", "Enhanced mining task started successfully", timeout=10
+    )
+    
+    if status["status"] == "failed":
+        return tracked_mining_response({"success": False, "error": status["error"]}, key)
+    return tracked_mining_response({
+        "success": True,
+        "task_id": status["task_id"],
+        "message": "Enhanced mining started successfully"
+    }, key)
 
 @app.route('/api/mining-progress/<task_id>')
 def get_task_progress(task_id):
     """Get progress for a specific task"""
-    global api_mining_status
+    status = mining_tasks.get(task_id)
     
-    if api_mining_status.get('task_id') == task_id:
-        return jsonify(api_mining_status)
-    else:
-        return jsonify({
-            "status": "not_found",
-            "message": "Task not found",
-            "progress": 0
-        })
+    if status is None:
+        # Started elsewhere (another UI process, or evicted here): track it from the API server
+        try:
+            status_code, _ = task_status_cache.get(task_id)
+        except Exception:
+            status_code = None
+        if status_code != 200:
+            return jsonify({
+                "status": "not_found",
+                "message": "Task not found",
+                "progress": 0
+            })
+        status = {"status": "running", "task_id": task_id, "progress": 0, "message": "", "start_time": None}
+        mining_tasks.put(task_id, status)
+    
+    return jsonify(refresh_mining_status(status))
 
 @app.route('/api/recommendations/<item>')
 def get_recommendations(item):
@@ -663,7 +786,7 @@ def get_recommendations(item):
     try:
         import urllib.parse
         encoded_item = urllib.parse.quote(item)
-        response = requests.get(f"{API_BASE}/recommendations/{encoded_item}?limit=10")
+        response = api_session.get(f"{API_BASE}/recommendations/{encoded_item}?limit=10")
         
         if response.status_code == 200:
             return jsonify({"success": True, "data": response.json()})
@@ -672,138 +795,109 @@ def get_recommendations(item):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+def new_export_id(prefix):
+    return f"{prefix}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+@app.route('/api/export/<export_id>')
+def export_rules(export_id):
+    """Download the full rules of a run (?format=csv, csv.gz or parquet); supports Range requests"""
+    fmt = request.args.get('format', 'csv')
+    try:
+        path = export_file(export_id, fmt)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if path is None:
+        return jsonify({"success": False, "error": "Export not found (it may have expired)"}), 404
+    
+    return send_file(path, mimetype=EXPORT_FORMATS[fmt][1], as_attachment=True,
+                     download_name=f"association_rules_{export_id}.{fmt}", conditional=True)
+
 @app.route('/api/export-csv', methods=['POST'])
 def export_csv():
-    """Export rules to CSV"""
+    """Get the download URL of a run's export; rules posted by older pages are stored as a new export"""
     try:
-        data = request.get_json()
-        rules = data.get('rules', [])
-        
-        if not rules:
-            return jsonify({"success": False, "error": "No rules to export"})
+        data = request.get_json() or {}
+        fmt = data.get('format', 'csv')
+        export_id = data.get('export_id')
         
-        # Create DataFrame
-        df = pd.DataFrame(rules)
-        
-        # Select required columns
-        if 'sku1' in df.columns and 'sku2' in df.columns and 'association_composite_score' in df.columns:
-            export_df = df[['sku1', 'sku2', 'association_composite_score']].copy()
-        else:
-            return jsonify({"success": False, "error": "Invalid rule format"})
+        if not export_id:
+            rules = data.get('rules', [])
+            if not rules:
+                return jsonify({"success": False, "error": "No rules to export"})
+            
+            df = pd.DataFrame(rules)
+            if not {'sku1', 'sku2', 'association_composite_score'}.issubset(df.columns):
+                return jsonify({"success": False, "error": "Invalid rule format"})
+            export_id = new_export_id("upload")
+            store_rules(export_id, df[['sku1', 'sku2', 'association_composite_score']])
         
-        # Save to CSV
-        filename = f"association_rules_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        export_df.to_csv(filename, index=False)
+        if export_file(export_id, fmt) is None:
+            return jsonify({"success": False, "error": "Export not found (it may have expired)"})
         
-        return jsonify({"success": True, "filename": filename})
+        return jsonify({
+            "success": True,
+            "export_id": export_id,
+            "url": f"/api/export/{export_id}?format={fmt}",
+            "filename": f"association_rules_{export_id}.{fmt}"
+        })
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
-@app.route('/download/<filename>')
+@app.route('/download/<path:filename>')
 def download_file(filename):
-    """Download a file"""
-    try:
-        return send_file(filename, as_attachment=True)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 404
+    """Download a file from the export directory (paths outside it are rejected)"""
+    return send_from_directory(os.path.join(app_config.ARTIFACT_DIR, "exports"), filename,
+                               as_attachment=True, conditional=True)
 
 @app.route('/api/logs/<task_id>')
 def get_task_logs(task_id):
-    """Get real-time logs for a specific task"""
+    """Get structured logs for a specific task, from ?offset= (returned by the previous call)"""
     try:
-        import glob
-        import os
-        from datetime import datetime
-        
-        # Look for log files from today
-        today = datetime.now().strftime('%Y%m%d')
-        log_patterns = [
-            f'logs/mining_detailed_{today}_*.log',
-            f'logs/api_detailed_{today}_*.log'
-        ]
-        
-        logs = []
-        for pattern in log_patterns:
-            for log_file in glob.glob(pattern):
-                try:
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        # Get recent lines that might contain our task_id
-                        recent_lines = lines[-100:] if len(lines) > 100 else lines
-                        for line in recent_lines:
-                            if task_id in line or 'INFO' in line:
-                                # Parse log line format: timestamp | level | logger | message
-                                parts = line.strip().split(' | ')
-                                if len(parts) >= 4:
-                                    timestamp = parts[0]
-                                    level = parts[1]
-                                    message = ' | '.join(parts[3:])
-                                    logs.append({
-                                        'timestamp': timestamp,
-                                        'level': level,
-                                        'message': message
-                                    })
-                except Exception as e:
-                    continue
+        params = {
+            "offset": request.args.get('offset', 0, type=int),
+            "limit": request.args.get('limit', 500, type=int)
+        }
+        # The API server keeps one JSON lines log per task and reads it from the offset
+        response = api_session.get(f"{API_BASE}/task/{task_id}/logs", params=params, timeout=10)
         
-        # Sort logs by timestamp and return recent ones
-        logs.sort(key=lambda x: x['timestamp'], reverse=True)
-        return jsonify(logs[:50])  # Return last 50 log entries
+        if response.status_code == 200:
+            return jsonify(response.json())
+        return jsonify({"error": response.text}), response.status_code
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/logs/live')
 def get_live_logs():
-    """Get live logs from all recent log files"""
+    """Get new log entries since this client's last poll (?client=<id>), or the recent tail"""
     try:
-        import glob
-        import os
-        from datetime import datetime
-        
-        # Look for log files from today
-        today = datetime.now().strftime('%Y%m%d')
-        log_patterns = [
-            f'logs/mining_detailed_{today}_*.log',
-            f'logs/api_detailed_{today}_*.log',
-            f'logs/performance_{today}_*.log'
-        ]
-        
-        logs = []
-        for pattern in log_patterns:
-            for log_file in glob.glob(pattern):
-                try:
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        # Get recent lines
-                        recent_lines = lines[-20:] if len(lines) > 20 else lines
-                        for line in recent_lines:
-                            if any(keyword in line for keyword in ['INFO', 'ERROR', 'WARNING']):
-                                # Parse log line format: timestamp | level | logger | message
-                                parts = line.strip().split(' | ')
-                                if len(parts) >= 4:
-                                    timestamp = parts[0]
-                                    level = parts[1]
-                                    logger_name = parts[2]
-                                    message = ' | '.join(parts[3:])
-                                    logs.append({
-                                        'timestamp': timestamp,
-                                        'level': level,
-                                        'logger': logger_name,
-                                        'message': message,
-                                        'source': os.path.basename(log_file)
-                                    })
-                except Exception as e:
-                    continue
-        
-        # Sort logs by timestamp and return recent ones
-        logs.sort(key=lambda x: x['timestamp'], reverse=True)
-        return jsonify(logs[:30])  # Return last 30 log entries
-        
+        return jsonify(log_tailer.poll(request.args.get('client')))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/logs/stream')
+def stream_live_logs():
+    """Server-sent events with new log entries; resumes from the client's offsets after a reconnect"""
+    # Without an id every poll would re-read the tail; such a stream keeps its own offsets until it closes
+    client_id = request.args.get('client') or f"stream-{uuid.uuid4().hex}"
+    
+    def events():
+        last_sent = time.time()
+        while True:
+            entries = log_tailer.poll(client_id)
+            if entries:
+                yield f"data: {json.dumps(entries)}\n\n"
+                last_sent = time.time()
+            elif time.time() - last_sent > 15:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                last_sent = time.time()
+            time.sleep(app_config.LOG_STREAM_INTERVAL_SECONDS)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
@@ -1068,6 +1162,7 @@ if __name__ == '__main__':
         let currentRules = [];
         let progressInterval = null;
         let currentTaskId = null;
+        let currentExportId = null;
 
         // Check connections on page load
         window.onload = function() {
@@ -1216,7 +1311,7 @@ if __name__ == '__main__':
 
         function startProgressMonitoring() {
             progressInterval = setInterval(() => {
-                fetch('/api/mining-progress')
+                fetch(currentTaskId ? `/api/mining-progress/${currentTaskId}` : '/api/mining-progress')
                     .then(response => response.json())
                     .then(data => {
                         updateProgress(data.progress, data.message);
@@ -1286,6 +1381,7 @@ if __name__ == '__main__':
         function displayResults(stats, rules) {
             const resultsDiv = document.getElementById('mining-results');
             currentRules = rules;
+            currentExportId = stats.export_id || null;
             
             let html = `
                 <div class="row mb-3">
@@ -1385,17 +1481,18 @@ if __name__ == '__main__':
                 return;
             }
             
+            // The server keeps the full rule table of the run; only older runs post the rules shown
             fetch('/api/export-csv', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({rules: currentRules})
+                body: JSON.stringify(currentExportId ? {export_id: currentExportId} : {rules: currentRules})
             })
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
                     // Create download link
                     const link = document.createElement('a');
-                    link.href = '/download/' + data.filename;
+                    link.href = data.url;
                     link.download = data.filename;
                     link.click();
                 } else {
@@ -1414,60 +1511,82 @@ if __name__ == '__main__':
         });
 
         // Live Logs Functionality
+        // The server remembers this client's offsets, so each request only returns new entries
+        const logClientId = Math.random().toString(36).slice(2);
+        const MAX_LOG_ENTRIES = 300;
         let logRefreshInterval = null;
+        let logEventSource = null;
         let autoRefreshEnabled = false;
 
+        function renderLogEntry(log) {
+            const levelClass = getLevelClass(log.level);
+            const levelIcon = getLevelIcon(log.level);
+            return `
+                <div class="log-entry mb-2 p-2 border-start border-2 ${levelClass}" style="border-color: ${getLevelColor(log.level)} !important;">
+                    <div class="d-flex justify-content-between align-items-start">
+                        <div class="flex-grow-1">
+                            <small class="text-muted me-2">${log.timestamp}</small>
+                            <span class="badge ${levelClass} me-2">
+                                <i class="${levelIcon} me-1"></i>${log.level}
+                            </span>
+                            <small class="text-muted">${log.source || 'unknown'}</small>
+                        </div>
+                    </div>
+                    <div class="mt-1" style="white-space: pre-wrap; word-break: break-all;">
+                        ${escapeHtml(log.message)}
+                    </div>
+                </div>`;
+        }
+
+        function appendLogs(logs) {
+            const logsContainer = document.getElementById('live-logs');
+            const hasEntries = logsContainer.querySelector('.log-entry') !== null;
+
+            if (logs.length === 0) {
+                if (!hasEntries) {
+                    logsContainer.innerHTML = `
+                        <div class="text-center text-muted py-3">
+                            <i class="fas fa-terminal fa-2x mb-2"></i>
+                            <p>No recent logs found.</p>
+                            <small>Logs will appear here when mining operations are running.</small>
+                        </div>`;
+                }
+                return;
+            }
+
+            if (!hasEntries) {
+                logsContainer.innerHTML = '';
+            }
+            logsContainer.insertAdjacentHTML('beforeend', logs.map(renderLogEntry).join(''));
+            // Keep the view bounded
+            const entries = logsContainer.querySelectorAll('.log-entry');
+            for (let i = 0; i < entries.length - MAX_LOG_ENTRIES; i++) {
+                entries[i].remove();
+            }
+            // Auto-scroll to bottom to show latest logs
+            logsContainer.scrollTop = logsContainer.scrollHeight;
+        }
+
+        function showLogError(error) {
+            console.error('Error fetching logs:', error);
+            const logsContainer = document.getElementById('live-logs');
+            logsContainer.innerHTML = `
+                <div class="text-center text-danger py-3">
+                    <i class="fas fa-exclamation-triangle fa-2x mb-2"></i>
+                    <p>Error loading logs: ${error.message}</p>
+                </div>`;
+        }
+
         function refreshLogs() {
-            fetch('/api/logs/live')
+            fetch(`/api/logs/live?client=${logClientId}`)
                 .then(response => response.json())
                 .then(logs => {
-                    const logsContainer = document.getElementById('live-logs');
-                    
-                    if (logs.length === 0) {
-                        logsContainer.innerHTML = `
-                            <div class="text-center text-muted py-3">
-                                <i class="fas fa-terminal fa-2x mb-2"></i>
-                                <p>No recent logs found.</p>
-                                <small>Logs will appear here when mining operations are running.</small>
-                            </div>`;
-                        return;
+                    if (logs.error) {
+                        throw new Error(logs.error);
                     }
-
-                    let logHtml = '';
-                    logs.forEach(log => {
-                        const levelClass = getLevelClass(log.level);
-                        const levelIcon = getLevelIcon(log.level);
-                        
-                        logHtml += `
-                            <div class="log-entry mb-2 p-2 border-start border-2 ${levelClass}" style="border-color: ${getLevelColor(log.level)} !important;">
-                                <div class="d-flex justify-content-between align-items-start">
-                                    <div class="flex-grow-1">
-                                        <small class="text-muted me-2">${log.timestamp}</small>
-                                        <span class="badge ${levelClass} me-2">
-                                            <i class="${levelIcon} me-1"></i>${log.level}
-                                        </span>
-                                        <small class="text-muted">${log.source || 'unknown'}</small>
-                                    </div>
-                                </div>
-                                <div class="mt-1" style="white-space: pre-wrap; word-break: break-all;">
-                                    ${escapeHtml(log.message)}
-                                </div>
-                            </div>`;
-                    });
-
-                    logsContainer.innerHTML = logHtml;
-                    // Auto-scroll to bottom to show latest logs
-                    logsContainer.scrollTop = logsContainer.scrollHeight;
+                    appendLogs(logs);
                 })
-                .catch(error => {
-                    console.error('Error fetching logs:', error);
-                    const logsContainer = document.getElementById('live-logs');
-                    logsContainer.innerHTML = `
-                        <div class="text-center text-danger py-3">
-                            <i class="fas fa-exclamation-triangle fa-2x mb-2"></i>
-                            <p>Error loading logs: ${error.message}</p>
-                        </div>`;
-                });
+                .catch(showLogError);
         }
 
         function toggleAutoRefresh() {
@@ -1475,6 +1594,10 @@ if __name__ == '__main__':
             
             if (autoRefreshEnabled) {
                 // Stop auto refresh
+                if (logEventSource) {
+                    logEventSource.close();
+                    logEventSource = null;
+                }
                 if (logRefreshInterval) {
                     clearInterval(logRefreshInterval);
                     logRefreshInterval = null;
@@ -1488,11 +1611,15 @@ if __name__ == '__main__':
                 btn.innerHTML = '<i class="fas fa-pause me-1"></i>Stop Auto Refresh';
                 btn.className = 'btn btn-outline-warning btn-sm me-2';
                 
-                // Refresh immediately
-                refreshLogs();
-                
-                // Set up interval for every 2 seconds
-                logRefreshInterval = setInterval(refreshLogs, 2000);
+                if (window.EventSource) {
+                    // New entries are pushed as they are written; the browser reconnects on its own
+                    logEventSource = new EventSource(`/api/logs/stream?client=${logClientId}`);
+                    logEventSource.onmessage = event => appendLogs(JSON.parse(event.data));
+                } else {
+                    // Refresh immediately, then poll every 2 seconds
+                    refreshLogs();
+                    logRefreshInterval = setInterval(refreshLogs, 2000);
+                }
             }
         }
 
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.mining_engine import BasketMatrix
+
+
+def make_order_lines(n_orders: int = 400, n_items: int = 12, seed: int = 7) -> pd.DataFrame:
+    """Random order lines with a few correlated item groups, so rules of several sizes exist"""
+    rng = np.random.default_rng(seed)
+    groups = [("SKU_00", "SKU_01", "SKU_02"), ("SKU_03", "SKU_04"), ("SKU_05", "SKU_06", "SKU_07")]
+    rows = []
+    for order in range(n_orders):
+        items = {f"SKU_{i:02d}" for i in rng.choice(n_items, size=rng.integers(1, 4), replace=False)}
+        for group in groups:
+            if rng.random() < 0.3:
+                items.update(item for item in group if rng.random() < 0.85)
+        day = int(rng.integers(0, 60))
+        rows.extend((f"O{order}", item, day) for item in sorted(items))
+    return pd.DataFrame(rows, columns=["ORDER_ID", "SKU_NAME", "days_ago"])
+
+
+@pytest.fixture
+def order_lines() -> pd.DataFrame:
+    return make_order_lines()
+
+
+@pytest.fixture
+def basket(order_lines) -> BasketMatrix:
+    return BasketMatrix.from_frame(order_lines)
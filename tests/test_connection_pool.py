@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+from mysql.connector.errors import PoolError
+
+from app.database import pool as pool_module
+from app.database.pool import ConnectionPool
+
+TARGET = {"host": "db1", "user": "u", "password": "p", "database": "neo"}
+OTHER = {"host": "db2", "user": "u", "password": "p", "database": "neo"}
+
+
+class FakeConnection:
+    def __init__(self, host):
+        self.host = host
+        self.closed = False
+        self.in_transaction = False
+        self.rolled_back = False
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    connections = []
+
+    def connect(host, **kwargs):
+        connections.append(FakeConnection(host))
+        return connections[-1]
+
+    monkeypatch.setattr(pool_module.mysql.connector, "connect", connect)
+    return connections
+
+
+def test_reuses_released_connection(opened):
+    pool = ConnectionPool(max_per_key=2, max_total=4, idle_seconds=60, wait_seconds=0)
+    with pool.connection(TARGET) as first:
+        pass
+    with pool.connection(TARGET) as second:
+        pass
+    assert first is second and len(opened) == 1
+    assert pool.stats() == {"targets": 1, "idle": 1, "in_use": 0, "total": 1}
+
+
+def test_targets_get_their_own_connections(opened):
+    pool = ConnectionPool(max_per_key=2, max_total=4, idle_seconds=60, wait_seconds=0)
+    with pool.connection(TARGET) as first, pool.connection(OTHER) as second:
+        assert (first.host, second.host) == ("db1", "db2")
+    assert pool.stats()["targets"] == 2
+
+
+def test_failed_block_discards_connection(opened):
+    pool = ConnectionPool(max_per_key=2, max_total=4, idle_seconds=60, wait_seconds=0)
+    with pytest.raises(RuntimeError):
+        with pool.connection(TARGET) as conn:
+            raise RuntimeError("query failed")
+    assert conn.closed
+    assert pool.stats()["total"] == 0
+
+
+def test_open_transaction_is_rolled_back_on_release(opened):
+    pool = ConnectionPool(max_per_key=2, max_total=4, idle_seconds=60, wait_seconds=0)
+    with pool.connection(TARGET) as conn:
+        conn.in_transaction = True
+    assert conn.rolled_back and not conn.closed
+
+
+def test_per_key_limit_times_out(opened):
+    pool = ConnectionPool(max_per_key=1, max_total=4, idle_seconds=60, wait_seconds=0.05)
+    with pool.connection(TARGET):
+        with pytest.raises(PoolError):
+            with pool.connection(TARGET):
+                pass
+    assert pool.stats()["in_use"] == 0
+
+
+def test_waiter_gets_released_connection(opened):
+    pool = ConnectionPool(max_per_key=1, max_total=4, idle_seconds=60, wait_seconds=5)
+    borrowed = []
+    acquired, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool.connection(TARGET) as conn:
+            borrowed.append(conn)
+            acquired.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection(TARGET) as conn:
+        assert conn is borrowed[0]
+    holder.join()
+
+
+def test_total_limit_closes_least_recently_used_idle_target(opened):
+    pool = ConnectionPool(max_per_key=2, max_total=1, idle_seconds=60, wait_seconds=0)
+    with pool.connection(TARGET) as first:
+        pass
+    with pool.connection(OTHER):
+        pass
+    assert first.closed
+    assert pool.stats()["total"] == 1
+
+
+def test_idle_connections_are_evicted(opened):
+    pool = ConnectionPool(max_per_key=2, max_total=4, idle_seconds=0, wait_seconds=0)
+    with pool.connection(TARGET) as first:
+        pass
+    with pool.connection(TARGET) as second:
+        pass
+    assert first.closed and first is not second
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from app.services.itemset_cache import ItemsetCache, basket_fingerprint
+from app.services.mining_engine import BasketMatrix
+from app.services.rule_kernel import FrequentItemsets
+from tests.conftest import make_order_lines
+
+
+def _itemsets(basket, min_support):
+    frame = basket.to_frame()
+    return FrequentItemsets.from_frame(fpgrowth(frame, min_support=min_support), basket.labels, len(basket))
+
+
+def test_fingerprint_follows_basket_contents():
+    lines = make_order_lines(seed=1)
+    assert basket_fingerprint(BasketMatrix.from_frame(lines)) == basket_fingerprint(BasketMatrix.from_frame(lines))
+    assert basket_fingerprint(BasketMatrix.from_frame(lines)) != basket_fingerprint(
+        BasketMatrix.from_frame(make_order_lines(seed=2)))
+
+    shifted = lines.assign(days_ago=lines["days_ago"] + 1)
+    assert basket_fingerprint(BasketMatrix.from_frame(lines)) != basket_fingerprint(BasketMatrix.from_frame(shifted))
+
+
+def test_round_trip_from_disk(tmp_path, basket):
+    itemsets = _itemsets(basket, 0.05)
+    item_ids = np.array([f"ID{i}" for i in range(basket.n_items)], dtype=object)
+    key = ItemsetCache(str(tmp_path)).save(basket, itemsets, item_ids, 0.05)
+
+    # A fresh cache has nothing loaded, so this reads the file
+    artifact = ItemsetCache(str(tmp_path)).load(key)
+    assert artifact.min_support == 0.05
+    assert list(artifact.basket.labels) == list(basket.labels)
+    assert (artifact.basket.matrix != basket.matrix).nnz == 0
+    np.testing.assert_array_equal(artifact.basket.order_days, basket.order_days)
+    np.testing.assert_array_equal(artifact.itemsets.items, itemsets.items)
+    np.testing.assert_array_equal(artifact.itemsets.support, itemsets.support)
+    assert list(artifact.item_ids) == list(item_ids)
+
+
+def test_find_matches_baskets_and_support(tmp_path, basket):
+    cache = ItemsetCache(str(tmp_path))
+    cache.save(basket, _itemsets(basket, 0.05), np.arange(basket.n_items), 0.05)
+    assert cache.find(basket, 0.05) is not None
+    assert cache.find(basket, 0.02) is None
+    assert cache.find(BasketMatrix.from_frame(make_order_lines(seed=3)), 0.05) is None
+
+
+def test_prunes_least_recently_used_files(tmp_path, basket):
+    cache = ItemsetCache(str(tmp_path), max_files=2, max_loaded=1)
+    keys = []
+    for i, support in enumerate((0.2, 0.1, 0.05)):
+        keys.append(cache.save(basket, _itemsets(basket, support), np.arange(basket.n_items), support))
+        os.utime(os.path.join(str(tmp_path), f"{keys[-1]}.npz"), (i, i))
+
+    assert [artifact["artifact"] for artifact in cache.list()] == [keys[2], keys[1]]
+    assert cache.load(keys[0]) is None
+
+
+def test_rejects_invalid_keys(tmp_path):
+    with pytest.raises(ValueError):
+        ItemsetCache(str(tmp_path)).load("../outside")
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from app.utils.log_tail import LogTailer
+
+
+def _line(message, level="INFO", timestamp="2026-01-01 00:00:00,000"):
+    return f"{timestamp} | {level} | app.test:1 | run() | {message}\n"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "mining_detailed_20260101_000000.log"
+    path.write_text(_line("first") + _line("second"))
+    return path
+
+
+def _tailer(tmp_path, **kwargs):
+    settings = {"tail_bytes": 1 << 20, "max_read_bytes": 1 << 20, "max_clients": 8, "idle_seconds": 60}
+    settings.update(kwargs)
+    return LogTailer(str(tmp_path), kinds=("mining_detailed",), **settings)
+
+
+def _messages(entries):
+    # The message keeps the "function() | " field, as the live view shows it
+    return [entry["message"].removeprefix("run() | ") for entry in entries]
+
+
+def test_clients_only_read_what_was_appended(tmp_path, log_file):
+    tailer = _tailer(tmp_path)
+    assert _messages(tailer.poll("a")) == ["first", "second"]
+    assert tailer.poll("a") == []
+
+    with open(log_file, "a") as f:
+        f.write(_line("third"))
+    assert _messages(tailer.poll("a")) == ["third"]
+    # Offsets are per client
+    assert _messages(tailer.poll("b")) == ["first", "second", "third"]
+
+
+def test_new_client_starts_at_tail(tmp_path, log_file):
+    tailer = _tailer(tmp_path, tail_bytes=len(_line("second")) + 5)
+    assert _messages(tailer.poll("a")) == ["second"]
+
+
+def test_partial_line_waits_for_newline(tmp_path, log_file):
+    tailer = _tailer(tmp_path)
+    tailer.poll("a")
+    with open(log_file, "a") as f:
+        f.write(_line("third")[:-10])
+    assert tailer.poll("a") == []
+    with open(log_file, "a") as f:
+        f.write(_line("third")[-10:])
+    assert _messages(tailer.poll("a")) == ["third"]
+
+
+def test_rotation_finishes_old_file(tmp_path, log_file):
+    tailer = _tailer(tmp_path)
+    tailer.poll("a")
+    with open(log_file, "a") as f:
+        f.write(_line("before rotation"))
+    os.replace(log_file, f"{log_file}.1")
+    log_file.write_text(_line("after rotation", timestamp="2026-01-01 00:00:01,000"))
+    assert _messages(tailer.poll("a")) == ["before rotation", "after rotation"]
+
+
+def test_continuation_lines_and_levels(tmp_path, log_file):
+    tailer = _tailer(tmp_path)
+    tailer.poll("a")
+    with open(log_file, "a") as f:
+        f.write(_line("hidden", level="DEBUG") + _line("failed", level="ERROR") + "Traceback line\n")
+    entries = tailer.poll("a")
+    assert _messages(entries) == ["failed\nTraceback line"]
+    assert entries[0]["level"] == "ERROR" and entries[0]["source"] == log_file.name
+
+
+def test_idle_clients_are_forgotten(tmp_path, log_file):
+    tailer = _tailer(tmp_path, max_clients=1)
+    tailer.poll("a")
+    tailer.poll("b")
+    # "a" was evicted, so it starts over from the tail
+    assert _messages(tailer.poll("a")) == ["first", "second"]
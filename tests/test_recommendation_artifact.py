@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from app.services.recommendation_artifact import (MappedRecommendationIndex, RecommendationArtifactStore,
+                                                  write_recommendation_artifact)
+from app.services.recommendation_index import RecommendationIndex, RecommendationIndexStore
+from app.services.rule_index import RuleIndex
+from app.services.rule_kernel import FrequentItemsets, generate_rules
+from app.utils.config import config
+
+ENTRIES = {
+    "A": (("B", 0.9), ("C", 0.5), ("Ä", 0.125)),
+    "B": (("A", 0.75),),
+    "C": ()
+}
+
+
+@pytest.mark.parametrize("score_dtype", ["float32", "float16"])
+def test_artifact_round_trip(tmp_path, score_dtype):
+    path = str(tmp_path / "recommendations.bin")
+    write_recommendation_artifact(path, ENTRIES, "v1", score_dtype)
+    index = MappedRecommendationIndex(path)
+
+    assert index.version == "v1"
+    assert (index.parent_count, index.pair_count) == (3, 4)
+    assert index.lookup("A") == list(ENTRIES["A"])
+    assert index.lookup("A", limit=2) == list(ENTRIES["A"][:2])
+    assert index.lookup("C") == [] and index.lookup("missing") == []
+    assert index.lookup_many(["B", "missing", "A"], limit=1) == {"B": [("A", 0.75)], "missing": [], "A": [("B", 0.9)]}
+    assert "A" in index and "missing" not in index
+
+
+def test_artifact_matches_in_memory_index(tmp_path):
+    memory = RecommendationIndex(ENTRIES, version="v1", source="test")
+    path = str(tmp_path / "recommendations.bin")
+    write_recommendation_artifact(path, ENTRIES, "v1")
+    mapped = MappedRecommendationIndex(path)
+    items = list(ENTRIES) + ["missing"]
+    assert mapped.lookup_many(items) == memory.lookup_many(items)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_an_artifact.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        MappedRecommendationIndex(str(path))
+
+
+def test_tables_keep_separate_artifacts(tmp_path):
+    store = RecommendationArtifactStore(str(tmp_path))
+    first = store.publish("sku_recommendations", ENTRIES, "v1")
+    second = store.publish("sku_recommendations_2", {"X": (("Y", 0.5),)}, "v1")
+    assert os.path.exists(first) and os.path.exists(second)
+    assert store.current("sku_recommendations")[0] == first
+    assert MappedRecommendationIndex(store.current("sku_recommendations_2")[0]).lookup("X") == [("Y", 0.5)]
+
+
+def test_republish_replaces_previous_version(tmp_path):
+    store = RecommendationArtifactStore(str(tmp_path))
+    old = store.publish("key", ENTRIES, "v1")
+    new = store.publish("key", ENTRIES, "v2")
+    assert store.current("key")[0] == new
+    assert not os.path.exists(old)
+
+
+def test_ttl_refresh_maps_artifact_without_rewriting(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RECOMMENDATION_INDEX_TTL_SECONDS", 60)
+    store = RecommendationIndexStore(RecommendationArtifactStore(str(tmp_path)))
+    store.publish("key", RecommendationIndex(ENTRIES, version="mined", source="mining"))
+    written = {path: os.stat(path).st_mtime_ns for path in map(str, tmp_path.rglob("*"))}
+
+    loads = []
+    store._indexes["key"].loaded_at -= 120
+    index = store._load("key", lambda: loads.append(1), wait=False)
+
+    assert index.version == "mined" and not loads
+    assert {path: os.stat(path).st_mtime_ns for path in map(str, tmp_path.rglob("*"))} == written
+
+
+def test_ttl_refresh_reloads_when_artifact_is_stale(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RECOMMENDATION_INDEX_TTL_SECONDS", 60)
+    store = RecommendationIndexStore(RecommendationArtifactStore(str(tmp_path)))
+    store.publish("key", RecommendationIndex(ENTRIES, version="mined", source="mining"))
+    pointer = next(path for path in tmp_path.rglob("*") if path.is_file() and path.suffix != ".bin")
+    os.utime(pointer, (0, 0))
+
+    store._indexes["key"].loaded_at -= 120
+    index = store._load("key", lambda: RecommendationIndex(ENTRIES, version="db", source="database"), wait=False)
+    assert index.version == "db"
+    assert store._indexes["key"].version == "db"
+
+
+def test_one_background_refresh_per_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RECOMMENDATION_INDEX_TTL_SECONDS", 60)
+    store = RecommendationIndexStore()
+    store.publish("key", RecommendationIndex(ENTRIES, version="v1", source="database"))
+    store._indexes["key"].loaded_at -= 120
+
+    started, release, loads = threading.Event(), threading.Event(), []
+
+    def loader():
+        loads.append(1)
+        started.set()
+        release.wait(5)
+        return RecommendationIndex(ENTRIES, version="v2", source="database")
+
+    for _ in range(5):
+        assert store.get_or_load("key", loader).version == "v1"
+    assert started.wait(5)
+    release.set()
+    for _ in range(100):
+        if store.get("key").version == "v2" and "key" not in store._refreshing:
+            break
+        time.sleep(0.01)
+    assert loads == [1] and store.get("key").version == "v2"
+
+
+def test_database_load_is_not_persisted(tmp_path):
+    store = RecommendationIndexStore(RecommendationArtifactStore(str(tmp_path)))
+    index = store.get_or_load("key", lambda: RecommendationIndex(ENTRIES, version="db", source="database"))
+    assert index.version == "db"
+    assert not list(tmp_path.rglob("*.bin"))
+
+
+def test_rule_index_scores_multi_item_antecedents(tmp_path):
+    # {A, B} -> C, A -> D, B -> A
+    index = RuleIndex(np.array(["A", "B", "C", "D"]), np.array([0, 2, 3, 4]), np.array([0, 1, 0, 1]),
+                      np.array([2, 3, 0]), np.array([2.0, 1.0, 4.0]), "v1")
+
+    recommendations, stats = index.score_basket(["A"])
+    assert recommendations == [("D", 1.0, 1)]
+    assert stats["rules_matched"] == 1
+
+    recommendations, stats = index.score_basket(["A", "B", "Z"])
+    assert recommendations == [("C", 2.0, 1), ("D", 1.0, 1)]  # B -> A is dropped: A is in the basket
+    assert stats["unknown_items"] == ["Z"]
+
+    path = str(tmp_path / "rules.npz")
+    index.save(path)
+    loaded = RuleIndex.load(path)
+    assert loaded.version == "v1"
+    assert loaded.score_basket(["A", "B"]) == index.score_basket(["A", "B"])
+
+
+def test_rule_index_aggregations():
+    # A -> C (1.0), B -> C (3.0)
+    index = RuleIndex.from_pairs(np.array(["A", "B", "C"]), np.array([0, 1]), np.array([2, 2]),
+                                 np.array([1.0, 3.0]), "v1")
+    assert index.score_basket(["A", "B"], aggregation="sum")[0] == [("C", 4.0, 2)]
+    assert index.score_basket(["A", "B"], aggregation="max")[0] == [("C", 3.0, 2)]
+    with pytest.raises(ValueError):
+        index.score_basket(["A"], aggregation="mean")
+
+
+def test_rule_index_from_rule_set_matches_rules(basket):
+    frame = basket.to_frame()
+    itemsets = FrequentItemsets.from_frame(fpgrowth(frame, min_support=0.03), basket.labels, len(basket))
+    rules = generate_rules(itemsets, min_confidence=0.2)
+    index = RuleIndex.from_rule_set(rules, None, "v1")
+    rules_frame = rules.to_frame()
+
+    for items in (["SKU_00"], ["SKU_00", "SKU_01"], ["SKU_03", "SKU_05", "SKU_06"]):
+        # Every rule whose antecedents are in the basket adds its score to each new consequent
+        expected = {}
+        for row in rules_frame.itertuples(index=False):
+            if row.antecedents <= set(items):
+                for item in row.consequents - set(items):
+                    score, count = expected.get(item, (0.0, 0))
+                    expected[item] = (score + row.confidence * row.lift, count + 1)
+        expected = {item: (round(score, 4), count) for item, (score, count) in expected.items()}
+        actual = {item: (round(score, 4), count) for item, score, count in index.score_basket(items, 50)[0]}
+        assert expected and actual == expected
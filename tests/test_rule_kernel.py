@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from mlxtend.frequent_patterns import association_rules, fpgrowth
+
+from app.services.mining_engine import weighted_support
+from app.services.rule_kernel import FrequentItemsets, adjust_pvalues, generate_rules, reweight_rules
+from app.services.time_weighting import time_weights
+
+METRICS = ("antecedent support", "consequent support", "support", "confidence", "lift", "leverage",
+           "conviction", "zhangs_metric")
+
+
+def _itemsets(basket, min_support):
+    frame = basket.to_frame()
+    freq = fpgrowth(frame, min_support=min_support, use_colnames=False)
+    return freq, FrequentItemsets.from_frame(freq, basket.labels, len(basket))
+
+
+def _by_rule(frame, labels=None):
+    def names(items):
+        return frozenset(labels[i] for i in items) if labels is not None else frozenset(items)
+    return {(names(row.antecedents), names(row.consequents)): row for row in frame.itertuples(index=False)}
+
+
+@pytest.mark.parametrize("min_support, min_confidence", [(0.05, 0.0), (0.02, 0.3), (0.1, 0.6)])
+def test_rules_match_mlxtend(basket, min_support, min_confidence):
+    freq, itemsets = _itemsets(basket, min_support)
+    expected = association_rules(freq, metric="confidence", min_threshold=min_confidence)
+    actual = generate_rules(itemsets, min_confidence=min_confidence).to_frame()
+
+    expected_rules = _by_rule(expected, basket.labels)
+    actual_rules = _by_rule(actual)
+    assert len(expected_rules) > 0
+    assert actual_rules.keys() == expected_rules.keys()
+
+    columns = list(expected.columns)
+    for rule, expected_row in expected_rules.items():
+        actual_row = actual_rules[rule]
+        for metric in METRICS:
+            position = columns.index(metric)
+            np.testing.assert_allclose(actual_row[actual.columns.get_loc(metric)], expected_row[position],
+                                       rtol=1e-9, err_msg=f"{metric} of {rule}")
+
+
+def test_lift_filter_matches_mlxtend(basket):
+    freq, itemsets = _itemsets(basket, 0.03)
+    expected = association_rules(freq, metric="lift", min_threshold=1.5)
+    actual = generate_rules(itemsets, min_lift=1.5).to_frame()
+    assert _by_rule(actual).keys() == _by_rule(expected, basket.labels).keys()
+
+
+def test_empty_itemsets_give_no_rules(basket):
+    _, itemsets = _itemsets(basket, 0.99)
+    rules = generate_rules(itemsets)
+    assert rules.empty
+    assert set(METRICS) <= set(rules.metrics)
+
+
+def test_significance_filter_keeps_subset_with_p_values(basket):
+    _, itemsets = _itemsets(basket, 0.02)
+    unfiltered = generate_rules(itemsets)
+    filtered = generate_rules(itemsets, significance_test="fisher", alpha=0.05)
+    assert 0 < len(filtered) < len(unfiltered)
+    assert (filtered["p_value"] < 0.05).all()
+
+
+def test_reweighting_with_uniform_weights_keeps_metrics(basket):
+    _, itemsets = _itemsets(basket, 0.03)
+    rules = generate_rules(itemsets, min_confidence=0.2)
+    support = weighted_support(basket, itemsets.items, np.ones(len(basket)))
+    np.testing.assert_allclose(support, itemsets.support, rtol=1e-6)
+
+    reweighted = reweight_rules(rules, itemsets, support)
+    for metric in METRICS:
+        np.testing.assert_allclose(reweighted[metric], rules[metric], rtol=1e-5, err_msg=metric)
+
+
+def test_weighted_support_counts_order_weights(basket):
+    _, itemsets = _itemsets(basket, 0.05)
+    weights = time_weights(basket.order_days, "linear_decay")
+    dense = basket.matrix.toarray().astype(bool)
+
+    expected = []
+    for row in itemsets.items:
+        items = row[row >= 0]
+        expected.append(weights[dense[:, items].all(axis=1)].sum() / weights.sum())
+    np.testing.assert_allclose(weighted_support(basket, itemsets.items, weights), expected, rtol=1e-5)
+
+    rules = reweight_rules(generate_rules(itemsets), itemsets, np.asarray(expected))
+    np.testing.assert_allclose(rules["confidence"], rules["support"] / rules["antecedent support"])
+
+
+def test_benjamini_hochberg_adjustment():
+    p_values = np.array([0.01, 0.04, 0.03, 0.005])
+    adjusted = adjust_pvalues(p_values, "bh")
+    np.testing.assert_allclose(adjusted, [0.02, 0.04, 0.04, 0.02])
+    np.testing.assert_allclose(adjust_pvalues(p_values, "bonferroni"), [0.04, 0.16, 0.12, 0.02])
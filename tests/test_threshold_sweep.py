@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from app.services.rule_kernel import FrequentItemsets, generate_rules
+from app.services.threshold_sweep import sweep_thresholds
+
+SUPPORTS = (0.02, 0.05, 0.1)
+CONFIDENCES = (0.2, 0.5)
+LIFTS = (1.0, 1.5)
+
+
+@pytest.fixture
+def sweep(basket):
+    itemsets = FrequentItemsets.from_frame(fpgrowth(basket.to_frame(), min_support=0.02), basket.labels, len(basket))
+    cells = sweep_thresholds(basket, itemsets, SUPPORTS + (0.01,), CONFIDENCES, LIFTS, max_recommendations=3,
+                             support_mined=0.02)
+    return itemsets, cells
+
+
+def test_cells_match_separate_rule_generation(basket, sweep):
+    itemsets, cells = sweep
+    available = [cell for cell in cells if cell["available"]]
+    assert len(available) == len(SUPPORTS) * len(CONFIDENCES) * len(LIFTS)
+
+    for cell in available:
+        subset = itemsets.filter(itemsets.support >= cell["min_support"])
+        rules = generate_rules(subset, min_confidence=cell["min_confidence"], min_lift=cell["min_lift"])
+        main, _, positions = rules.pairs()
+        assert cell["rules"] == len(rules), cell
+
+        # Top 3 per main item by confidence * lift, with ties sharing a rank as in the pipeline
+        score = (rules["confidence"] * rules["lift"])[positions]
+        recommendations = 0
+        for item in np.unique(main):
+            ranks = np.unique(-score[main == item], return_inverse=True)[1] + 1
+            recommendations += int((ranks <= 3).sum())
+        assert cell["recommendations"] == recommendations, cell
+        assert cell["items_covered"] == np.unique(main).size, cell
+
+
+def test_order_coverage(basket, sweep):
+    _, cells = sweep
+    cell = next(cell for cell in cells if cell["available"])
+    itemsets = FrequentItemsets.from_frame(fpgrowth(basket.to_frame(), min_support=cell["min_support"]),
+                                           basket.labels, len(basket))
+    main, _, _ = generate_rules(itemsets, cell["min_confidence"], cell["min_lift"]).pairs()
+    covered = basket.matrix.tocsc()[:, np.unique(main)].getnnz(axis=1) > 0
+    assert cell["order_coverage"] == round(float(covered.mean()), 4)
+
+
+def test_supports_below_mined_support_are_unavailable(sweep):
+    _, cells = sweep
+    unavailable = [cell for cell in cells if not cell["available"]]
+    assert {cell["min_support"] for cell in unavailable} == {0.01}
+    assert all("rules" not in cell for cell in unavailable)
+
+
+def test_cells_shrink_with_thresholds(sweep):
+    _, cells = sweep
+    counts = {(cell["min_support"], cell["min_confidence"], cell["min_lift"]): cell["rules"]
+              for cell in cells if cell["available"]}
+    for (support, confidence, lift), rules in counts.items():
+        for other, other_rules in counts.items():
+            if other[0] >= support and other[1] >= confidence and other[2] >= lift:
+                assert other_rules <= rules